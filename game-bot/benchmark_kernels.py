@@ -0,0 +1,110 @@
+"""
+Kernel Benchmark
+So sánh thời gian các vòng lặp lõi của rollout cascade: MatchThreeLogic (board tên gem)
+với kernels.py (board int8, compile bằng numba nếu có cài)
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BOT_DIR = Path(__file__).parent
+
+
+def measure(func, runs: int) -> float:
+    """
+    Thời gian trung bình mỗi lần gọi (micro giây), lấy median của 5 đợt
+    
+    Args:
+        func: Hàm không tham số
+        runs: Số lần gọi mỗi đợt
+    """
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(runs):
+            func()
+        timings.append((time.perf_counter() - start) / runs * 1e6)
+    return statistics.median(timings)
+
+
+def compile_time() -> float:
+    """Thời gian warm-up trong interpreter mới (gồm import + compile hoặc đọc cache numba)"""
+    code = ("import time; t = time.perf_counter(); import kernels; kernels.warm_up(); "
+            "print(time.perf_counter() - t)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=BOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return float("nan")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo tốc độ kernel rollout so với MatchThreeLogic")
+    parser.add_argument('--runs', type=int, default=200, help='Số lần gọi mỗi đợt đo')
+    parser.add_argument('--seed', type=int, default=3, help='Seed cho board ngẫu nhiên')
+    args = parser.parse_args()
+    
+    import kernels
+    from board_fixtures import seeded_logic, stable_board
+    from evaluator import MoveEvaluator
+    import yaml
+    
+    print("=" * 60)
+    print(f"⚡ KERNEL BENCHMARK (backend: {kernels.BACKEND})")
+    print("=" * 60)
+    if kernels.BACKEND != "numba":
+        print("⚠ Chưa cài numba: kernel chạy như Python thuần, evaluator vẫn dùng MatchThreeLogic")
+    
+    for label in ("warm-up lần đầu", "warm-up (cache)"):
+        print(f"⏱ {label}: {compile_time() * 1000:.0f} ms")
+    
+    with open(BOT_DIR / "config.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    
+    logic, gems = seeded_logic(args.seed)
+    board = stable_board(logic, gems)
+    move = logic.find_valid_moves(board)[0]
+    
+    codes = logic.encode_board(board)
+    removed = np.zeros(codes.shape, dtype=bool)
+    for match in move.matches:
+        for pos in match.positions:
+            removed[pos.row, pos.col] = True
+    removed_positions = logic.get_affected_gems(move.matches)
+    runs = np.empty((codes.size * 2, 2), dtype=np.int64)
+    gravity_board = logic.simulate_gravity(board, removed_positions)
+    gravity_codes = logic.encode_board(gravity_board)
+    spawn = logic.spawn_source.code_window(64)
+    
+    def kernel_fill():
+        target = gravity_codes.copy()
+        kernels.fill_empty(target, spawn, np.zeros(8, dtype=np.int64))
+    
+    reference = MoveEvaluator(config['scoring'], jit_kernels=False)
+    jitted = MoveEvaluator(config['scoring'], jit_kernels=False)
+    jitted.kernel = kernels.CascadeKernel(jitted.get_gem_points)
+    
+    stages = [
+        ("match scan", lambda: logic.find_all_matches(board),
+         lambda: kernels.scan_matches(codes, removed.copy(), runs)),
+        ("gravity", lambda: logic.simulate_gravity(board, removed_positions),
+         lambda: kernels.compact_columns(codes.copy(), removed)),
+        ("spawn", lambda: logic.spawn_random_gems(gravity_board), kernel_fill),
+        ("rollout", lambda: reference._rollout_cascade(move, board, logic),
+         lambda: jitted._rollout_cascade(move, board, logic)),
+    ]
+    
+    print(f"\n{'':12s} {'MatchThreeLogic':>16s} {'kernel':>12s} {'speedup':>9s}")
+    for name, baseline, kernel in stages:
+        base_us = measure(baseline, args.runs)
+        kernel_us = measure(kernel, args.runs)
+        print(f"{name:12s} {base_us:13.1f} us {kernel_us:9.1f} us {base_us / kernel_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
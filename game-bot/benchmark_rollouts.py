@@ -0,0 +1,115 @@
+"""
+Rollout Benchmark
+So sánh thời gian rollout cascade tuần tự với RolloutExecutor (thread / process pool)
+ở nhiều số worker, trên cùng một batch rollout và trên cả lượt evaluate_moves_detailed.
+Chạy trên máy thật trước khi bật calculation.parallel_rollouts.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+
+BOT_DIR = Path(__file__).parent
+
+
+def measure(func, runs: int) -> float:
+    """
+    Thời gian trung bình mỗi lần gọi (mili giây), lấy median của 5 đợt
+    
+    Args:
+        func: Hàm không tham số
+        runs: Số lần gọi mỗi đợt
+    """
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(runs):
+            func()
+        timings.append((time.perf_counter() - start) / runs * 1000)
+    return statistics.median(timings)
+
+
+def worker_counts(limit: int) -> list:
+    """1, 2, 4, ... đến số core (luôn gồm số core)"""
+    counts = []
+    count = 1
+    while count < limit:
+        counts.append(count)
+        count *= 2
+    counts.append(limit)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo tốc độ rollout song song so với tuần tự")
+    parser.add_argument('--runs', type=int, default=3, help='Số lần gọi mỗi đợt đo')
+    parser.add_argument('--rollouts', type=int, default=16, help='Số rollout mỗi move trong batch')
+    parser.add_argument('--workers', type=int, default=0, help='Số worker tối đa (0 = os.cpu_count())')
+    parser.add_argument('--modes', default="thread,process", help='Các mode cần đo, cách nhau bằng dấu phẩy')
+    parser.add_argument('--seed', type=int, default=3, help='Seed cho board ngẫu nhiên')
+    args = parser.parse_args()
+    
+    from board_fixtures import seeded_logic, stable_board
+    from evaluator import MoveEvaluator
+    from rollout_executor import RolloutExecutor, gil_disabled
+    import yaml
+    
+    with open(BOT_DIR / "config.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    calc_config = config.get('calculation', {})
+    parallel_config = calc_config.get('parallel_rollouts', {})
+    max_workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    
+    print("=" * 60)
+    print(f"⚙️ ROLLOUT BENCHMARK ({os.cpu_count()} cores, {'GIL off' if gil_disabled() else 'GIL on'})")
+    print("=" * 60)
+    if max_workers <= 1:
+        print("⚠ Chỉ có 1 core: pool không thể nhanh hơn chạy tuần tự")
+    
+    logic, gems = seeded_logic(args.seed)
+    board = stable_board(logic, gems, min_moves=4)
+    moves = logic.find_valid_moves(board)
+    print(f"📋 Board 8x8, {len(moves)} moves, {args.rollouts} rollouts/move")
+    
+    def make_evaluator(executor=None):
+        return MoveEvaluator(config['scoring'], analytic_cascade=calc_config.get('analytic_cascade', True),
+                             early_stop=False, executor=executor,
+                             jit_kernels=calc_config.get('jit_kernels', True))
+    
+    def benchmark(evaluator):
+        """(ms mỗi batch rollout, ms mỗi lượt evaluate_moves_detailed)"""
+        def rollout_batch():
+            evaluations = [evaluator._start_evaluation(move, board, logic) for move in moves]
+            evaluator._rollout_batch([(evaluation, args.rollouts) for evaluation in evaluations], board, logic)
+        
+        def full_turn():
+            evaluator.evaluate_moves_detailed(moves, board, logic, max_time=60.0)
+        
+        rollout_batch()  # Warm-up (pool, cache)
+        return measure(rollout_batch, args.runs), measure(full_turn, args.runs)
+    
+    serial = make_evaluator()
+    serial_batch, serial_turn = benchmark(serial)
+    
+    print(f"\n{'':16s} {'batch':>10s} {'speedup':>8s} {'lượt':>10s} {'speedup':>8s}")
+    print(f"{'tuần tự':16s} {serial_batch:7.1f} ms {1.0:7.2f}x {serial_turn:7.1f} ms {1.0:7.2f}x")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for workers in worker_counts(max_workers):
+            executor = RolloutExecutor(mode=mode, workers=workers, seed=parallel_config.get('seed', 0),
+                                       chunk_rollouts=parallel_config.get('chunk_rollouts', 8),
+                                       batch_rollouts=parallel_config.get('batch_rollouts', 64),
+                                       max_depth=calc_config.get('cascade_max_depth', 15))
+            executor.start()
+            try:
+                batch_ms, turn_ms = benchmark(make_evaluator(executor))
+            finally:
+                executor.shutdown()
+            label = f"{mode} x{workers}"
+            print(f"{label:16s} {batch_ms:7.1f} ms {serial_batch / batch_ms:7.2f}x "
+                  f"{turn_ms:7.1f} ms {serial_turn / turn_ms:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Startup Benchmark
+Đo thời gian import (python -X importtime) và thời gian khởi động GameBot
+trong interpreter mới - dùng để kiểm tra các import lazy không bị phá vỡ
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BOT_DIR = Path(__file__).parent
+
+# Module nặng chỉ nên được import khi thực sự dùng
+LAZY_MODULES = ['pytesseract', 'pyautogui', 'calibrate']
+
+
+def run_python(code: str, extra_args: list = None) -> subprocess.CompletedProcess:
+    """Chạy đoạn code trong interpreter mới (cwd = thư mục bot)"""
+    return subprocess.run(
+        [sys.executable] + (extra_args or []) + ["-c", code],
+        cwd=BOT_DIR, capture_output=True, text=True
+    )
+
+
+def import_time_report(module: str, top: int = 15) -> dict:
+    """
+    Báo cáo thời gian import của module (theo package top-level)
+    
+    Args:
+        module: Tên module cần đo (vd: "main")
+        top: Số package chậm nhất hiển thị
+    
+    Returns:
+        Dictionary {package: cumulative_us}
+    """
+    result = run_python(f"import {module}", ["-X", "importtime"])
+    if result.returncode != 0:
+        print(f"✗ Không import được {module}:")
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "")
+        return {}
+    
+    # Dòng: "import time:   self [us] |   cumulative | imported package"
+    packages = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        total_us += int(self_us)
+        if not name.startswith(" ") and "." not in name and name != module:
+            packages[name] = packages.get(name, 0) + int(cumulative_us)
+    
+    print(f"\n📦 import {module}: {total_us / 1000:.1f} ms")
+    for name, cumulative_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+    
+    return packages
+
+
+def check_lazy_modules(module: str) -> bool:
+    """
+    Kiểm tra các module nặng (LAZY_MODULES) không bị import khi import module
+    
+    Returns:
+        True nếu không module nào bị import sớm
+    """
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    result = run_python(code)
+    if result.returncode != 0:
+        print(f"✗ Không import được {module}")
+        return False
+    
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    if loaded:
+        print(f"⚠ import {module} kéo theo: {', '.join(loaded)}")
+        return False
+    print(f"✓ import {module} không kéo theo: {', '.join(LAZY_MODULES)}")
+    return True
+
+
+def benchmark(label: str, code: str, runs: int) -> list:
+    """
+    Đo thời gian chạy code trong interpreter mới (bao gồm khởi động Python)
+    
+    Args:
+        label: Tên hiển thị
+        code: Code cần chạy
+        runs: Số lần đo
+    
+    Returns:
+        List thời gian (giây), rỗng nếu lỗi
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run_python(code)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "?"
+            print(f"✗ {label}: {error}")
+            return []
+        timings.append(elapsed)
+    
+    print(f"⏱ {label}: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms ({runs} runs)")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo thời gian khởi động bot")
+    parser.add_argument('--runs', type=int, default=5, help='Số lần đo mỗi kịch bản')
+    parser.add_argument('--top', type=int, default=15, help='Số package chậm nhất hiển thị')
+    parser.add_argument('--bot', action='store_true',
+                        help='Đo cả GameBot() (cần màn hình và config.yaml hợp lệ)')
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("🚀 STARTUP BENCHMARK")
+    print("=" * 60)
+    
+    import_time_report("main", top=args.top)
+    check_lazy_modules("main")
+    
+    print()
+    benchmark("python (rỗng)", "pass", args.runs)
+    benchmark("import main", "import main", args.runs)
+    if args.bot:
+        benchmark("GameBot()", "from main import GameBot; GameBot('config.yaml', auto_calibrate=False)", args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Board Fixtures Module
+Board ngẫu nhiên dùng chung cho các test, benchmark và train_value_model.py
+"""
+
+import random
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from constants import SPECIAL_CELLS
+from logic import Move, MatchThreeLogic
+
+# Board thật chỉ dùng 6 loại gem đầu tiên (logic.gem_types[:6])
+LIVE_GEMS = 6
+
+
+def seeded_logic(seed: int, rows: int = 8, cols: int = 8) -> Tuple[MatchThreeLogic, List[str]]:
+    """
+    random.seed(seed) rồi tạo MatchThreeLogic
+    
+    Args:
+        seed: Seed của module random (các hàm board bên dưới dùng random)
+        rows, cols: Kích thước board
+    
+    Returns:
+        (logic, gem_pool) với gem_pool = LIVE_GEMS loại gem đầu tiên
+    """
+    random.seed(seed)
+    logic = MatchThreeLogic(rows=rows, cols=cols)
+    return logic, logic.gem_types[:LIVE_GEMS]
+
+
+def random_board(logic: MatchThreeLogic, gem_pool: Sequence[str],
+                 special_rate: float = 0.0) -> List[List[str]]:
+    """
+    Board ngẫu nhiên (có thể có match sẵn)
+    
+    Args:
+        logic: MatchThreeLogic (kích thước board)
+        gem_pool: Các gem được chọn, phân phối đều
+        special_rate: Tỉ lệ ô đặc biệt (EMPTY/LOCKED/UNKNOWN)
+    
+    Returns:
+        Board
+    """
+    return [
+        [random.choice(SPECIAL_CELLS) if special_rate and random.random() < special_rate
+         else random.choice(gem_pool)
+         for _ in range(logic.cols)]
+        for _ in range(logic.rows)
+    ]
+
+
+def stable_board(logic: MatchThreeLogic, gem_pool: Sequence[str], min_moves: int = 1) -> List[List[str]]:
+    """
+    Board ngẫu nhiên không có match sẵn, có ít nhất min_moves nước đi
+    
+    Args:
+        logic: MatchThreeLogic
+        gem_pool: Các gem được chọn, phân phối đều
+        min_moves: Số nước đi tối thiểu
+    
+    Returns:
+        Board
+    """
+    while True:
+        board = random_board(logic, gem_pool)
+        if not logic.find_all_matches(board) and logic.count_valid_moves(board) >= min_moves:
+            return board
+
+
+def random_boards(logic: MatchThreeLogic, count: int,
+                  seed: Optional[int] = None) -> Iterator[Tuple[List[List[str]], List[Move]]]:
+    """
+    Sinh board ổn định ngẫu nhiên (không có match sẵn, có ít nhất một move)
+    
+    Gem lấy từ chính SpawnSource của logic → cùng phân phối với rollout
+    
+    Args:
+        logic: MatchThreeLogic (đã set trọng số spawn)
+        count: Số board
+        seed: Seed của SpawnSource (None = giữ stream hiện tại)
+    
+    Yields:
+        (board, moves)
+    """
+    if seed is not None:
+        logic.spawn_source.seed(seed)
+    empty = [["EMPTY"] * logic.cols for _ in range(logic.rows)]
+    produced = 0
+    while produced < count:
+        board = logic.spawn_source.fill(empty)
+        if logic.find_all_matches(board):
+            continue
+        moves = logic.find_valid_moves(board)
+        if not moves:
+            continue
+        produced += 1
+        yield board, moves
@@ -0,0 +1,186 @@
+"""
+Bot Logging Module
+Central leveled logging (stdlib logging) with lazy %-formatting, rate-limited
+hot-path messages and optional rotating text/JSON file sinks
+"""
+
+import json
+import logging
+import logging.handlers
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+ROOT_LOGGER = "bot"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger cho một module (con của logger "bot")
+    
+    Dùng %-formatting để chuỗi chỉ được format khi level được bật:
+        log.debug("Phase 1: %d moves (%.2fs)", len(moves), elapsed)
+    
+    Args:
+        name: Tên module (vd: "main", "evaluator")
+    
+    Returns:
+        logging.Logger
+    """
+    if not logging.getLogger(ROOT_LOGGER).handlers:
+        # Chưa cấu hình (script/test chạy riêng module) → console mặc định ở mức INFO
+        setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def rate_limited(seconds: float = 1.0) -> dict:
+    """
+    `extra` cho message trong vòng lặp nóng: tối đa 1 lần / `seconds` mỗi vị trí gọi
+    
+        log.info("⏸ Chờ lượt...", extra=rate_limited(5))
+    
+    Args:
+        seconds: Khoảng cách tối thiểu giữa 2 lần ghi
+    
+    Returns:
+        Dictionary dùng cho tham số extra
+    """
+    return {'rate_limit': seconds}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Chặn message có `rate_limit` lặp lại quá nhanh (theo vị trí gọi)
+    Lần ghi tiếp theo được gắn số message đã bị bỏ qua
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._last_emit = {}
+        self._suppressed = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        interval = getattr(record, 'rate_limit', None)
+        if not interval:
+            return True
+        
+        # Cùng filter gắn cho nhiều handler → chỉ quyết định một lần cho mỗi record
+        decided = getattr(record, 'rate_allowed', None)
+        if decided is not None:
+            return decided
+        
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        last = self._last_emit.get(key)
+        
+        if last is not None and now - last < interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            record.rate_allowed = False
+            return False
+        
+        self._last_emit[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        record.rate_allowed = True
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Giữ nguyên giao diện print cũ: chỉ in message (thêm số lần bị bỏ qua nếu có)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" (+{suppressed} lần)"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """Mỗi record một dòng JSON (để phân tích log sau)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class StdoutHandler(logging.Handler):
+    """
+    Ghi ra sys.stdout tại thời điểm emit (không giữ stream cố định)
+    → vẫn đúng khi GUI redirect sys.stdout sau khi logging đã được cấu hình
+    """
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            sys.stdout.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging(config: Optional[dict] = None) -> logging.Logger:
+    """
+    Cấu hình logger "bot" từ mục `logging` trong config
+    
+    - level: "" = DEBUG nếu debug.verbose, ngược lại INFO (production: WARNING)
+    - file: đường dẫn file log (rotating), "" = không ghi file
+    - format: "text" hoặc "json" cho file sink
+    
+    Args:
+        config: Full configuration dictionary
+    
+    Returns:
+        Logger gốc "bot"
+    """
+    config = config or {}
+    log_config = config.get('logging', {}) or {}
+    verbose = config.get('debug', {}).get('verbose', False)
+    
+    level_name = log_config.get('level') or ('DEBUG' if verbose else 'INFO')
+    level = logging.getLevelName(str(level_name).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.propagate = False
+    
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    
+    rate_filter = RateLimitFilter()
+    
+    console = StdoutHandler()
+    console.setFormatter(ConsoleFormatter("%(message)s"))
+    console.addFilter(rate_filter)
+    root.addHandler(console)
+    
+    log_file = log_config.get('file')
+    if log_file:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=log_config.get('max_bytes', 5_000_000),
+            backupCount=log_config.get('backups', 3),
+            encoding='utf-8'
+        )
+        if log_config.get('format', 'text') == 'json':
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        file_handler.addFilter(rate_filter)
+        root.addHandler(file_handler)
+    
+    return root
@@ -144,6 +144,12 @@ REM Copy config mẫu
 copy "config.yaml" "%RELEASE_DIR%\"
 echo ✓ Copied config.yaml
 
+REM Copy trọng số value model (calculation.value_model.path)
+if exist "value_model.json" (
+    copy "value_model.json" "%RELEASE_DIR%\"
+    echo ✓ Copied value_model.json
+)
+
 REM Copy assets
 if exist "assets" (
     xcopy /E /I /Q "assets" "%RELEASE_DIR%\assets"
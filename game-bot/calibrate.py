@@ -446,6 +446,66 @@ class BoardCalibrator:
             }
         }
     
+    def capture_screen_references(self, game_window: dict, reference_path: str = "screen_states.npz",
+                                  interactive: bool = True) -> bool:
+        """
+        Chụp ảnh mẫu cho từng màn hình (Nhận thưởng / Map / Sẵn sàng / Đang chơi)
+        để ScreenStateClassifier nhận diện state nhanh thay vì dò nút bằng OCR
+        
+        Args:
+            game_window: Vùng cửa sổ game (top, left, width, height)
+            reference_path: File .npz lưu mẫu
+            interactive: If True, chờ user mở từng màn hình rồi nhấn ENTER
+        
+        Returns:
+            True nếu đã lưu mẫu
+        """
+        from screen_classifier import ScreenStateClassifier
+        
+        classifier = ScreenStateClassifier(reference_path=reference_path)
+        classifier.load()
+        
+        screens = [
+            ('reward', 'MÀN NHẬN THƯỞNG (có nút Nhận)'),
+            ('map', 'MÀN MAP (có nút Chiến)'),
+            ('ready', 'MÀN SẴN SÀNG (có nút Bắt đầu)'),
+            ('playing', 'MÀN ĐANG CHƠI (bàn cờ)'),
+        ]
+        
+        print("\n" + "="*60)
+        print("📸 CHỤP ẢNH MẪU CÁC MÀN HÌNH")
+        print("="*60)
+        
+        captured = 0
+        for state, description in screens:
+            if interactive:
+                print(f"\n👉 Mở game đến {description}")
+                answer = input("   Nhấn ENTER để chụp (gõ 's' để bỏ qua): ").strip().lower()
+                if answer == 's':
+                    continue
+            
+            with mss.mss() as sct:
+                img = np.array(sct.grab({
+                    'top': game_window['top'],
+                    'left': game_window['left'],
+                    'width': game_window['width'],
+                    'height': game_window['height']
+                }))
+                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            
+            # Chụp lại → thay mẫu cũ của state này
+            classifier.clear(state)
+            classifier.add_reference(state, img)
+            captured += 1
+            print(f"   ✅ Đã chụp mẫu '{state}'")
+        
+        if captured == 0:
+            print("\n❌ Không chụp mẫu nào.")
+            return False
+        
+        classifier.save()
+        return True
+    
     def update_config(self, data: dict, config_path: str = "config.yaml"):
         """
         Update config.yaml with new regions and button positions
@@ -717,6 +777,11 @@ def main():
             # Cập nhật vào config.yaml
             calibrator.update_config(regions)
             
+            # Ảnh mẫu màn hình cho ScreenStateClassifier (tùy chọn)
+            print("\n❓ Chụp ảnh mẫu các màn hình để nhận diện state nhanh hơn? (y/n): ", end='')
+            if input().strip().lower() in ('y', 'yes'):
+                calibrator.capture_screen_references(regions['game_window'])
+            
             print("\n" + "="*60)
             print("✅ HOÀN THÀNH!")
             print("="*60)
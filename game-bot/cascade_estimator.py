@@ -0,0 +1,174 @@
+"""
+Cascade Estimator Module
+Exact expected score of the first cascade level after a move, computed from
+the spawn distribution instead of sampled with random rollouts
+"""
+
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from logic import Move, MatchThreeLogic, SPECIAL_CELLS, EMPTY_CODE
+
+
+class FirstCascadeEstimator:
+    """
+    Kỳ vọng điểm của cấp cascade đầu tiên (chain 1) sau một move
+    
+    Sau khi gems của move bị ăn và rơi xuống, board gồm:
+    - Ô đã biết (gems rơi xuống): xác suất 1 cho đúng gem đó
+    - Ô EMPTY sẽ được lấp bằng gem mới: độc lập, theo phân phối spawn của cột
+    
+    Một ô thuộc match ngang khi ít nhất một trong các cửa sổ 3 ô chứa nó cùng màu.
+    Các ô độc lập nên xác suất "cả đoạn cùng màu g" = tích xác suất từng ô, và theo
+    inclusion-exclusion tổng số ô thuộc match trên một dòng là:
+    
+        E[số ô của g] = 3 * Σ P(đoạn 3 ô = g) - 2 * Σ P(đoạn 4 ô = g)
+    
+    Điểm kỳ vọng = Σ_g điểm(g) * (E ngang + E dọc), khớp cách tính điểm rollout
+    (len(match) * điểm gem cho mỗi match ngang/dọc).
+    """
+    
+    def __init__(self, gem_points: Callable[[str], int]):
+        """
+        Initialize estimator
+        
+        Args:
+            gem_points: Điểm mỗi gem (MoveEvaluator.get_gem_points)
+        """
+        self.gem_points = gem_points
+    
+    def board_after_move(self, move: Move, board: List[List[str]],
+                         logic: MatchThreeLogic) -> List[List[str]]:
+        """
+        Board sau khi swap, ăn gems của move và rơi xuống (chưa spawn)
+        
+        Args:
+            move: Move
+            board: Board hiện tại
+            logic: MatchThreeLogic instance
+        
+        Returns:
+            Board với các ô sẽ được spawn là EMPTY
+        """
+        board_copy = [row[:] for row in board]
+        logic.swap_gems(board_copy, move.from_pos, move.to_pos)
+        return logic.simulate_gravity(board_copy, logic.get_affected_gems(move.matches))
+    
+    def _cell_probabilities(self, board: List[List[str]], gem_types: List[str],
+                            spawn_probs: np.ndarray) -> tuple:
+        """
+        Xác suất từng ô là từng gem
+        
+        Returns:
+            (q, gems): q có shape (gems, rows, cols), gems là danh sách tên gem tương ứng
+        """
+        gems = list(gem_types)
+        index: Dict[str, int] = {gem: i for i, gem in enumerate(gems)}
+        for row in board:
+            for gem in row:
+                if gem not in index and gem not in SPECIAL_CELLS:
+                    index[gem] = len(gems)
+                    gems.append(gem)
+        
+        rows, cols = len(board), len(board[0])
+        q = np.zeros((len(gems), rows, cols), dtype=np.float64)
+        for r, row in enumerate(board):
+            for c, gem in enumerate(row):
+                if gem == "EMPTY":
+                    q[:len(gem_types), r, c] = spawn_probs[c]
+                elif gem in index:
+                    q[index[gem], r, c] = 1.0
+        return q, gems
+    
+    @staticmethod
+    def _expected_cells(q: np.ndarray) -> np.ndarray:
+        """
+        Số ô kỳ vọng thuộc match (ngang + dọc) của từng gem
+        
+        Args:
+            q: Mảng (gems, rows, cols), hoặc (N, gems, rows, cols) cho nhiều board
+        
+        Returns:
+            Mảng (gems,), hoặc (N, gems)
+        """
+        total = np.zeros(q.shape[:-2], dtype=np.float64)
+        for lines in (q, q.swapaxes(-1, -2)):   # Ngang, rồi dọc
+            if lines.shape[-1] < 3:
+                continue
+            run3 = lines[..., :-2] * lines[..., 1:-1] * lines[..., 2:]
+            total += 3 * run3.sum(axis=(-2, -1))
+            if lines.shape[-1] >= 4:
+                run4 = run3[..., :-1] * lines[..., 3:]
+                total -= 2 * run4.sum(axis=(-2, -1))
+        return total
+    
+    def expected_score(self, board: List[List[str]], gem_types: List[str],
+                       spawn_probs: np.ndarray) -> float:
+        """
+        Kỳ vọng điểm các match trên board sau khi lấp ô EMPTY
+        
+        Args:
+            board: Board sau gravity (ô EMPTY sẽ được spawn)
+            gem_types: Gem có thể rơi xuống (thứ tự cột của spawn_probs)
+            spawn_probs: Mảng (cols, len(gem_types)) - SpawnSource.probabilities()
+        
+        Returns:
+            Điểm kỳ vọng
+        """
+        q, gems = self._cell_probabilities(board, gem_types, spawn_probs)
+        points = np.array([self.gem_points(gem) for gem in gems], dtype=np.float64)
+        return float(self._expected_cells(q) @ points)
+    
+    def expected_move_score(self, move: Move, board: List[List[str]],
+                            logic: MatchThreeLogic) -> float:
+        """
+        Kỳ vọng điểm cascade cấp 1 của một move
+        
+        Args:
+            move: Move
+            board: Board hiện tại
+            logic: MatchThreeLogic instance (gem_types + phân phối spawn)
+        
+        Returns:
+            Điểm kỳ vọng của chain 1
+        """
+        after = self.board_after_move(move, board, logic)
+        return self.expected_score(after, logic.gem_types, logic.spawn_source.probabilities())
+    
+    def expected_move_scores(self, moves: List[Move], board: List[List[str]],
+                             logic: MatchThreeLogic) -> np.ndarray:
+        """
+        expected_move_score cho tất cả moves cùng lúc (swap + gravity + xác suất trên mảng numpy)
+        
+        Args:
+            moves: Danh sách moves
+            board: Board hiện tại
+            logic: MatchThreeLogic instance
+        
+        Returns:
+            Mảng (len(moves),) điểm kỳ vọng chain 1
+        """
+        if not moves:
+            return np.zeros(0, dtype=np.float64)
+        
+        codes = np.repeat(logic.encode_board(board)[np.newaxis], len(moves), axis=0)
+        removed = np.zeros(codes.shape, dtype=bool)
+        for index, move in enumerate(moves):
+            a, b = move.from_pos, move.to_pos
+            codes[index, a.row, a.col], codes[index, b.row, b.col] = \
+                codes[index, b.row, b.col], codes[index, a.row, a.col]
+            for match in move.matches:
+                for pos in match.positions:
+                    removed[index, pos.row, pos.col] = True
+        after = logic.simulate_gravity_batch(codes, removed).astype(np.intp)
+        
+        # q[n, g, r, c]: ô đã biết = one-hot, ô EMPTY = phân phối spawn của cột
+        gems = len(logic.gem_codes)
+        q = (after[:, np.newaxis] == np.arange(gems)[np.newaxis, :, np.newaxis, np.newaxis]).astype(np.float64)
+        spawn = logic.spawn_source.probabilities().T            # (len(gem_types), cols)
+        empty = after == EMPTY_CODE
+        q[:, :len(logic.gem_types)] += empty[:, np.newaxis] * spawn[np.newaxis, :, np.newaxis, :]
+        
+        points = np.array([self.gem_points(gem) for gem in logic.gem_codes], dtype=np.float64)
+        return self._expected_cells(q) @ points
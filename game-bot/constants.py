@@ -0,0 +1,17 @@
+"""
+Board Constants Module
+Hằng số về ô đặc biệt dùng chung cho logic.py, spawn.py và các module numpy
+(tách riêng để spawn.py không phải import logic.py → không còn import vòng)
+"""
+
+# Các ô đặc biệt (không swap, không match)
+SPECIAL_CELLS = ("EMPTY", "LOCKED", "UNKNOWN")
+
+# Mã số cho ô đặc biệt khi encode board sang numpy (gem types có mã >= 0)
+EMPTY_CODE = -1
+LOCKED_CODE = -2
+UNKNOWN_CODE = -3
+SPECIAL_CODES = {"EMPTY": EMPTY_CODE, "LOCKED": LOCKED_CODE, "UNKNOWN": UNKNOWN_CODE}
+
+# Ô bị gravity coi như đã bị xóa (LOCKED không giữ chỗ, gems phía trên rơi qua)
+GRAVITY_VACANT = ("EMPTY", "LOCKED")
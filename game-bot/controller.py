@@ -3,12 +3,25 @@ Mouse Controller Module
 Controls mouse movements and performs drag actions
 """
 
-import pyautogui
 import time
 import random
+from contextlib import nullcontext
 from typing import Tuple
 from logic import Position, Move
 
+# pyautogui được import ở lần dùng đầu tiên (lazy) → import module này không kéo theo
+# pyautogui (khởi động nhanh, replay/test không cần màn hình)
+_pyautogui_module = None
+
+
+def _pyautogui():
+    """Import pyautogui khi cần (lazy), các lần sau dùng lại module đã import"""
+    global _pyautogui_module
+    if _pyautogui_module is None:
+        import pyautogui
+        _pyautogui_module = pyautogui
+    return _pyautogui_module
+
 
 class MouseController:
     """Handles mouse control for game interaction"""
@@ -17,7 +30,7 @@ class MouseController:
                  cell_width: int, cell_height: int,
                  drag_duration: float = 0.3,
                  random_delay_min: float = 0.1,
-                 random_delay_max: float = 0.3):
+                 random_delay_max: float = 0.3, input_lock=None):
         """
         Initialize mouse controller
         
@@ -29,6 +42,8 @@ class MouseController:
             drag_duration: Duration of drag action in seconds
             random_delay_min: Minimum random delay
             random_delay_max: Maximum random delay
+            input_lock: Lock dùng chung khi nhiều bot điều khiển chuột trong cùng process
+                        (mỗi lần kéo giữ lock → các lần kéo không xen kẽ nhau)
         """
         self.board_top = board_top
         self.board_left = board_left
@@ -38,7 +53,13 @@ class MouseController:
         self.random_delay_min = random_delay_min
         self.random_delay_max = random_delay_max
         
+        # Độ trễ đo được của lần execute_move gần nhất (bắt đầu → thả chuột)
+        self.last_drag_latency = None
+        
+        self.input_lock = input_lock if input_lock is not None else nullcontext()
+        
         # Safety settings
+        pyautogui = _pyautogui()
         pyautogui.FAILSAFE = True  # Move mouse to corner to abort
         pyautogui.PAUSE = 0.1  # Small pause between actions
     
@@ -94,6 +115,7 @@ class MouseController:
         
         # Use human-like movement curve
         duration = random.uniform(0.2, 0.4)
+        pyautogui = _pyautogui()
         pyautogui.moveTo(x, y, duration=duration, tween=pyautogui.easeInOutQuad)
     
     def drag_gems(self, from_pos: Position, to_pos: Position, 
@@ -117,6 +139,7 @@ class MouseController:
         
         # Move to starting position
         move_duration = random.uniform(0.2, 0.4)
+        pyautogui = _pyautogui()
         pyautogui.moveTo(from_x, from_y, duration=move_duration, 
                         tween=pyautogui.easeInOutQuad)
         
@@ -147,6 +170,7 @@ class MouseController:
         
         # Move to position
         duration = random.uniform(0.2, 0.4)
+        pyautogui = _pyautogui()
         pyautogui.moveTo(x, y, duration=duration, tween=pyautogui.easeInOutQuad)
         
         # Click
@@ -162,16 +186,33 @@ class MouseController:
             add_variation: Whether to add human-like variation
         """
         print(f"Executing move: {move.from_pos} -> {move.to_pos}")
+        start_time = time.time()
         
         # Add pre-move delay
         self.human_delay()
         
         # Perform drag
-        self.drag_gems(move.from_pos, move.to_pos, add_variation)
+        with self.input_lock:
+            self.drag_gems(move.from_pos, move.to_pos, add_variation)
+        self.last_drag_latency = time.time() - start_time
         
         # Add post-move delay
         self.human_delay()
     
+    def estimate_drag_latency(self) -> float:
+        """
+        Ước tính độ trễ tối đa từ lúc gọi execute_move đến lúc thả chuột
+        (dùng trước khi đo được last_drag_latency)
+        
+        Returns:
+            Độ trễ ước tính (giây)
+        """
+        pause = _pyautogui().PAUSE
+        return (self.random_delay_max      # human_delay trước khi kéo
+                + 0.4 + pause              # moveTo tới ô bắt đầu
+                + 0.15                     # delay trước khi kéo
+                + self.drag_duration + pause)
+    
     def get_current_mouse_position(self) -> Tuple[int, int]:
         """
         Get current mouse position
@@ -179,7 +220,7 @@ class MouseController:
         Returns:
             Tuple of (x, y) screen coordinates
         """
-        return pyautogui.position()
+        return _pyautogui().position()
     
     def is_mouse_in_board(self) -> bool:
         """
@@ -188,7 +229,7 @@ class MouseController:
         Returns:
             True if mouse is in board area
         """
-        x, y = pyautogui.position()
+        x, y = _pyautogui().position()
         
         in_x = self.board_left <= x <= self.board_left + (self.cell_width * 8)  # Assuming 8 cols
         in_y = self.board_top <= y <= self.board_top + (self.cell_height * 8)  # Assuming 8 rows
@@ -200,7 +241,7 @@ class MouseController:
         Emergency stop - move mouse to corner
         (Triggers PyAutoGUI failsafe)
         """
-        pyautogui.moveTo(0, 0)
+        _pyautogui().moveTo(0, 0)
     
     def update_board_coordinates(self, board_top: int, board_left: int,
                                 cell_width: int, cell_height: int):
@@ -232,7 +273,7 @@ class MouseCalibration:
         """
         print("Move mouse to desired position and press Enter...")
         input()
-        return pyautogui.position()
+        return _pyautogui().position()
     
     @staticmethod
     def calibrate_board() -> dict:
@@ -0,0 +1,560 @@
+"""
+Evaluation Service Module
+Local evaluation daemon shared by several bot processes on one host
+(named pipe on Windows, Unix socket elsewhere) plus the thin client used by GameBot
+
+Socket và authkey nằm trong thư mục riêng của user (0700); authkey ngẫu nhiên do service
+tạo (file 0600) - không có authkey thì không kết nối được, vì message được gửi bằng pickle
+"""
+
+import itertools
+import os
+import queue
+import secrets
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional, Tuple
+
+import yaml
+
+from logic import Move, MatchThreeLogic
+from evaluator import MoveEvaluator, MoveEvaluation
+from speculative import SpeculativeEvaluator
+from bot_logging import get_logger, rate_limited, setup_logging
+
+log = get_logger("eval_service")
+
+AUTHKEY_BYTES = 32
+
+
+def _check_private(path: str):
+    """
+    Kiểm tra file/thư mục thuộc user hiện tại và không ai khác truy cập được
+    
+    Raises:
+        PermissionError: Sai chủ sở hữu hoặc quyền quá rộng
+    """
+    if sys.platform == "win32":
+        return  # Thư mục trong profile của user, quyền do ACL của Windows
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} phải thuộc user hiện tại, không cho group/other truy cập "
+                              f"(hiện tại uid={info.st_uid}, mode={oct(stat.S_IMODE(info.st_mode))})")
+
+
+def runtime_dir() -> str:
+    """
+    Thư mục riêng của user cho socket và authkey (tạo với quyền 0700 nếu chưa có)
+    
+    Returns:
+        $XDG_RUNTIME_DIR/match3-eval, <temp>/match3-eval-<uid> hoặc %LOCALAPPDATA%\\match3-eval
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, "match3-eval")
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        path = os.path.join(os.environ["XDG_RUNTIME_DIR"], "match3-eval")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"match3-eval-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    _check_private(path)
+    return path
+
+
+def default_address() -> str:
+    """Địa chỉ mặc định: named pipe theo user (Windows) hoặc Unix socket trong runtime_dir()"""
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\match3-eval-{user}"
+    return os.path.join(runtime_dir(), "eval.sock")
+
+
+def default_authkey_file() -> str:
+    """File authkey mặc định trong runtime_dir()"""
+    return os.path.join(runtime_dir(), "authkey")
+
+
+def load_authkey(path: Optional[str] = None, create: bool = False) -> Optional[bytes]:
+    """
+    Đọc authkey ngẫu nhiên của user (multiprocessing.connection unpickle dữ liệu nhận được
+    → chỉ process biết authkey mới được kết nối)
+    
+    Args:
+        path: File authkey ('' / None = default_authkey_file())
+        create: Tạo key mới (quyền 0600) nếu chưa có - chỉ service làm việc này
+    
+    Returns:
+        authkey, hoặc None nếu chưa có file (và create=False)
+    
+    Raises:
+        PermissionError: File authkey không riêng tư (thuộc user khác hoặc group/other đọc được)
+        ValueError: File authkey rỗng / quá ngắn
+    """
+    path = path or default_authkey_file()
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(AUTHKEY_BYTES))
+            log.info("🔑 Created eval service authkey %s", path)
+    if not os.path.exists(path):
+        return None
+    
+    _check_private(path)
+    with open(path, "rb") as f:
+        authkey = f.read()
+    if len(authkey) < 16:
+        raise ValueError(f"Authkey {path} quá ngắn ({len(authkey)} bytes)")
+    return authkey
+
+
+def encode_board(board: List[List[str]]) -> Tuple[int, int, Tuple[str, ...], bytes]:
+    """
+    Nén board thành (rows, cols, bảng màu, 1 byte mỗi ô) để gửi qua socket
+    
+    Args:
+        board: Game board
+    
+    Returns:
+        (rows, cols, palette, cells)
+    """
+    palette = {}
+    cells = bytearray()
+    for row in board:
+        for gem in row:
+            cells.append(palette.setdefault(gem, len(palette)))
+    return (len(board), len(board[0]) if board else 0, tuple(palette), bytes(cells))
+
+
+def decode_board(packed: Tuple[int, int, Tuple[str, ...], bytes]) -> List[List[str]]:
+    """
+    Giải nén board từ encode_board
+    
+    Args:
+        packed: (rows, cols, palette, cells)
+    
+    Returns:
+        Game board
+    """
+    rows, cols, palette, cells = packed
+    return [[palette[cells[row * cols + col]] for col in range(cols)] for row in range(rows)]
+
+
+def encode_spawn(probabilities) -> Optional[Tuple[Tuple[float, ...], ...]]:
+    """
+    Phân phối spawn (SpawnSource.probabilities()) dạng tuple lồng nhau: gửi được qua socket
+    và dùng được làm key của batch/cache
+    
+    Args:
+        probabilities: Mảng (cols, len(gem_types)), hoặc None
+    
+    Returns:
+        Tuple theo cột, hoặc None (= phân phối đều)
+    """
+    if probabilities is None:
+        return None
+    return tuple(tuple(float(p) for p in column) for column in probabilities)
+
+
+@dataclass(order=True)
+class _Job:
+    """Một request đang chờ (sắp xếp theo priority cao trước, rồi deadline sớm trước)"""
+    sort_key: Tuple[int, float, int]
+    packed: tuple = field(compare=False)
+    spawn: Optional[tuple] = field(compare=False)
+    max_time: float = field(compare=False)
+    deadline: Optional[float] = field(compare=False)
+    rollout_scale: float = field(compare=False)
+    request_id: int = field(compare=False)
+    reply: object = field(compare=False)
+
+
+class EvalService:
+    """
+    Daemon đánh giá nước đi dùng chung cho các bot trên cùng máy
+    
+    - Mỗi client một thread nhận request, một worker duy nhất tính toán
+      → các bot không còn tranh CPU với nhau
+    - Ưu tiên: priority của client, rồi deadline sớm nhất (lượt sắp hết giờ đi trước)
+    - Batching: các request đang chờ có cùng board (và phân phối spawn) được tính một lần, trả cho tất cả
+    - Transposition cache: SpeculativeEvaluator (LRU theo board hash, dùng lại
+      một phần khi board chỉ khác vài ô) dùng chung cho các client cùng phân phối spawn
+    """
+    
+    MAX_CACHES = 4  # Số phân phối spawn giữ cache cùng lúc
+    
+    def __init__(self, config: dict, address: Optional[str] = None,
+                 authkey: Optional[bytes] = None):
+        """
+        Initialize service
+        
+        Args:
+            config: Full configuration dictionary (scoring + eval_service)
+            address: Địa chỉ lắng nghe (mặc định: eval_service.address hoặc default_address())
+            authkey: Khóa xác thực của multiprocessing.connection
+                     (mặc định: đọc/tạo file eval_service.authkey_file)
+        
+        Raises:
+            PermissionError, ValueError: Không có authkey riêng tư dùng được
+        """
+        service_config = config.get('eval_service', {})
+        self.address = address or service_config.get('address') or default_address()
+        self.authkey = authkey or load_authkey(service_config.get('authkey_file'), create=True)
+        if not self.authkey:
+            raise ValueError("Eval service cần authkey")
+        self.max_batch = service_config.get('max_batch', 8)
+        self.max_entries = service_config.get('max_entries', 64)
+        
+        self.evaluator = MoveEvaluator.from_config(config)
+        self.caches: "OrderedDict[tuple, SpeculativeEvaluator]" = OrderedDict()
+        
+        self.jobs: "queue.PriorityQueue[_Job]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._running = False
+        self._listener = None
+        
+        # Thống kê
+        self.requests = 0
+        self.evaluations = 0
+        self.batched = 0
+        self.expired = 0
+    
+    def _cache_for(self, rows: int, cols: int, spawn: Optional[tuple]) -> SpeculativeEvaluator:
+        """
+        Cache (và logic) theo kích thước board và phân phối spawn của client
+        
+        Kết quả tính với phân phối khác không được dùng lại; chỉ giữ MAX_CACHES cache gần nhất
+        (phân phối của bot đổi dần theo SpawnEstimator)
+        """
+        key = (rows, cols, spawn)
+        cache = self.caches.get(key)
+        if cache is None:
+            logic = MatchThreeLogic(rows, cols)
+            if spawn is not None:
+                logic.spawn_source.set_weights([list(column) for column in spawn])
+            cache = SpeculativeEvaluator(self.evaluator, logic, max_entries=self.max_entries)
+            self.caches[key] = cache
+            while len(self.caches) > self.MAX_CACHES:
+                self.caches.popitem(last=False)
+        self.caches.move_to_end(key)
+        return cache
+    
+    def serve_forever(self):
+        """Lắng nghe và phục vụ cho đến khi stop() hoặc Ctrl+C"""
+        if sys.platform != "win32" and os.path.exists(self.address):
+            os.unlink(self.address)  # Socket cũ của lần chạy trước
+        
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="eval-accept", daemon=True).start()
+        log.info("🧮 Eval service listening on %s", self.address)
+        
+        try:
+            while self._running:
+                try:
+                    job = self.jobs.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self._process(job)
+        except KeyboardInterrupt:
+            log.info("⏸ Eval service stopped by user")
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Dừng service"""
+        self._running = False
+        self.evaluator.close()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            log.info("📊 Eval service: %d requests, %d evaluations, %d batched, %d expired",
+                     self.requests, self.evaluations, self.batched, self.expired)
+    
+    def _accept_loop(self):
+        """Nhận kết nối mới (mỗi client một thread)"""
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self._running:
+                    log.warning("⚠ Eval service accept error", extra=rate_limited(5))
+                    continue
+                return
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+    
+    def _client_loop(self, conn):
+        """Đọc request của một client và đưa vào hàng đợi"""
+        send_lock = threading.Lock()
+        
+        def reply(message: dict):
+            with send_lock:
+                try:
+                    conn.send(message)
+                except (OSError, EOFError):
+                    pass  # Client đã ngắt (timeout → fallback)
+        
+        try:
+            while self._running:
+                request = conn.recv()
+                self.requests += 1
+                priority = int(request.get('priority', 0))
+                deadline = request.get('deadline')
+                self.jobs.put(_Job(
+                    sort_key=(-priority, deadline if deadline is not None else float('inf'),
+                              next(self._sequence)),
+                    packed=request['board'],
+                    spawn=request.get('spawn'),
+                    max_time=request.get('max_time', 3.0),
+                    deadline=deadline,
+                    rollout_scale=request.get('rollout_scale', 1.0),
+                    request_id=request['id'],
+                    reply=reply
+                ))
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+    
+    def _collect_batch(self, first: _Job) -> List[_Job]:
+        """Lấy thêm các request đang chờ có cùng board và phân phối spawn (tối đa max_batch)"""
+        batch = [first]
+        others = []
+        while len(batch) < self.max_batch:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            same = job.packed == first.packed and job.spawn == first.spawn
+            (batch if same else others).append(job)
+        for job in others:
+            self.jobs.put(job)
+        return batch
+    
+    def _process(self, first: _Job):
+        """Đánh giá một board và trả kết quả cho cả batch"""
+        now = time.time()
+        batch = []
+        for job in self._collect_batch(first):
+            if job.deadline is not None and job.deadline <= now:
+                self.expired += 1
+                job.reply({'id': job.request_id, 'error': 'expired'})
+            else:
+                batch.append(job)
+        if not batch:
+            return
+        
+        # Request gấp nhất quyết định deadline, request thoáng nhất quyết định độ sâu
+        deadlines = [job.deadline for job in batch if job.deadline is not None]
+        deadline = min(deadlines) if deadlines else None
+        max_time = max(job.max_time for job in batch)
+        rollout_scale = max(job.rollout_scale for job in batch)
+        
+        try:
+            board = decode_board(first.packed)
+            cache = self._cache_for(first.packed[0], first.packed[1], first.spawn)
+            moves = cache.logic.find_valid_moves(board)
+            evaluations = cache.evaluate(board, moves, max_time=max_time, deadline=deadline,
+                                         rollout_scale=rollout_scale) if moves else []
+            response = {'evaluations': evaluations}
+            self.evaluations += 1
+        except Exception as e:
+            log.warning("⚠ Eval service error: %s", e, extra=rate_limited(5))
+            response = {'error': str(e)}
+        
+        self.batched += len(batch) - 1
+        for job in batch:
+            job.reply(dict(response, id=job.request_id))
+
+
+class EvalClient:
+    """
+    Client của EvalService dùng trong GameBot
+    
+    evaluate() trả về None khi service không chạy/không trả lời kịp
+    → GameBot tự đánh giá trong process (fallback)
+    """
+    
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None,
+                 priority: int = 0, fallback_reserve: float = 0.3, retry_interval: float = 5.0,
+                 authkey_file: Optional[str] = None):
+        """
+        Initialize client
+        
+        Args:
+            address: Địa chỉ service (mặc định: default_address())
+            authkey: Khóa xác thực (mặc định: đọc authkey_file khi kết nối)
+            priority: Độ ưu tiên của bot này (cao hơn được phục vụ trước)
+            fallback_reserve: Thời gian (giây) trước deadline dành cho fallback trong process
+            retry_interval: Chờ bao lâu trước khi thử kết nối lại sau khi lỗi
+            authkey_file: File authkey do service tạo ('' / None = default_authkey_file())
+        """
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.authkey_file = authkey_file
+        self.priority = priority
+        self.fallback_reserve = fallback_reserve
+        self.retry_interval = retry_interval
+        
+        self._conn = None
+        self._retry_at = 0.0
+        self._ids = itertools.count(1)
+    
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["EvalClient"]:
+        """
+        Tạo client từ mục `eval_service` (None nếu tắt)
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            EvalClient hoặc None
+        """
+        service_config = config.get('eval_service', {})
+        if not service_config.get('enabled', False):
+            return None
+        try:
+            address = service_config.get('address') or default_address()
+        except PermissionError as e:
+            log.warning("⚠ Eval service disabled: %s", e)
+            return None
+        return cls(
+            address=address,
+            priority=service_config.get('priority', 0),
+            fallback_reserve=service_config.get('fallback_reserve', 0.3),
+            retry_interval=service_config.get('retry_interval', 5.0),
+            authkey_file=service_config.get('authkey_file') or None
+        )
+    
+    def _connect(self) -> bool:
+        """Kết nối (lazy), không thử lại liên tục khi service chưa chạy"""
+        if self._conn is not None:
+            return True
+        if time.time() < self._retry_at:
+            return False
+        try:
+            if self.authkey is None:
+                # Service tạo authkey khi khởi động → chưa có file = service chưa chạy lần nào
+                self.authkey = load_authkey(self.authkey_file)
+                if self.authkey is None:
+                    raise FileNotFoundError(f"chưa có authkey {self.authkey_file or default_authkey_file()}")
+            self._conn = Client(self.address, authkey=self.authkey)
+            log.info("✓ Connected to eval service %s", self.address)
+            return True
+        except (PermissionError, ValueError) as e:
+            self._retry_at = time.time() + self.retry_interval
+            log.warning("⚠ Eval service authkey: %s", e, extra=rate_limited(30))
+            return False
+        except (OSError, EOFError, AuthenticationError) as e:
+            self._retry_at = time.time() + self.retry_interval
+            log.debug("Eval service unavailable: %s", e, extra=rate_limited(30))
+            return False
+    
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+        self._retry_at = time.time() + self.retry_interval
+    
+    def evaluate(self, board: List[List[str]], moves: List[Move],
+                 max_time: float = 3.0, deadline: Optional[float] = None,
+                 rollout_scale: float = 1.0, spawn_probabilities=None) -> Optional[List[MoveEvaluation]]:
+        """
+        Đánh giá board qua service
+        
+        Args:
+            board: Current board state
+            moves: Valid moves trên board (kết quả được gắn vào các Move này)
+            max_time: Maximum time in seconds
+            deadline: Thời điểm tuyệt đối (time.time()) phải có kết quả
+            rollout_scale: Hệ số nhân số rollout
+            spawn_probabilities: logic.spawn_source.probabilities() của bot (None = phân phối đều)
+                                 → service rollout cùng phân phối với fallback trong process
+        
+        Returns:
+            List of MoveEvaluation (sorted), hoặc None → fallback trong process
+        """
+        if not self._connect():
+            return None
+        
+        start_time = time.time()
+        deadline = deadline if deadline is not None else start_time + max_time
+        # Chừa thời gian để fallback vẫn kịp tính nếu service không trả lời
+        service_deadline = deadline - self.fallback_reserve
+        if service_deadline <= start_time:
+            return None
+        
+        request_id = next(self._ids)
+        try:
+            self._conn.send({
+                'id': request_id,
+                'board': encode_board(board),
+                'spawn': encode_spawn(spawn_probabilities),
+                'max_time': min(max_time, service_deadline - start_time),
+                'deadline': service_deadline,
+                'rollout_scale': rollout_scale,
+                'priority': self.priority
+            })
+            if not self._conn.poll(max(0.0, service_deadline - time.time())):
+                # Trả lời muộn sẽ lệch thứ tự → bỏ kết nối này
+                log.info("⚠ Eval service timeout - fallback", extra=rate_limited(10))
+                self._disconnect()
+                return None
+            response = self._conn.recv()
+        except (OSError, EOFError) as e:
+            log.warning("⚠ Eval service connection lost: %s", e, extra=rate_limited(10))
+            self._disconnect()
+            return None
+        
+        if response.get('id') != request_id or 'error' in response:
+            log.debug("Eval service: %s", response.get('error', 'unexpected response'))
+            return None
+        
+        # Gắn kết quả vào Move objects của process này
+        local_moves = {SpeculativeEvaluator.move_key(move): move for move in moves}
+        evaluations = []
+        for evaluation in response['evaluations']:
+            move = local_moves.get(SpeculativeEvaluator.move_key(evaluation.move))
+            if move is not None:
+                evaluations.append(replace(evaluation, move=move))
+        return evaluations
+    
+    def close(self):
+        """Đóng kết nối"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def main():
+    """Chạy eval service"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Match-3 evaluation service (dùng chung cho nhiều bot)")
+    parser.add_argument('--config', default='config.yaml', help='Config file path')
+    parser.add_argument('--address', help='Địa chỉ lắng nghe (pipe/socket)')
+    args = parser.parse_args()
+    
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    setup_logging(config)
+    
+    EvalService(config, address=args.address).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,132 @@ Move Evaluator Module
 Scores and ranks possible moves based on various criteria
 """
 
-from typing import List, Dict
+import math
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field, replace
+import numpy as np
 from logic import Move, Match, Position, MatchThreeLogic
+from cascade_estimator import FirstCascadeEstimator
+from feature_extractor import MoveFeatureExtractor, FEATURES, FEATURE_INDEX
+from value_model import ValueFeatures, ValueModel
+import kernels
+from rollout_executor import RolloutExecutor, RolloutJob
+from tracing import get_tracer
+from bot_logging import get_logger
+
+log = get_logger("evaluator")
+
+
+def move_key(move: Move) -> Tuple[int, int, int, int]:
+    """Key của move theo vị trí swap (dùng để khớp kết quả giữa các board/pha)"""
+    return (move.from_pos.row, move.from_pos.col, move.to_pos.row, move.to_pos.col)
+
+
+@lru_cache(maxsize=256)
+def t_quantile(p: float, df: int) -> float:
+    """
+    Phân vị p của phân phối Student-t với df bậc tự do
+    
+    df = 1, 2: công thức chính xác; df >= 3: khai triển Cornish-Fisher quanh phân vị chuẩn
+    (Abramowitz & Stegun 26.7.5, sai số < 0.5% với p <= 0.99)
+    
+    Args:
+        p: Xác suất (0 < p < 1)
+        df: Số bậc tự do (>= 1)
+    
+    Returns:
+        t sao cho P(T <= t) = p
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    
+    z = NormalDist().inv_cdf(p)
+    terms = ((z ** 3 + z) / 4,
+             (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96,
+             (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384,
+             (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160)
+    return z + sum(term / df ** (power + 1) for power, term in enumerate(terms))
+
+
+@dataclass
+class MoveEvaluation:
+    """
+    Kết quả đánh giá một move (immediate + phân phối điểm cascade từng rollout)
+    Dùng lại để in breakdown mà không cần mô phỏng lại
+    """
+    move: Move
+    score: int
+    immediate_score: int = 0
+    immediate_gems: int = 0
+    immediate_yellow: int = 0
+    phase: int = 0  # Pha cuối cùng đã đánh giá move này (1 = chỉ immediate)
+    cascade_scores: List[int] = field(default_factory=list)
+    cascade_depths: List[int] = field(default_factory=list)
+    cascade_matches: List[int] = field(default_factory=list)
+    cascade_gems: List[int] = field(default_factory=list)
+    cascade_yellow: List[int] = field(default_factory=list)
+    first_level: Optional[float] = None  # Kỳ vọng điểm cascade cấp 1 (FirstCascadeEstimator)
+    
+    @property
+    def rollouts(self) -> int:
+        """Số lần rollout cascade đã chạy"""
+        return len(self.cascade_scores)
+    
+    @property
+    def cascade_score(self) -> int:
+        """Điểm cascade trung bình (làm tròn xuống như _simulate_cascade_multiple_runs)"""
+        if not self.cascade_scores:
+            return 0
+        return sum(self.cascade_scores) // len(self.cascade_scores)
+    
+    def confidence_bounds(self, confidence: float, variance_floor: float = 0.0) -> Tuple[float, float]:
+        """
+        Khoảng tin cậy của điểm trung bình (immediate + cascade) theo các rollout
+        
+        Dùng phân vị Student-t (n - 1 bậc tự do) vì chỉ có vài rollout; phương sai mẫu
+        không nhỏ hơn variance_floor (vài rollout giống hệt nhau không có nghĩa là chắc chắn)
+        
+        Args:
+            confidence: Mức tin cậy (một phía) của mỗi cận
+            variance_floor: Phương sai tối thiểu của điểm một rollout
+        
+        Returns:
+            (lower, upper); chưa đủ 2 rollout → (-inf, inf)
+        """
+        n = len(self.cascade_scores)
+        if n < 2:
+            return (-math.inf, math.inf)
+        mean = sum(self.cascade_scores) / n
+        variance = max(sum((s - mean) ** 2 for s in self.cascade_scores) / (n - 1), variance_floor)
+        margin = t_quantile(confidence, n - 1) * math.sqrt(variance / n)
+        mean += self.immediate_score
+        return (mean - margin, mean + margin)
+    
+    def add_rollout(self, rollout: dict):
+        """Thêm kết quả của một lần rollout (từ MoveEvaluator._rollout_cascade)"""
+        self.cascade_scores.append(rollout['score'])
+        self.cascade_depths.append(rollout['depth'])
+        self.cascade_matches.append(rollout['matches'])
+        self.cascade_gems.append(rollout['gems'])
+        self.cascade_yellow.append(rollout['yellow'])
+    
+    def __repr__(self):
+        return f"MoveEvaluation({self.move}, score={self.score}, rollouts={self.rollouts})"
 
 
 class MoveEvaluator:
     """Evaluates and scores moves"""
     
-    def __init__(self, scoring_rules: Dict[str, int]):
+    def __init__(self, scoring_rules: Dict[str, int], analytic_cascade: bool = True,
+                 early_stop: bool = True, early_stop_confidence: float = 0.95,
+                 early_stop_min_samples: int = 3, early_stop_variance_floor: float = 100.0,
+                 executor: Optional[RolloutExecutor] = None,
+                 jit_kernels: bool = True, phase1_weights: Optional[Dict[str, float]] = None,
+                 value_model: Optional[ValueModel] = None):
         """
         Initialize move evaluator
         
@@ -23,9 +141,79 @@ class MoveEvaluator:
                 - match_4: bonus for 4-gem matches
                 - match_5: bonus for 5+ gem matches
                 - gem_priority: priority scores for each gem type
+            analytic_cascade: Tính chính xác kỳ vọng điểm cascade cấp 1 (chỉ random các cấp sâu hơn)
+            early_stop: Dừng rollout sớm khi move dẫn đầu đã chắc chắn tốt nhất
+            early_stop_confidence: Mức tin cậy (một phía) của khoảng tin cậy dùng để so sánh
+            early_stop_min_samples: Số rollout tối thiểu mỗi move trước khi được dừng sớm
+            early_stop_variance_floor: Phương sai tối thiểu (điểm cascade một rollout) khi tính khoảng tin cậy
+            executor: RolloutExecutor chạy rollout song song (None = tuần tự trên thread gọi)
+            jit_kernels: Chạy rollout bằng kernel numba (kernels.py) nếu có cài numba
+            phase1_weights: Trọng số các heuristic (tên trong feature_extractor.FEATURES) cộng vào
+                            điểm xếp hạng phase 1, None = chỉ dùng immediate + bonus gem vàng
+            value_model: ValueModel dự đoán điểm cascade → phase 1 xếp hạng theo immediate + dự đoán
+                         (thay cho bonus gem vàng và phase1_weights)
         """
         self.rules = scoring_rules
         self.gem_priority = scoring_rules.get('gem_priority', {})
+        self.first_cascade = FirstCascadeEstimator(self.get_gem_points) if analytic_cascade else None
+        
+        self.early_stop = early_stop
+        self.early_stop_min_samples = max(2, early_stop_min_samples)
+        self.early_stop_confidence = early_stop_confidence
+        self.early_stop_variance_floor = max(0.0, early_stop_variance_floor)
+        
+        self.executor = executor
+        self.kernel = kernels.CascadeKernel(self.get_gem_points) \
+            if jit_kernels and kernels.BACKEND == "numba" else None
+        
+        self.feature_extractor = None
+        if phase1_weights:
+            unknown = set(phase1_weights) - set(FEATURES)
+            if unknown:
+                raise ValueError(f"Feature phase 1 không hợp lệ: {sorted(unknown)} (chọn trong {FEATURES})")
+            self.feature_extractor = MoveFeatureExtractor(self.get_gem_points)
+            self.phase1_weights = np.zeros(len(FEATURES))
+            for name, weight in phase1_weights.items():
+                self.phase1_weights[FEATURE_INDEX[name]] = weight
+        
+        self.value_model = value_model
+        self.value_features = ValueFeatures(self.get_gem_points) if value_model is not None else None
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "MoveEvaluator":
+        """
+        Tạo evaluator từ config (mục scoring + calculation.analytic_cascade/early_stop/
+        jit_kernels/parallel_rollouts/phase1_features/value_model)
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            MoveEvaluator
+        """
+        calc_config = config.get('calculation', {})
+        stop_config = calc_config.get('early_stop', {})
+        phase1_config = calc_config.get('phase1_features', {})
+        evaluator = cls(scoring_rules=config['scoring'],
+                   analytic_cascade=calc_config.get('analytic_cascade', True),
+                   early_stop=stop_config.get('enabled', True),
+                   early_stop_confidence=stop_config.get('confidence', 0.95),
+                   early_stop_min_samples=stop_config.get('min_samples', 3),
+                   early_stop_variance_floor=stop_config.get('variance_floor', 100.0),
+                   executor=RolloutExecutor.from_config(config),
+                   jit_kernels=calc_config.get('jit_kernels', True),
+                   phase1_weights=phase1_config.get('weights') if phase1_config.get('enabled', False) else None,
+                   value_model=ValueModel.from_config(config))
+        if evaluator.value_model is not None and phase1_config.get('enabled', False):
+            log.info("ℹ️ phase1_features bị bỏ qua: phase 1 xếp hạng bằng value model")
+        if evaluator.kernel is not None:
+            kernels.warm_up()
+        return evaluator
+    
+    def close(self):
+        """Dừng pool rollout song song (nếu có)"""
+        if self.executor is not None:
+            self.executor.shutdown()
     
     def get_gem_points(self, gem_type: str) -> int:
         """
@@ -45,6 +233,101 @@ class MoveEvaluator:
         }
         return gem_points.get(gem_type, 10)  # Các gem khác: 10 điểm
     
+    def _rollout_cascade(self, move: Move, board: List[List[str]], 
+                         logic: MatchThreeLogic, max_depth: int = 15,
+                         first_level: Optional[float] = None) -> dict:
+        """
+        Chạy một lần rollout cascade với random spawn
+        
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            logic: MatchThreeLogic instance
+            max_depth: Số cấp cascade tối đa
+            first_level: Kỳ vọng điểm cascade cấp 1 đã tính giải tích (FirstCascadeEstimator),
+                         None = lấy điểm cấp 1 từ chính lần rollout này
+            
+        Returns:
+            Dictionary với thống kê của lần chạy (không tính chain đầu tiên):
+            - score: điểm cascade
+            - depth: số cấp cascade
+            - matches: số matches
+            - gems: số gems ăn được
+            - yellow: số gems vàng ăn được
+        """
+        if self.kernel is not None:
+            return self._rollout_cascade_kernel(move, board, logic, max_depth, first_level)
+        
+        board_copy = [row[:] for row in board]
+        logic.swap_gems(board_copy, move.from_pos, move.to_pos)
+        
+        # Mô phỏng cascade với random spawn
+        cascade_result = logic.simulate_cascade(
+            board_copy, 
+            move.matches, 
+            max_iterations=max_depth,
+            spawn_gems=True  # Bật random spawn
+        )
+        
+        # Tính điểm từ cascade (bỏ chain đầu tiên)
+        cascade_chains = cascade_result.get('cascade_chains', [])
+        rollout = {'score': 0, 'depth': max(0, len(cascade_chains) - 1),
+                   'matches': 0, 'gems': 0, 'yellow': 0}
+        
+        for chain_index in range(1, len(cascade_chains)):
+            matches_in_chain = cascade_chains[chain_index]
+            rollout['matches'] += len(matches_in_chain)
+            
+            chain_score = 0
+            for match in matches_in_chain:
+                gem_type = match.gem_type
+                gem_count = len(match.positions)
+                
+                # Tính điểm theo loại gem
+                chain_score += gem_count * self.get_gem_points(gem_type)
+                rollout['gems'] += gem_count
+                if gem_type == "YELLOW_STAR":
+                    rollout['yellow'] += gem_count
+            
+            # Cấp 1 đã có kỳ vọng chính xác → chỉ lấy điểm random của các cấp sâu hơn
+            if chain_index > 1 or first_level is None:
+                rollout['score'] += chain_score
+        
+        if first_level is not None:
+            rollout['score'] += int(round(first_level))
+        
+        return rollout
+    
+    def _rollout_cascade_kernel(self, move: Move, board: List[List[str]], logic: MatchThreeLogic,
+                                max_depth: int, first_level: Optional[float]) -> dict:
+        """_rollout_cascade qua kernel numba (cùng seed → cùng kết quả)"""
+        stats = self.kernel.rollout(move, board, logic, max_depth).tolist()
+        score = stats[kernels.STAT_DEEPER]
+        if first_level is None:
+            score += stats[kernels.STAT_LEVEL1]
+        else:
+            score += int(round(first_level))
+        return {'score': score, 'depth': stats[kernels.STAT_DEPTH],
+                'matches': stats[kernels.STAT_MATCHES], 'gems': stats[kernels.STAT_GEMS],
+                'yellow': stats[kernels.STAT_YELLOW]}
+    
+    def _first_cascade_level(self, move: Move, board: List[List[str]],
+                             logic: MatchThreeLogic) -> Optional[float]:
+        """
+        Kỳ vọng điểm cascade cấp 1 (None nếu tắt analytic_cascade)
+        
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            logic: MatchThreeLogic instance
+            
+        Returns:
+            Điểm kỳ vọng hoặc None
+        """
+        if self.first_cascade is None:
+            return None
+        return self.first_cascade.expected_move_score(move, board, logic)
+    
     def _simulate_cascade_multiple_runs(self, move: Move, board: List[List[str]], 
                                        logic: MatchThreeLogic, num_simulations: int = 5,
                                        max_depth: int = 15) -> int:
@@ -62,40 +345,40 @@ class MoveEvaluator:
             Điểm cascade trung bình từ tất cả các lần chạy
         """
         total_score = 0
+        first_level = self._first_cascade_level(move, board, logic)
         
         for sim_run in range(num_simulations):
-            # Tạo bản sao board cho mỗi lần chạy
-            board_copy = [row[:] for row in board]
-            logic.swap_gems(board_copy, move.from_pos, move.to_pos)
-            
-            # Mô phỏng cascade với random spawn
-            cascade_result = logic.simulate_cascade(
-                board_copy, 
-                move.matches, 
-                max_iterations=max_depth,
-                spawn_gems=True  # Bật random spawn
-            )
-            
-            # Tính điểm từ cascade (bỏ chain đầu tiên)
-            cascade_chains = cascade_result.get('cascade_chains', [])
-            run_score = 0
-            
-            for chain_index in range(1, len(cascade_chains)):
-                matches_in_chain = cascade_chains[chain_index]
-                
-                for match in matches_in_chain:
-                    gem_type = match.gem_type
-                    gem_count = len(match.positions)
-                    
-                    # Tính điểm theo loại gem
-                    gem_point = self.get_gem_points(gem_type)
-                    run_score += gem_count * gem_point
-            
-            total_score += run_score
+            total_score += self._rollout_cascade(move, board, logic, max_depth,
+                                                 first_level=first_level)['score']
         
         # Trả về điểm trung bình
         return total_score // num_simulations if num_simulations > 0 else 0
     
+    def _evaluate_immediate(self, move: Move, board: List[List[str]]) -> MoveEvaluation:
+        """
+        Tạo MoveEvaluation với điểm immediate (chưa có rollout cascade)
+        
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            
+        Returns:
+            MoveEvaluation với score = immediate score
+        """
+        evaluation = MoveEvaluation(move=move, score=0)
+        
+        for match in move.matches:
+            for pos in match.positions:
+                gem_type = board[pos.row][pos.col]
+                evaluation.immediate_score += self.get_gem_points(gem_type)
+                evaluation.immediate_gems += 1
+                
+                if gem_type == "YELLOW_STAR":
+                    evaluation.immediate_yellow += 1
+        
+        evaluation.score = evaluation.immediate_score
+        return evaluation
+    
     def score_move(self, move: Move, board: List[List[str]], 
                    logic: MatchThreeLogic, use_cascade_simulation: bool = True) -> int:
         """
@@ -417,7 +700,8 @@ class MoveEvaluator:
     
     def evaluate_moves(self, moves: List[Move], board: List[List[str]], 
                       logic: MatchThreeLogic, use_beam_search: bool = True,
-                      max_time: float = 3.0) -> List[tuple]:
+                      max_time: float = 3.0, deadline: Optional[float] = None,
+                      rollout_scale: float = 1.0) -> List[tuple]:
         """
         Evaluate và rank moves với multi-stage filtering (3 pha)
         Tối ưu cho độ chính xác cao với thời gian < 3s
@@ -428,137 +712,398 @@ class MoveEvaluator:
             logic: MatchThreeLogic instance
             use_beam_search: Use multi-stage filtering
             max_time: Maximum time in seconds (default 3.0s)
+            deadline: Thời điểm tuyệt đối (time.time()) phải dừng, None = chỉ dùng max_time
+            rollout_scale: Hệ số nhân số rollout mỗi pha (từ TimeBudgetManager)
             
         Returns:
             List of (move, score) tuples, sorted by score (descending)
         """
+        evaluations = self.evaluate_moves_detailed(moves, board, logic,
+                                                   use_beam_search=use_beam_search,
+                                                   max_time=max_time,
+                                                   deadline=deadline,
+                                                   rollout_scale=rollout_scale)
+        return [(evaluation.move, evaluation.score) for evaluation in evaluations]
+    
+    def evaluate_moves_detailed(self, moves: List[Move], board: List[List[str]], 
+                                logic: MatchThreeLogic, use_beam_search: bool = True,
+                                max_time: float = 3.0, deadline: Optional[float] = None,
+                                rollout_scale: float = 1.0,
+                                prior: Optional[Dict[tuple, MoveEvaluation]] = None) -> List[MoveEvaluation]:
+        """
+        Giống evaluate_moves nhưng trả về MoveEvaluation cho từng move
+        (giữ lại phân phối cascade để in breakdown mà không cần mô phỏng lại)
+        
+        Args:
+            moves: List of possible moves
+            board: Current board state
+            logic: MatchThreeLogic instance
+            use_beam_search: Use multi-stage filtering
+            max_time: Maximum time in seconds (default 3.0s)
+            deadline: Thời điểm tuyệt đối (time.time()) phải dừng, None = chỉ dùng max_time
+            rollout_scale: Hệ số nhân số rollout mỗi pha (từ TimeBudgetManager)
+            prior: Kết quả còn dùng được từ board trước, theo move_key (SpeculativeEvaluator):
+                   các rollout đã có được giữ lại, chỉ chạy thêm cho đủ số rollout của pha
+            
+        Returns:
+            List of MoveEvaluation, sorted by score (descending)
+        """
         import time as time_module
         start_time = time_module.time()
+        tracer = get_tracer()
         
         if not moves:
             return []
         
+        # Deadline tuyệt đối (từ timer của lượt) thu hẹp max_time
+        if deadline is not None:
+            max_time = min(max_time, max(0.0, deadline - start_time))
+        
+        # Số rollout mỗi pha theo budget (ít hơn khi gấp, nhiều hơn khi dư thời gian)
+        small_sims = self._scaled_rollouts(7, rollout_scale)
+        medium_sims = self._scaled_rollouts(3, rollout_scale)
+        deep_sims = self._scaled_rollouts(7, rollout_scale)
+        
         # Nếu số moves ít, đánh giá trực tiếp với cascade đầy đủ
         if len(moves) <= 15:
-            if self.rules.get('verbose', False):
-                print(f"📊 Ít moves ({len(moves)}), eval trực tiếp với cascade đầy đủ...")
-            
-            scored_moves = []
-            for move in moves:
-                if time_module.time() - start_time > max_time:
-                    break
-                # Cascade với 7 lần simulation (tối ưu tốc độ)
-                score = self._evaluate_move_with_accurate_cascade(move, board, logic, num_sims=7)
-                scored_moves.append((move, score))
-            
-            scored_moves.sort(key=lambda x: x[1], reverse=True)
+            log.debug("📊 Ít moves (%d), eval trực tiếp với cascade đầy đủ...", len(moves))
+            
+            with tracer.span("eval.direct", moves=len(moves), sims=small_sims) as span:
+                # Cascade với 7 lần simulation (tối ưu tốc độ), đánh giá sâu ngay (phase 3)
+                evaluations, stopped = self._evaluate_candidates(
+                    moves, board, logic, small_sims, phase=3,
+                    out_of_time=lambda: time_module.time() - start_time > max_time, prior=prior)
+                span.set(early_stop=stopped)
+            
+            evaluations.sort(key=lambda e: e.score, reverse=True)
             elapsed = time_module.time() - start_time
-            if self.rules.get('verbose', False):
-                print(f"✓ Hoàn thành trong {elapsed:.2f}s")
-            return scored_moves
+            log.debug("✓ Hoàn thành trong %.2fs%s", elapsed, " (dừng sớm)" if stopped else "")
+            return evaluations
         
         # ============================================================
         # MULTI-STAGE FILTERING cho nhiều moves
         # ============================================================
         
         # PHASE 1: Quick Filter - Loại bỏ moves rõ ràng tệ
-        # Chỉ tính immediate score + bonus gems vàng
+        # Chỉ tính immediate score + bonus gems vàng (hoặc + điểm cascade dự đoán bởi value model)
         # ============================================================
         phase1_start = time_module.time()
-        quick_scores = []
-        
-        for move in moves:
-            score = 0
-            yellow_count = 0
-            
-            # Tính điểm immediate
-            for match in move.matches:
-                for pos in match.positions:
-                    gem_type = board[pos.row][pos.col]
-                    score += self.get_gem_points(gem_type)
-                    
-                    if gem_type == "YELLOW_STAR":
-                        yellow_count += 1
+        with tracer.span("eval.phase1", moves=len(moves)):
+            quick_scores = []
             
-            # Bonus đặc biệt cho gems vàng (ưu tiên cao)
-            score += yellow_count * 20  # Thêm 20 điểm/gem vàng
+            # Value model: dự đoán điểm cascade của tất cả moves (vectorized) → xếp hạng trước khi rollout
+            # Không có model: heuristic (vectorized) → bonus xếp hạng
+            predicted = bonus = None
+            if self.value_model is not None:
+                predicted = self.value_model.predict(self.value_features.extract(moves, board, logic))
+            elif self.feature_extractor is not None:
+                bonus = self.feature_extractor.extract(moves, board, logic) @ self.phase1_weights
             
-            quick_scores.append((move, score))
+            # Move có kết quả từ board trước (prior) cũng xếp hạng theo điểm phase 1 như move mới
+            # (điểm đầy đủ immediate + cascade khác thang); rollout cũ chỉ được dùng lại khi vào phase 2
+            for index, move in enumerate(moves):
+                evaluation = self._evaluate_immediate(move, board)
+                evaluation.phase = 1
+                
+                if predicted is not None:
+                    # Cùng thang điểm với phase 2 (immediate + cascade trung bình)
+                    evaluation.score += int(round(predicted[index]))
+                else:
+                    # Bonus đặc biệt cho gems vàng (ưu tiên cao)
+                    evaluation.score += evaluation.immediate_yellow * 20  # Thêm 20 điểm/gem vàng
+                    if bonus is not None:
+                        evaluation.score += int(round(bonus[index]))
+                
+                quick_scores.append(evaluation)
         
-        quick_scores.sort(key=lambda x: x[1], reverse=True)
+        quick_scores.sort(key=lambda e: e.score, reverse=True)
         
         # Lấy top 50 moves (hoặc 50%)
         phase1_width = min(max(int(len(moves) * 0.5), 30), 50)
         phase1_candidates = quick_scores[:phase1_width]
         
         phase1_time = time_module.time() - phase1_start
-        if self.rules.get('verbose', False):
-            print(f"✓ Phase 1: {len(moves)} → {len(phase1_candidates)} moves ({phase1_time:.2f}s)")
+        log.debug("✓ Phase 1: %d → %d moves (%.2fs)", len(moves), len(phase1_candidates), phase1_time)
         
         # ============================================================
         # PHASE 2: Medium Eval - Cascade với 5 lần simulation
         # ============================================================
         phase2_start = time_module.time()
-        medium_scores = []
-        
-        for move, _ in phase1_candidates:
-            if time_module.time() - start_time > max_time * 0.7:  # 70% thời gian
-                break
-            
-            # Cascade với 3 lần simulation (tối ưu tốc độ)
-            score = self._evaluate_move_with_accurate_cascade(move, board, logic, num_sims=3)
-            medium_scores.append((move, score))
-        
-        medium_scores.sort(key=lambda x: x[1], reverse=True)
+        with tracer.span("eval.phase2", candidates=len(phase1_candidates), sims=medium_sims) as span:
+            # Cascade với 3 lần simulation (tối ưu tốc độ), dừng ở 70% thời gian
+            medium_scores, stopped = self._evaluate_candidates(
+                [candidate.move for candidate in phase1_candidates], board, logic, medium_sims, phase=2,
+                out_of_time=lambda: time_module.time() - start_time > max_time * 0.7, prior=prior)
+            if len(medium_scores) == len(phase1_candidates):
+                stopped = stopped or self._has_clear_winner(medium_scores)
+            span.set(evaluated=len(medium_scores), early_stop=stopped)
+        
+        medium_scores.sort(key=lambda e: e.score, reverse=True)
+        
+        # Move dẫn đầu đã chắc chắn tốt nhất → bỏ qua phase 3
+        if stopped:
+            log.debug("✓ Phase 2: dừng sớm, %s chắc chắn tốt nhất (%.3fs)",
+                      medium_scores[0].move, time_module.time() - start_time)
+            return self._with_remaining(medium_scores, quick_scores)
         
         # Lấy top 20 moves
         phase2_width = min(20, len(medium_scores))
         phase2_candidates = medium_scores[:phase2_width]
         
         phase2_time = time_module.time() - phase2_start
-        if self.rules.get('verbose', False):
-            print(f"✓ Phase 2: {len(phase1_candidates)} → {len(phase2_candidates)} moves ({phase2_time:.2f}s)")
+        log.debug("✓ Phase 2: %d → %d moves (%.2fs)", len(phase1_candidates), len(phase2_candidates), phase2_time)
         
         # ============================================================
         # PHASE 3: Deep Eval - Cascade với 10 lần simulation
         # ============================================================
         phase3_start = time_module.time()
-        deep_scores = []
-        
-        for move, _ in phase2_candidates:
-            if time_module.time() - start_time > max_time:
-                break
-            
+        with tracer.span("eval.phase3", candidates=len(phase2_candidates), sims=deep_sims) as span:
             # Cascade với 7 lần simulation (chính xác & nhanh)
-            score = self._evaluate_move_with_accurate_cascade(move, board, logic, num_sims=7)
-            deep_scores.append((move, score))
+            # Rollout của phase 2 được giữ lại, chỉ chạy thêm cho đủ deep_sims
+            deep_scores, stopped = self._evaluate_candidates(
+                [candidate.move for candidate in phase2_candidates], board, logic, deep_sims, phase=3,
+                out_of_time=lambda: time_module.time() - start_time > max_time,
+                prior={move_key(candidate.move): candidate for candidate in phase2_candidates})
+            span.set(evaluated=len(deep_scores), early_stop=stopped)
         
-        deep_scores.sort(key=lambda x: x[1], reverse=True)
+        deep_scores.sort(key=lambda e: e.score, reverse=True)
         
         phase3_time = time_module.time() - phase3_start
         total_time = time_module.time() - start_time
         
-        if self.rules.get('verbose', False):
-            print(f"✓ Phase 3: {len(phase2_candidates)} → {len(deep_scores)} moves ({phase3_time:.2f}s)")
-            print(f"🎯 TỔNG THỜI GIAN: {total_time:.2f}s")
+        log.debug("✓ Phase 3: %d → %d moves (%.2fs)%s", len(phase2_candidates), len(deep_scores), phase3_time,
+                  " (dừng sớm)" if stopped else "")
+        log.debug("🎯 TỔNG THỜI GIAN: %.2fs", total_time)
         
         # Thêm các moves còn lại với điểm từ phase 2 hoặc phase 1
-        # Dùng list comprehension thay vì set vì Move không hashable
-        deep_scored_moves = [m for m, _ in deep_scores]
+        return self._with_remaining(deep_scores, medium_scores + quick_scores)
+    
+    @staticmethod
+    def _with_remaining(evaluated: List[MoveEvaluation],
+                        earlier: List[MoveEvaluation]) -> List[MoveEvaluation]:
+        """
+        Nối các move chưa được đánh giá ở pha sau (giữ điểm của pha trước)
+        
+        Args:
+            evaluated: Kết quả pha cuối (đã sort)
+            earlier: Kết quả các pha trước, theo thứ tự ưu tiên
+        
+        Returns:
+            evaluated + các move còn lại
+        """
+        # Dùng id() vì Move không hashable
+        evaluated_ids = {id(e.move) for e in evaluated}
         remaining = []
+        for evaluation in earlier:
+            if id(evaluation.move) not in evaluated_ids:
+                remaining.append(evaluation)
+                evaluated_ids.add(id(evaluation.move))
+        return evaluated + remaining
+    
+    def _has_clear_winner(self, evaluations: List[MoveEvaluation]) -> bool:
+        """
+        Move dẫn đầu có chắc chắn tốt nhất không: cận dưới của nó > cận trên của mọi move khác
+        
+        Args:
+            evaluations: Các move đang so sánh
+        
+        Returns:
+            True nếu có thể dừng đánh giá
+        """
+        if not self.early_stop or not evaluations:
+            return False
+        if any(e.rollouts < self.early_stop_min_samples for e in evaluations):
+            return False
+        if len(evaluations) == 1:
+            return True
+        
+        bounds = [e.confidence_bounds(self.early_stop_confidence, self.early_stop_variance_floor)
+                  for e in evaluations]
+        leader = max(range(len(bounds)), key=lambda i: bounds[i][0] + bounds[i][1])  # Trung bình cao nhất
+        lower = bounds[leader][0]
+        
+        # A→B và B→A là cùng một swap (cùng phân phối điểm) → không cần phân biệt
+        swap = {evaluations[leader].move.from_pos, evaluations[leader].move.to_pos}
+        return all(lower > upper for i, (_, upper) in enumerate(bounds)
+                   if i != leader and {evaluations[i].move.from_pos, evaluations[i].move.to_pos} != swap)
+    
+    def _evaluate_candidates(self, moves: List[Move], board: List[List[str]], logic: MatchThreeLogic,
+                             num_sims: int, phase: int, out_of_time: Callable[[], bool],
+                             prior: Optional[Dict[tuple, MoveEvaluation]] = None) -> Tuple[List[MoveEvaluation], bool]:
+        """
+        Rollout các move theo vòng (mỗi vòng mỗi move thêm 1 rollout) để dừng sớm được
+        
+        - Vòng đầu: mỗi move early_stop_min_samples rollout (hết giờ → bỏ các move chưa tới lượt)
+        - Các vòng sau: sau mỗi vòng kiểm tra _has_clear_winner
+        - Tắt early_stop → giống cách cũ: từng move đủ num_sims rollout
+        - Có executor: nhiều move một lúc (_rollout_batch), kiểm tra hết giờ giữa các batch
+        
+        Args:
+            moves: Các move cần đánh giá (theo thứ tự ưu tiên)
+            board: Current board state
+            logic: MatchThreeLogic instance
+            num_sims: Số rollout tối đa mỗi move
+            phase: Pha đánh giá (ghi vào MoveEvaluation.phase)
+            out_of_time: Hàm kiểm tra hết thời gian của pha
+            prior: Kết quả đã có theo move_key (rollout được giữ lại và tính vào num_sims)
+        
+        Returns:
+            (evaluations, True nếu dừng sớm)
+        """
+        first_round = min(num_sims, self.early_stop_min_samples) if self.early_stop else num_sims
+        
+        evaluations = []
+        batch_size = self._batch_size(first_round)
+        for start in range(0, len(moves), batch_size):
+            if out_of_time():
+                return evaluations, False
+            batch = [self._resume_evaluation(move, board, logic, prior) for move in moves[start:start + batch_size]]
+            self._rollout_batch([(evaluation, first_round - evaluation.rollouts) for evaluation in batch],
+                                board, logic)
+            for evaluation in batch:
+                evaluation.phase = phase
+            evaluations.extend(batch)
+        
+        batch_size = self._batch_size(1)
+        for round_index in range(first_round, num_sims):
+            if self._has_clear_winner(evaluations):
+                return evaluations, True
+            pending = [evaluation for evaluation in evaluations if evaluation.rollouts <= round_index]
+            for start in range(0, len(pending), batch_size):
+                if out_of_time():
+                    return evaluations, False
+                self._rollout_batch([(evaluation, 1) for evaluation in pending[start:start + batch_size]],
+                                    board, logic)
+        
+        return evaluations, False
+    
+    def _batch_size(self, rollouts_per_move: int) -> int:
+        """
+        Số move mỗi batch rollout: 1 khi chạy tuần tự, ~executor.batch_rollouts rollout khi có executor
+        
+        Args:
+            rollouts_per_move: Số rollout mỗi move trong batch
+            
+        Returns:
+            Số move
+        """
+        if self.executor is None:
+            return 1
+        return max(1, self.executor.batch_rollouts // max(1, rollouts_per_move))
+    
+    def _rollout_batch(self, batch: List[Tuple[MoveEvaluation, int]], board: List[List[str]],
+                       logic: MatchThreeLogic):
+        """
+        Thêm rollout cho nhiều move (song song qua executor nếu có)
+        
+        Args:
+            batch: Danh sách (evaluation, số rollout thêm)
+            board: Current board state
+            logic: MatchThreeLogic instance
+        """
+        if self.executor is None:
+            for evaluation, num_sims in batch:
+                self._add_rollouts(evaluation, board, logic, num_sims)
+            return
+        
+        batch = [(evaluation, num_sims) for evaluation, num_sims in batch if num_sims > 0]
+        jobs = [RolloutJob(evaluation.move, evaluation.first_level, evaluation.rollouts, num_sims)
+                for evaluation, num_sims in batch]
+        for (evaluation, _), rollouts in zip(batch, self.executor.run(jobs, board, self.rules, logic)):
+            for rollout in rollouts:
+                evaluation.add_rollout(rollout)
+            evaluation.score = evaluation.immediate_score + evaluation.cascade_score
+    
+    def _scaled_rollouts(self, base_sims: int, rollout_scale: float) -> int:
+        """
+        Số rollout sau khi nhân hệ số budget (tối thiểu 1)
+        
+        Args:
+            base_sims: Số rollout mặc định của pha
+            rollout_scale: Hệ số từ TimeBudgetManager
+            
+        Returns:
+            Số rollout
+        """
+        return max(1, int(round(base_sims * rollout_scale)))
+    
+    def _evaluate_move_detailed(self, move: Move, board: List[List[str]], 
+                                logic: MatchThreeLogic, num_sims: int = 5) -> MoveEvaluation:
+        """
+        Đánh giá move với cascade simulation, giữ lại kết quả từng rollout
+        
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            logic: MatchThreeLogic instance
+            num_sims: Số lần simulation
+            
+        Returns:
+            MoveEvaluation (score = immediate + cascade trung bình)
+        """
+        evaluation = self._start_evaluation(move, board, logic)
+        self._add_rollouts(evaluation, board, logic, num_sims)
+        return evaluation
+    
+    def _start_evaluation(self, move: Move, board: List[List[str]],
+                          logic: MatchThreeLogic) -> MoveEvaluation:
+        """
+        MoveEvaluation với điểm immediate và kỳ vọng cascade cấp 1 (chưa có rollout)
+        
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            logic: MatchThreeLogic instance
+            
+        Returns:
+            MoveEvaluation
+        """
+        evaluation = self._evaluate_immediate(move, board)
+        evaluation.first_level = self._first_cascade_level(move, board, logic)
+        return evaluation
+    
+    def _resume_evaluation(self, move: Move, board: List[List[str]], logic: MatchThreeLogic,
+                           prior: Optional[Dict[tuple, MoveEvaluation]]) -> MoveEvaluation:
+        """
+        Tiếp tục từ kết quả đã có của move (bản sao, giữ các rollout), hoặc bắt đầu mới
         
-        # Thêm từ phase 2
-        for m, s in medium_scores:
-            if m not in deep_scored_moves:
-                remaining.append((m, s))
+        Args:
+            move: Move to evaluate
+            board: Current board state
+            logic: MatchThreeLogic instance
+            prior: Kết quả đã có theo move_key (có thể None)
+            
+        Returns:
+            MoveEvaluation
+        """
+        previous = prior.get(move_key(move)) if prior else None
+        if previous is None or previous.rollouts == 0:
+            return self._start_evaluation(move, board, logic)
+        
+        return replace(previous, move=move,
+                       cascade_scores=list(previous.cascade_scores),
+                       cascade_depths=list(previous.cascade_depths),
+                       cascade_matches=list(previous.cascade_matches),
+                       cascade_gems=list(previous.cascade_gems),
+                       cascade_yellow=list(previous.cascade_yellow))
+    
+    def _add_rollouts(self, evaluation: MoveEvaluation, board: List[List[str]],
+                      logic: MatchThreeLogic, num_sims: int):
+        """
+        Thêm rollout cascade cho một move và cập nhật điểm
         
-        # Thêm từ phase 1 (loại bỏ những moves đã có trong deep_scores và medium_scores)
-        all_evaluated_moves = deep_scored_moves + [m for m, _ in remaining]
-        for m, s in quick_scores:
-            if m not in all_evaluated_moves:
-                remaining.append((m, s))
+        Args:
+            evaluation: MoveEvaluation (từ _start_evaluation)
+            board: Current board state
+            logic: MatchThreeLogic instance
+            num_sims: Số rollout thêm
+        """
+        # Điểm cascade: cấp 1 tính giải tích, các cấp sâu hơn random spawn
+        for sim_run in range(num_sims):
+            evaluation.add_rollout(self._rollout_cascade(evaluation.move, board, logic, max_depth=15,
+                                                         first_level=evaluation.first_level))
         
-        return deep_scores + remaining
+        evaluation.score = evaluation.immediate_score + evaluation.cascade_score
     
     def _evaluate_move_with_accurate_cascade(self, move: Move, board: List[List[str]], 
                                             logic: MatchThreeLogic, num_sims: int = 5) -> int:
@@ -574,19 +1119,7 @@ class MoveEvaluator:
         Returns:
             Total score
         """
-        score = 0
-        
-        # Điểm immediate
-        for match in move.matches:
-            for pos in match.positions:
-                gem_type = board[pos.row][pos.col]
-                score += self.get_gem_points(gem_type)
-        
-        # Điểm cascade (với random spawn)
-        cascade_score = self._simulate_cascade_multiple_runs(move, board, logic, num_sims, max_depth=15)
-        score += cascade_score
-        
-        return score
+        return self._evaluate_move_detailed(move, board, logic, num_sims).score
     
     def get_best_move(self, moves: List[Move], board: List[List[str]], 
                      logic: MatchThreeLogic, max_time: float = 3.0) -> tuple:
@@ -602,13 +1135,36 @@ class MoveEvaluator:
         Returns:
             Tuple of (best_move, score) or (None, 0) if no moves
         """
-        if not moves:
-            return (None, 0)
+        best = self.get_best_evaluation(moves, board, logic, max_time=max_time)
+        return (best.move, best.score) if best else (None, 0)
+    
+    def get_best_evaluation(self, moves: List[Move], board: List[List[str]], 
+                            logic: MatchThreeLogic, max_time: float = 3.0,
+                            deadline: Optional[float] = None,
+                            rollout_scale: float = 1.0) -> Optional[MoveEvaluation]:
+        """
+        Get the best move as a MoveEvaluation (dùng cho explain_score sau khi đã đi)
         
-        scored_moves = self.evaluate_moves(moves, board, logic, 
-                                          use_beam_search=True, 
-                                          max_time=max_time)
-        return scored_moves[0] if scored_moves else (None, 0)
+        Args:
+            moves: List of possible moves
+            board: Current board state
+            logic: MatchThreeLogic instance
+            max_time: Maximum time in seconds (default 3.0s)
+            deadline: Thời điểm tuyệt đối phải dừng (xem evaluate_moves)
+            rollout_scale: Hệ số nhân số rollout (xem evaluate_moves)
+            
+        Returns:
+            Best MoveEvaluation or None if no moves
+        """
+        if not moves:
+            return None
+        
+        evaluations = self.evaluate_moves_detailed(moves, board, logic, 
+                                                   use_beam_search=True, 
+                                                   max_time=max_time,
+                                                   deadline=deadline,
+                                                   rollout_scale=rollout_scale)
+        return evaluations[0] if evaluations else None
     
     def get_top_n_moves(self, moves: List[Move], board: List[List[str]], 
                        logic: MatchThreeLogic, n: int = 5) -> List[tuple]:
@@ -628,7 +1184,8 @@ class MoveEvaluator:
         return scored_moves[:n]
     
     def explain_score(self, move: Move, board: List[List[str]], 
-                     logic: MatchThreeLogic, show_cascade: bool = True) -> Dict[str, int]:
+                     logic: MatchThreeLogic, show_cascade: bool = True,
+                     evaluation: Optional[MoveEvaluation] = None) -> Dict[str, int]:
         """
         Get detailed score breakdown for a move
         Simplified version: counts gems collected with cascade simulation
@@ -638,10 +1195,15 @@ class MoveEvaluator:
             board: Current board state
             logic: MatchThreeLogic instance
             show_cascade: Include cascade simulation details
+            evaluation: Kết quả từ evaluate_moves_detailed - nếu có thì render
+                        trực tiếp, không mô phỏng lại
             
         Returns:
             Dictionary with score breakdown
         """
+        if evaluation is not None:
+            return self.breakdown_from_evaluation(evaluation, show_cascade=show_cascade)
+        
         breakdown = {}
         
         # ================================================================
@@ -748,6 +1310,52 @@ class MoveEvaluator:
         ])
         
         return breakdown
+    
+    def breakdown_from_evaluation(self, evaluation: MoveEvaluation, 
+                                  show_cascade: bool = True) -> Dict[str, int]:
+        """
+        Render score breakdown từ MoveEvaluation (không mô phỏng lại)
+        Các giá trị cascade là trung bình trên các rollout đã chạy
+        
+        Args:
+            evaluation: Kết quả đánh giá của move
+            show_cascade: Include cascade simulation details
+            
+        Returns:
+            Dictionary with score breakdown (cùng keys với explain_score)
+        """
+        breakdown = {}
+        
+        breakdown["immediate_gems"] = evaluation.immediate_gems
+        breakdown["immediate_yellow"] = evaluation.immediate_yellow
+        breakdown["immediate_other"] = evaluation.immediate_gems - evaluation.immediate_yellow
+        breakdown["immediate_score"] = evaluation.immediate_score
+        
+        rollouts = evaluation.rollouts
+        if show_cascade and rollouts:
+            cascade_gems = sum(evaluation.cascade_gems) // rollouts
+            cascade_yellow = sum(evaluation.cascade_yellow) // rollouts
+            
+            breakdown["cascade_rollouts"] = rollouts
+            breakdown["cascade_depth"] = round(sum(evaluation.cascade_depths) / rollouts)
+            breakdown["cascade_matches"] = round(sum(evaluation.cascade_matches) / rollouts)
+            breakdown["cascade_gems"] = cascade_gems
+            breakdown["cascade_yellow"] = cascade_yellow
+            breakdown["cascade_other"] = cascade_gems - cascade_yellow
+            breakdown["cascade_score"] = evaluation.cascade_score
+            breakdown["cascade_score_min"] = min(evaluation.cascade_scores)
+            breakdown["cascade_score_max"] = max(evaluation.cascade_scores)
+        else:
+            breakdown["cascade_depth"] = 0
+            breakdown["cascade_gems"] = 0
+            breakdown["cascade_score"] = 0
+        
+        breakdown["total_gems"] = evaluation.immediate_gems + breakdown.get("cascade_gems", 0)
+        breakdown["total_yellow"] = evaluation.immediate_yellow + breakdown.get("cascade_yellow", 0)
+        breakdown["total_other"] = breakdown["immediate_other"] + breakdown.get("cascade_other", 0)
+        breakdown["total_score"] = evaluation.immediate_score + breakdown.get("cascade_score", 0)
+        
+        return breakdown
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+"""
+Feature Extractor Module
+Tính các heuristic của MoveEvaluator (_calculate_chain_potential, _calculate_setup_bonus,
+_calculate_position_bonus, _calculate_cascade_bonus_simple) cho tất cả moves cùng lúc bằng mảng numpy:
+- Board → one-hot planes (gems, rows, cols), đếm gem lân cận bằng tích chập box 5x5
+- Vị trí match của mọi move được trải phẳng thành mảng, gộp theo move bằng bincount
+Kết quả giống hệt các hàm scalar, dùng để xếp hạng moves ở phase 1
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from logic import Move, MatchThreeLogic, EMPTY_CODE, LOCKED_CODE, SPECIAL_CODES
+
+# Cột của ma trận feature (thứ tự cố định, value model dùng lại)
+FEATURES = (
+    "immediate_score",    # Σ điểm gem ở các ô match (board trước swap, như _evaluate_immediate)
+    "immediate_gems",     # Số ô match (tính trùng nếu hai match chung ô)
+    "immediate_yellow",   # Số ô YELLOW_STAR trong các ô match
+    "chain_potential",    # _calculate_chain_potential
+    "setup_bonus",        # _calculate_setup_bonus
+    "position_bonus",     # _calculate_position_bonus
+    "cascade_bonus",      # _calculate_cascade_bonus_simple (match càng thấp càng cao)
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+CHAIN_RADIUS = 2          # Vùng 5x5 quanh mỗi ô match
+CHAIN_CAP = 20
+SETUP_REACH = 3           # Số ô xét theo mỗi hướng (phải, xuống)
+SETUP_CAP = 60
+
+
+class MoveFeatureExtractor:
+    """Ma trận feature (moves x FEATURES) cho một board"""
+    
+    def __init__(self, gem_points):
+        """
+        Initialize feature extractor
+        
+        Args:
+            gem_points: Điểm mỗi gem (MoveEvaluator.get_gem_points)
+        """
+        self.gem_points = gem_points
+        self._points: Dict[tuple, np.ndarray] = {}
+    
+    def _points_for(self, logic: MatchThreeLogic) -> np.ndarray:
+        """Điểm theo mã gem, lệch len(SPECIAL_CODES) để ô đặc biệt (mã âm) cũng tra được"""
+        names = tuple(logic.gem_codes)
+        points = self._points.get(names)
+        if points is None:
+            offset = len(SPECIAL_CODES)
+            points = np.zeros(offset + len(names), dtype=np.float64)
+            for gem, code in SPECIAL_CODES.items():
+                points[code + offset] = self.gem_points(gem)
+            for gem, code in logic.gem_codes.items():
+                points[code + offset] = self.gem_points(gem)
+            self._points[names] = points
+        return points
+    
+    @staticmethod
+    def _flatten(moves: List[Move], gem_codes: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Trải phẳng vị trí match của mọi move
+        
+        Returns:
+            (entries, uniques):
+            - entries (E, 5): move, chỉ số match, row, col, mã gem của match - mọi ô của mọi match
+            - uniques (U, 4): move, chỉ số match đầu tiên chứa ô, row, col - mỗi ô một lần
+        """
+        entries = []
+        uniques = []
+        for m, move in enumerate(moves):
+            seen = set()
+            for j, match in enumerate(move.matches):
+                code = gem_codes.get(match.gem_type, -1)
+                for pos in match.positions:
+                    entries.append((m, j, pos.row, pos.col, code))
+                    if (pos.row, pos.col) not in seen:
+                        seen.add((pos.row, pos.col))
+                        uniques.append((m, j, pos.row, pos.col))
+        return (np.array(entries, dtype=np.intp).reshape(-1, 5),
+                np.array(uniques, dtype=np.intp).reshape(-1, 4))
+    
+    @staticmethod
+    def _padded(values: np.ndarray, groups: np.ndarray, n_groups: int, fill: int) -> np.ndarray:
+        """
+        Xếp các hàng của values theo nhóm (move) thành mảng (n_groups, max_per_group, ...)
+        
+        Args:
+            values: Mảng (N, ...) đã sort theo groups
+            groups: Nhóm của từng hàng
+            n_groups: Số nhóm
+            fill: Giá trị cho ô padding
+        """
+        counts = np.bincount(groups, minlength=n_groups)
+        width = int(counts.max()) if len(counts) else 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        slots = np.arange(len(groups)) - starts[groups]
+        padded = np.full((n_groups, width) + values.shape[1:], fill, dtype=values.dtype)
+        padded[groups, slots] = values
+        return padded
+    
+    def extract(self, moves: List[Move], board: List[List[str]], logic: MatchThreeLogic) -> np.ndarray:
+        """
+        Feature của tất cả moves
+        
+        Args:
+            moves: Danh sách moves (từ find_valid_moves)
+            board: Current board state
+            logic: MatchThreeLogic instance
+        
+        Returns:
+            Mảng (len(moves), len(FEATURES)) float64
+        """
+        features = np.zeros((len(moves), len(FEATURES)), dtype=np.float64)
+        if not moves:
+            return features
+        
+        codes = logic.encode_board(board).astype(np.intp)
+        rows, cols = codes.shape
+        entries, uniques = self._flatten(moves, logic.gem_codes)
+        if not len(entries):
+            return features
+        n = len(moves)
+        e_move, e_match, e_row, e_col, e_gem = entries.T
+        u_move, u_first, u_row, u_col = uniques.T
+        
+        # Immediate: điểm gem ở ô match trên board trước swap
+        cell_codes = codes[e_row, e_col]
+        points = self._points_for(logic)[cell_codes + len(SPECIAL_CODES)]
+        features[:, FEATURE_INDEX["immediate_score"]] = np.bincount(e_move, points, minlength=n)
+        features[:, FEATURE_INDEX["immediate_gems"]] = np.bincount(e_move, minlength=n)
+        yellow = logic.gem_codes.get("YELLOW_STAR", -1)
+        features[:, FEATURE_INDEX["immediate_yellow"]] = np.bincount(e_move, cell_codes == yellow, minlength=n)
+        
+        features[:, FEATURE_INDEX["chain_potential"]] = self._chain_potential(codes, entries, uniques, n)
+        features[:, FEATURE_INDEX["setup_bonus"]] = self._setup_bonus(codes, uniques, n)
+        
+        # Khoảng cách Manhattan trung bình tới tâm board → 0..10
+        distance = np.abs(e_row - rows / 2) + np.abs(e_col - cols / 2)
+        counts = np.bincount(e_move, minlength=n)
+        average = np.bincount(e_move, distance, minlength=n) / np.maximum(counts, 1)
+        position = np.maximum(0, ((1 - average / (rows + cols)) * 10).astype(np.int64))
+        features[:, FEATURE_INDEX["position_bonus"]] = np.where(counts > 0, position, 0)
+        
+        # Hàng trung bình của ô match → 0..50
+        average_row = np.bincount(e_move, e_row, minlength=n) / np.maximum(counts, 1)
+        features[:, FEATURE_INDEX["cascade_bonus"]] = (average_row / rows * 50).astype(np.int64)
+        
+        return features
+    
+    def _chain_potential(self, codes: np.ndarray, entries: np.ndarray, uniques: np.ndarray,
+                         n: int) -> np.ndarray:
+        """
+        _calculate_chain_potential: gem cùng màu trong vùng 5x5 quanh mỗi ô match,
+        không tính ô đã thuộc match (của match hiện tại hoặc các match trước nó)
+        """
+        rows, cols = codes.shape
+        e_move, e_match, e_row, e_col, e_gem = entries.T
+        
+        # Số gem từng màu trong 5x5 quanh mỗi ô (không tính chính ô đó)
+        gems = max(int(codes.max()) + 1, int(e_gem.max()) + 1, 1)
+        planes = (codes[np.newaxis] == np.arange(gems)[:, np.newaxis, np.newaxis]).astype(np.int64)
+        padded = np.pad(planes, ((0, 0), (CHAIN_RADIUS, CHAIN_RADIUS), (CHAIN_RADIUS, CHAIN_RADIUS)))
+        size = 2 * CHAIN_RADIUS + 1
+        neighbours = sliding_window_view(padded, (size, size), axis=(1, 2)).sum(axis=(-1, -2)) - planes
+        
+        valid_gem = e_gem >= 0
+        counted = np.where(valid_gem, neighbours[np.maximum(e_gem, 0), e_row, e_col], 0)
+        
+        # Trừ các ô match đã được thêm vào affected (match đầu tiên chứa ô <= match hiện tại)
+        # entries/uniques đã theo thứ tự move (_flatten)
+        e_padded = self._padded(entries, e_move, n, fill=-1)              # (n, K, 5)
+        u_padded = self._padded(uniques, uniques[:, 0], n, fill=-1)       # (n, U, 4)
+        
+        u_valid = u_padded[:, np.newaxis, :, 0] >= 0
+        u_row = u_padded[:, np.newaxis, :, 2]
+        u_col = u_padded[:, np.newaxis, :, 3]
+        u_code = codes[np.maximum(u_row, 0), np.maximum(u_col, 0)]
+        p_match = e_padded[:, :, np.newaxis, 1]
+        p_row = e_padded[:, :, np.newaxis, 2]
+        p_col = e_padded[:, :, np.newaxis, 3]
+        p_gem = e_padded[:, :, np.newaxis, 4]
+        
+        d_row = np.abs(u_row - p_row)
+        d_col = np.abs(u_col - p_col)
+        excluded = (u_valid & (e_padded[:, :, np.newaxis, 0] >= 0)
+                    & (u_padded[:, np.newaxis, :, 1] <= p_match)
+                    & (d_row <= CHAIN_RADIUS) & (d_col <= CHAIN_RADIUS) & ((d_row + d_col) > 0)
+                    & (u_code == p_gem) & (p_gem >= 0))
+        
+        total = np.bincount(e_move, counted, minlength=n) - excluded.sum(axis=(1, 2))
+        return np.minimum(total, CHAIN_CAP)
+    
+    def _setup_bonus(self, codes: np.ndarray, uniques: np.ndarray, n: int) -> np.ndarray:
+        """
+        _calculate_setup_bonus: từ mỗi ô match đi sang phải / xuống tối đa 3 ô,
+        đếm ô liên tiếp là ô match hoặc không phải LOCKED/EMPTY
+        """
+        rows, cols = codes.shape
+        u_move, _, u_row, u_col = uniques.T
+        
+        # good[m, r, c]: ô (r, c) nằm trong match của move m hoặc không phải LOCKED/EMPTY
+        affected = np.zeros((n, rows, cols), dtype=bool)
+        affected[u_move, u_row, u_col] = True
+        good = affected | ((codes != LOCKED_CODE) & (codes != EMPTY_CODE))[np.newaxis]
+        good = np.pad(good, ((0, 0), (0, SETUP_REACH), (0, SETUP_REACH)))    # Ngoài board = dừng
+        
+        bonus = np.zeros(len(uniques), dtype=np.int64)
+        for d_row, d_col in ((0, 1), (1, 0)):
+            consecutive = np.zeros(len(uniques), dtype=np.int64)
+            run = np.ones(len(uniques), dtype=bool)
+            for step in range(1, SETUP_REACH + 1):
+                run &= good[u_move, u_row + d_row * step, u_col + d_col * step]
+                consecutive += run
+            bonus += 15 * (consecutive >= 2) + 30 * (consecutive >= 3)
+        
+        return np.minimum(np.bincount(u_move, bonus, minlength=n), SETUP_CAP)
@@ -4,13 +4,17 @@ Manages game flow automation (Reward → Map → Ready → Playing)
 """
 
 import time
-import pyautogui
 import mss
+from contextlib import nullcontext
 import numpy as np
 import cv2
 from enum import Enum
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple, Union
 from ui_detector import UIDetector
+from screen_classifier import ScreenStateClassifier
+from bot_logging import get_logger, rate_limited
+
+log = get_logger("game_state")
 
 
 class GameState(Enum):
@@ -25,7 +29,8 @@ class GameState(Enum):
 class GameStateManager:
     """Manages game state detection and automation"""
     
-    def __init__(self, config: dict, game_window_region: dict, board_region: dict):
+    def __init__(self, config: dict, game_window_region: dict, board_region: dict,
+                 ui_detector: Optional[UIDetector] = None, capture=None, input_lock=None):
         """
         Initialize game state manager
         
@@ -33,19 +38,38 @@ class GameStateManager:
             config: Configuration dictionary
             game_window_region: Game window coordinates
             board_region: Board region coordinates
+            ui_detector: UIDetector dùng chung (supervisor), None = tạo mới
+            capture: Capture của game window (supervisor), None = dùng mss trực tiếp
+            input_lock: Lock chuột dùng chung (supervisor)
         """
         self.config = config
         self.game_window = game_window_region
         self.board_region = board_region
+        self.capture = capture
+        self.input_lock = input_lock if input_lock is not None else nullcontext()
         
         # Initialize UI detector
-        self.ui_detector = UIDetector(config)
+        self.ui_detector = ui_detector if ui_detector is not None else UIDetector(config)
+        
+        # Screen classifier (so khớp ảnh mẫu, nhanh hơn dò nút bằng màu/OCR)
+        classifier_config = config.get('game_automation', {}).get('screen_classifier', {})
+        if classifier_config.get('enabled', True):
+            self.screen_classifier = ScreenStateClassifier.from_config(config)
+            if self.screen_classifier.has_references:
+                log.info("✓ Screen classifier: %d mẫu", len(self.screen_classifier.labels))
+        else:
+            self.screen_classifier = None
         
         # Automation settings
         self.automation_config = config.get('game_automation', {})
         self.enabled = self.automation_config.get('enabled', True)
         self.after_click_delay = self.automation_config.get('after_click_delay', 1.5)
         
+        # Chờ chuyển màn hình (thay cho sleep cố định sau mỗi click)
+        self.transition_timeout = self.automation_config.get('transition_timeout', 5.0)
+        self.transition_poll_interval = self.automation_config.get('transition_poll_interval', 0.1)
+        self.transition_confirm_frames = self.automation_config.get('transition_confirm_frames', 2)
+        
         # State tracking
         self.current_state = GameState.UNKNOWN
         self.last_state_change = time.time()
@@ -57,6 +81,9 @@ class GameStateManager:
         Returns:
             Screenshot as numpy array (BGR)
         """
+        if self.capture is not None:
+            return self.capture.capture_board()
+        
         with mss.mss() as sct:
             monitor = {
                 'top': self.game_window['top'],
@@ -83,28 +110,38 @@ class GameStateManager:
         """
         screenshot = self.capture_game_window()
         
-        # Phương pháp 1: Thử detect tất cả buttons với OCR
+        # Phương pháp 0: So khớp ảnh mẫu màn hình (vài ms)
+        if self.screen_classifier and self.screen_classifier.has_references:
+            result = self.screen_classifier.classify(screenshot)
+            if result.confident:
+                if not silent:
+                    log.debug("🔍 Screen: %s (conf %.2f, margin %.2f)", result.state, result.confidence, result.margin)
+                return GameState(result.state)
+            
+            if not silent:
+                log.info("  🔍 Screen classifier chưa chắc chắn (%s, conf %.2f, margin %.2f) → dò nút...",
+                         result.state, result.confidence, result.margin, extra=rate_limited(5))
+        
+        # Phương pháp 1: Quét màu một lần cho tất cả buttons trong vùng ưu tiên
         buttons = self.ui_detector.detect_all_buttons(screenshot, use_fallback=False)
         
-        # Nếu không có button nào, thử fallback color detection cho từng button
+        # Nếu không có button nào, quét lại toàn màn hình (vẫn một lần cho mọi button)
         if not buttons:
             if not silent:
-                print("  🔍 OCR không tìm thấy button, thử color detection...")
+                log.info("  🔍 Không thấy button trong vùng ưu tiên, quét toàn màn hình...", extra=rate_limited(5))
             
-            # Thử detect từng button riêng biệt
-            for btn_type in ['nhan', 'chien', 'batdau']:
-                pos = self.ui_detector.detect_button_by_color_position(screenshot, btn_type)
-                if pos:
-                    buttons[btn_type] = pos
-                    if not silent:
-                        print(f"    ✓ Tìm thấy nút '{btn_type}' bằng color detection")
-        
-        # DEBUG: Log detected buttons (only if not silent and verbose enabled)
-        if not silent and self.config.get('debug', {}).get('verbose', False):
+            buttons = self.ui_detector.detect_all_buttons(screenshot, use_fallback=False,
+                                                          use_region_hints=False)
+            if not silent:
+                for btn_type in buttons:
+                    log.info("    ✓ Tìm thấy nút '%s' bằng color detection", btn_type)
+        
+        # DEBUG: Log detected buttons (only if not silent, ở mức DEBUG)
+        if not silent:
             if buttons:
-                print(f"🔍 Detected buttons: {list(buttons.keys())}")
+                log.debug("🔍 Detected buttons: %s", list(buttons.keys()))
             else:
-                print(f"🔍 No buttons detected")
+                log.debug("🔍 No buttons detected")
         
         # Determine state based on which buttons are present
         if 'nhan' in buttons:
@@ -134,12 +171,54 @@ class GameStateManager:
             abs_x = x
             abs_y = y
         
-        # Move and click
-        pyautogui.moveTo(abs_x, abs_y, duration=0.2)
-        time.sleep(0.1)
-        pyautogui.click()
+        # Move and click (pyautogui import khi click lần đầu - khởi động nhanh hơn)
+        import pyautogui
+        with self.input_lock:
+            pyautogui.moveTo(abs_x, abs_y, duration=0.2)
+            time.sleep(0.1)
+            pyautogui.click()
+        
+        log.info("   🖱️  Clicked at (%d, %d)", abs_x, abs_y)
+    
+    def wait_for_state(self, targets: Union[GameState, Iterable[GameState]],
+                       timeout: Optional[float] = None,
+                       poll_interval: Optional[float] = None) -> Optional[GameState]:
+        """
+        Chờ đến khi màn hình chuyển sang một trong các state mong đợi
+        Trả về ngay khi state xuất hiện (thay cho time.sleep cố định sau click)
+        
+        Args:
+            targets: State (hoặc list state) cần chờ
+            timeout: Thời gian chờ tối đa (mặc định: game_automation.transition_timeout)
+            poll_interval: Khoảng cách giữa 2 lần kiểm tra (mặc định: transition_poll_interval)
+        
+        Returns:
+            State đã xuất hiện, hoặc None nếu hết thời gian
+        """
+        targets = {targets} if isinstance(targets, GameState) else set(targets)
+        timeout = self.transition_timeout if timeout is None else timeout
+        poll_interval = self.transition_poll_interval if poll_interval is None else poll_interval
+        
+        # PLAYING = "không thấy nút nào" → cũng đúng trong lúc chuyển cảnh,
+        # nên cần thấy state liên tiếp vài frame mới tin
+        confirm_frames = max(1, self.transition_confirm_frames)
         
-        print(f"   🖱️  Clicked at ({abs_x}, {abs_y})")
+        start_time = time.time()
+        last_state = None
+        streak = 0
+        
+        while True:
+            state = self.detect_current_state(silent=True)
+            streak = streak + 1 if state == last_state else 1
+            last_state = state
+            
+            if state in targets and streak >= confirm_frames:
+                return state
+            
+            if time.time() - start_time >= timeout:
+                return None
+            
+            time.sleep(poll_interval)
     
     def handle_reward_screen(self) -> bool:
         """
@@ -148,7 +227,7 @@ class GameStateManager:
         Returns:
             True if handled successfully
         """
-        print("\n🎁 Phát hiện màn REWARD - Đang tìm nút 'Nhận'...")
+        log.info("\n🎁 Phát hiện màn REWARD - Đang tìm nút 'Nhận'...")
         
         start_time = time.time()
         screenshot = self.capture_game_window()
@@ -156,18 +235,22 @@ class GameStateManager:
         elapsed = time.time() - start_time
         
         if button_pos:
-            print(f"   ✓ Tìm thấy nút 'Nhận' tại ({button_pos[0]}, {button_pos[1]}) trong {elapsed:.2f}s")
+            log.info("   ✓ Tìm thấy nút 'Nhận' tại (%d, %d) trong %.2fs", button_pos[0], button_pos[1], elapsed)
             self.click_at_position(button_pos[0], button_pos[1])
-            print("✅ Đã nhấn 'Nhận'!")
+            log.info("✅ Đã nhấn 'Nhận'!")
             
-            # Wait 2 seconds then look for "Chiến"
-            print("⏳ Đợi 2 giây...")
-            time.sleep(2.0)
+            # Chờ màn MAP rồi nhấn "Chiến" ngay
+            log.info("⏳ Chờ màn MAP...")
+            state = self.wait_for_state([GameState.MAP, GameState.READY])
+            if state == GameState.READY:
+                return self.handle_ready_screen()
+            if state is None:
+                log.warning("⚠️ Chưa thấy màn MAP sau %ss - vẫn thử tìm 'Chiến'", self.transition_timeout)
             
             return self.handle_map_screen()
         else:
-            print(f"❌ KHÔNG TÌM THẤY nút 'Nhận' (đã tìm {elapsed:.2f}s)")
-            print("💡 Kiểm tra: OCR có hoạt động không? Tesseract đã cài chưa?")
+            log.error("❌ KHÔNG TÌM THẤY nút 'Nhận' (đã tìm %.2fs)", elapsed)
+            log.error("💡 Kiểm tra: OCR có hoạt động không? Tesseract đã cài chưa?")
             return False
     
     def handle_map_screen(self) -> bool:
@@ -177,7 +260,7 @@ class GameStateManager:
         Returns:
             True if handled successfully
         """
-        print("\n🗺️  Phát hiện màn MAP - Đang nhấn 'Chiến'...")
+        log.info("\n🗺️  Phát hiện màn MAP - Đang nhấn 'Chiến'...")
         
         start_time = time.time()
         screenshot = self.capture_game_window()
@@ -185,17 +268,18 @@ class GameStateManager:
         elapsed = time.time() - start_time
         
         if button_pos:
-            print(f"   ✓ Tìm thấy nút 'Chiến' tại ({button_pos[0]}, {button_pos[1]}) trong {elapsed:.2f}s")
+            log.info("   ✓ Tìm thấy nút 'Chiến' tại (%d, %d) trong %.2fs", button_pos[0], button_pos[1], elapsed)
             self.click_at_position(button_pos[0], button_pos[1])
-            print("✅ Đã nhấn 'Chiến'!")
+            log.info("✅ Đã nhấn 'Chiến'!")
             
-            # Wait 2 seconds then look for "Bắt đầu"
-            print("⏳ Đợi 2 giây...")
-            time.sleep(2.0)
+            # Chờ màn READY rồi nhấn "Bắt đầu" ngay
+            log.info("⏳ Chờ màn READY...")
+            if self.wait_for_state(GameState.READY) is None:
+                log.warning("⚠️ Chưa thấy màn READY sau %ss - vẫn thử tìm 'Bắt đầu'", self.transition_timeout)
             
             return self.handle_ready_screen()
         else:
-            print(f"⚠️ Không tìm thấy nút 'Chiến' (đã tìm {elapsed:.2f}s)")
+            log.warning("⚠️ Không tìm thấy nút 'Chiến' (đã tìm %.2fs)", elapsed)
             return False
     
     def handle_ready_screen(self) -> bool:
@@ -205,7 +289,7 @@ class GameStateManager:
         Returns:
             True if handled successfully
         """
-        print("\n⚔️  Phát hiện màn READY - Đang nhấn 'Bắt đầu'...")
+        log.info("\n⚔️  Phát hiện màn READY - Đang nhấn 'Bắt đầu'...")
         
         start_time = time.time()
         screenshot = self.capture_game_window()
@@ -213,20 +297,23 @@ class GameStateManager:
         elapsed = time.time() - start_time
         
         if button_pos:
-            print(f"   ✓ Tìm thấy nút 'Bắt đầu' tại ({button_pos[0]}, {button_pos[1]}) trong {elapsed:.2f}s")
+            log.info("   ✓ Tìm thấy nút 'Bắt đầu' tại (%d, %d) trong %.2fs", button_pos[0], button_pos[1], elapsed)
             self.click_at_position(button_pos[0], button_pos[1])
-            print("✅ Đã nhấn 'Bắt đầu'!")
-            print("🎮 Chuẩn bị chơi match-3...\n")
-            time.sleep(2.0)  # Wait for game to start
+            log.info("✅ Đã nhấn 'Bắt đầu'!")
+            log.info("🎮 Chuẩn bị chơi match-3...\n")
+            
+            # Chờ vào trận (không còn nút nào)
+            if self.wait_for_state(GameState.PLAYING) is None:
+                log.warning("⚠️ Chưa vào trận sau %ss", self.transition_timeout)
             return True
         else:
-            print(f"⚠️ Không tìm thấy nút 'Bắt đầu' (đã tìm {elapsed:.2f}s)")
+            log.warning("⚠️ Không tìm thấy nút 'Bắt đầu' (đã tìm %.2fs)", elapsed)
             return False
     
     def update_and_handle_state(self, silent_check: bool = False) -> GameState:
         """
         Update current state and handle automation
-        Sequential flow: Nhận → 2s → Chiến → 2s → Bắt đầu
+        Sequential flow: Nhận → (màn MAP) → Chiến → (màn READY) → Bắt đầu
         
         Args:
             silent_check: If True, don't print logs during initial state detection
@@ -242,7 +329,7 @@ class GameStateManager:
         
         # Log state change
         if new_state != self.current_state:
-            print(f"\n🔄 State changed: {self.current_state.value} → {new_state.value}")
+            log.info("\n🔄 State changed: %s → %s", self.current_state.value, new_state.value)
             self.current_state = new_state
             self.last_state_change = time.time()
         
@@ -261,8 +348,7 @@ class GameStateManager:
         
         elif new_state == GameState.READY:
             self.handle_ready_screen()
-            # After handling, should be in PLAYING state
-            time.sleep(1)  # Give game time to transition
+            # After handling, should be in PLAYING state (handle_ready_screen đã chờ chuyển màn)
             return self.detect_current_state(silent=False)
         
         elif new_state == GameState.PLAYING:
@@ -291,5 +377,5 @@ class GameStateManager:
             
             time.sleep(0.5)
         
-        print(f"⚠️ Timeout waiting for PLAYING state")
+        log.warning("⚠️ Timeout waiting for PLAYING state")
         return False
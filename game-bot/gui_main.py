@@ -6,11 +6,14 @@ Professional interface for game automation
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
+import queue
 import keyboard
 import sys
 import os
+import time
 
-from main import GameBot
+# main (cv2, numpy, mss, pyautogui...) được import ở background sau khi cửa sổ hiện
+# → xem _preload_bot_modules()
 
 class BotGUI:
     def __init__(self):
@@ -31,9 +34,27 @@ class BotGUI:
         # Setup hotkeys
         keyboard.on_press_key('space', self.toggle_pause)
         
-        # Redirect stdout to text widget
-        sys.stdout = TextRedirector(self.log_text)
-        sys.stderr = TextRedirector(self.log_text)
+        # Redirect stdout/stderr to text widget (qua queue, Tk main loop tự lấy ra hiển thị)
+        self.log_sink = TextRedirector(self.log_text)
+        sys.stdout = self.log_sink
+        sys.stderr = self.log_sink
+        self.log_sink.start()
+        
+        # Cửa sổ hiện ngay, module nặng của bot được import sau
+        self.window.after(100, self._preload_bot_modules)
+    
+    def _preload_bot_modules(self):
+        """Import trước các module của bot trong background thread (bấm Start không phải chờ)"""
+        def preload():
+            start_time = time.perf_counter()
+            try:
+                import main  # noqa: F401
+            except Exception as e:
+                print(f"⚠️ Không import được bot: {e}")
+                return
+            print(f"✓ Bot modules sẵn sàng ({time.perf_counter() - start_time:.2f}s)")
+        
+        threading.Thread(target=preload, daemon=True).start()
     
     def setup_ui(self):
         """Setup user interface"""
@@ -538,7 +559,8 @@ class BotGUI:
     def run_bot(self):
         """Run bot main loop"""
         try:
-            # Create bot instance
+            # Create bot instance (import lock chờ preload nếu đang chạy dở)
+            from main import GameBot
             self.bot = GameBot(config_path="config.yaml", auto_calibrate=False)
             
             print("✅ Bot đã khởi tạo thành công!")
@@ -551,7 +573,6 @@ class BotGUI:
             while self.is_running:
                 # Check if paused
                 if self.is_paused:
-                    import time
                     time.sleep(0.1)
                     continue
                 
@@ -565,12 +586,10 @@ class BotGUI:
                 self.update_moves_label()
                 
                 if not success:
-                    import time
                     time.sleep(1)
                     continue
                 
                 # Delay between moves (2-3 seconds for calculation)
-                import time
                 import random
                 delay = random.uniform(2.0, 3.0)
                 time.sleep(delay)
@@ -606,18 +625,72 @@ class BotGUI:
 
 
 class TextRedirector:
-    """Redirect stdout/stderr to text widget"""
+    """
+    Redirect stdout/stderr to text widget
     
-    def __init__(self, widget):
+    - write() chỉ đưa text vào queue (không block, an toàn khi gọi từ thread của bot)
+    - Tk main loop lấy ra theo từng batch bằng after() rồi insert một lần
+    - Giữ tối đa max_lines dòng trong widget (xóa dòng cũ nhất)
+    """
+    
+    def __init__(self, widget, max_lines: int = 5000, max_queued: int = 20000,
+                 poll_interval_ms: int = 50, batch_size: int = 1000):
+        """
+        Args:
+            widget: Tk Text widget
+            max_lines: Số dòng tối đa giữ trong widget
+            max_queued: Số message tối đa chờ hiển thị (quá thì bỏ bớt, không block bot)
+            poll_interval_ms: Chu kỳ lấy log ra hiển thị
+            batch_size: Số message tối đa mỗi lần insert
+        """
         self.widget = widget
+        self.max_lines = max_lines
+        self.poll_interval_ms = poll_interval_ms
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.dropped = 0
     
     def write(self, text):
-        self.widget.insert('end', text)
-        self.widget.see('end')
-        self.widget.update()
+        if not text:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
     
     def flush(self):
         pass
+    
+    def start(self):
+        """Bắt đầu vòng lấy log (gọi từ Tk main thread)"""
+        self.widget.after(self.poll_interval_ms, self._drain)
+    
+    def _drain(self):
+        """Lấy một batch log từ queue và insert vào widget (chạy trên Tk main thread)"""
+        chunks = []
+        try:
+            while len(chunks) < self.batch_size:
+                chunks.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if self.dropped:
+            chunks.append(f"\n⚠ Bỏ qua {self.dropped} dòng log (GUI hiển thị không kịp)\n")
+            self.dropped = 0
+        
+        if chunks:
+            self.widget.insert('end', ''.join(chunks))
+            
+            # Giới hạn scrollback
+            line_count = int(self.widget.index('end-1c').split('.')[0])
+            if line_count > self.max_lines:
+                self.widget.delete('1.0', f'{line_count - self.max_lines + 1}.0')
+            
+            self.widget.see('end')
+        
+        # Còn log tồn → lấy tiếp ngay, không thì chờ chu kỳ sau
+        delay = 1 if not self.queue.empty() else self.poll_interval_ms
+        self.widget.after(delay, self._drain)
 
 
 def main():
@@ -0,0 +1,309 @@
+"""
+Cascade Kernels Module
+Vòng lặp lõi của một rollout cascade (quét match, nén cột, spawn, cộng điểm)
+trên board dạng mảng int8 (MatchThreeLogic.encode_board)
+
+- Có numba: các kernel được compile (njit) khi import, MoveEvaluator dùng CascadeKernel
+- Không có numba: kernel vẫn chạy được dưới dạng Python thuần (chậm, chỉ để test),
+  MoveEvaluator giữ đường cũ qua MatchThreeLogic
+
+Kernel lấy gems rơi xuống từ chính các stream của SpawnSource, nên cùng seed cho
+kết quả giống hệt MatchThreeLogic.simulate_cascade
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from logic import Move, MatchThreeLogic, EMPTY_CODE, LOCKED_CODE
+from bot_logging import get_logger
+
+log = get_logger("kernels")
+
+try:
+    import numba
+    BACKEND = "numba"
+    jit = numba.njit(cache=True, nogil=True)
+except ImportError:
+    numba = None
+    BACKEND = "python"
+    
+    def jit(func):
+        """Không có numba → giữ nguyên hàm Python"""
+        return func
+
+# Thống kê của một rollout (mảng stats của cascade_rollout)
+STAT_LEVEL1 = 0     # Điểm cascade cấp 1
+STAT_DEEPER = 1     # Điểm các cấp sâu hơn
+STAT_DEPTH = 2      # Số cấp cascade (không tính chain của move)
+STAT_MATCHES = 3
+STAT_GEMS = 4
+STAT_YELLOW = 5
+STAT_SIZE = 6
+
+
+@jit
+def scan_matches(codes, removed, runs):
+    """
+    find_all_matches trên mảng mã gem
+    
+    Quét theo hàng như bản Python: ô đã thuộc match trước đó bị bỏ qua,
+    tại mỗi ô lấy cả đoạn ngang và dọc (>= 3) đi qua ô đó
+    
+    Args:
+        codes: Mảng (rows, cols) int8
+        removed: Mảng bool (rows, cols), được ghi lại = các ô thuộc match
+        runs: Mảng (>= rows * cols * 2, 2) int64, ghi (mã gem, độ dài) từng match
+    
+    Returns:
+        Số match
+    """
+    rows, cols = codes.shape
+    removed[:, :] = False
+    count = 0
+    for r in range(rows):
+        for c in range(cols):
+            if removed[r, c]:
+                continue
+            gem = codes[r, c]
+            if gem < 0:
+                continue
+            
+            left = c
+            while left > 0 and codes[r, left - 1] == gem:
+                left -= 1
+            right = c
+            while right < cols - 1 and codes[r, right + 1] == gem:
+                right += 1
+            up = r
+            while up > 0 and codes[up - 1, c] == gem:
+                up -= 1
+            down = r
+            while down < rows - 1 and codes[down + 1, c] == gem:
+                down += 1
+            
+            if right - left + 1 >= 3:
+                runs[count, 0] = gem
+                runs[count, 1] = right - left + 1
+                count += 1
+                for i in range(left, right + 1):
+                    removed[r, i] = True
+            if down - up + 1 >= 3:
+                runs[count, 0] = gem
+                runs[count, 1] = down - up + 1
+                count += 1
+                for i in range(up, down + 1):
+                    removed[i, c] = True
+    return count
+
+
+@jit
+def compact_columns(codes, removed):
+    """
+    simulate_gravity tại chỗ: ô bị xóa và ô EMPTY/LOCKED bị lấp bởi gems phía trên
+    
+    Args:
+        codes: Mảng (rows, cols) int8 (bị sửa)
+        removed: Mảng bool (rows, cols)
+    """
+    rows, cols = codes.shape
+    for c in range(cols):
+        dst = rows - 1
+        for r in range(rows - 1, -1, -1):
+            gem = codes[r, c]
+            if removed[r, c] or gem == EMPTY_CODE or gem == LOCKED_CODE:
+                continue
+            codes[dst, c] = gem
+            dst -= 1
+        while dst >= 0:
+            codes[dst, c] = EMPTY_CODE
+            dst -= 1
+
+
+@jit
+def fill_empty(codes, spawn, cursors):
+    """
+    SpawnSource.fill trên mảng: ô EMPTY lấy gem tiếp theo của cột (từ trên xuống)
+    
+    Args:
+        codes: Mảng (rows, cols) int8 (bị sửa)
+        spawn: Mảng (cols, window) int8 - gems sắp rơi của từng cột (SpawnSource.code_window)
+        cursors: Mảng (cols,) int64 - số gems đã dùng của từng cột (bị sửa)
+    
+    Returns:
+        False nếu window không đủ gems
+    """
+    rows, cols = codes.shape
+    window = spawn.shape[1]
+    for c in range(cols):
+        for r in range(rows):
+            if codes[r, c] == EMPTY_CODE:
+                if cursors[c] >= window:
+                    return False
+                codes[r, c] = spawn[c, cursors[c]]
+                cursors[c] += 1
+    return True
+
+
+@jit
+def score_runs(runs, count, points, yellow_code, stats, score_slot):
+    """
+    Cộng điểm một cấp cascade: len(match) * điểm gem cho từng match
+    
+    Args:
+        runs, count: Kết quả scan_matches
+        points: Mảng điểm theo mã gem
+        yellow_code: Mã của YELLOW_STAR (-1 nếu không có)
+        stats: Mảng thống kê (STAT_*)
+        score_slot: STAT_LEVEL1 hoặc STAT_DEEPER
+    """
+    for i in range(count):
+        gem = runs[i, 0]
+        length = runs[i, 1]
+        stats[score_slot] += length * points[gem]
+        stats[STAT_MATCHES] += 1
+        stats[STAT_GEMS] += length
+        if gem == yellow_code:
+            stats[STAT_YELLOW] += length
+
+
+@jit
+def cascade_rollout(codes, removed, spawn, cursors, points, yellow_code, max_depth, stats):
+    """
+    Một rollout cascade (giống MatchThreeLogic.simulate_cascade với spawn_gems=True)
+    
+    Args:
+        codes: Board sau swap (bị sửa)
+        removed: Ô bị ăn bởi move (chain đầu tiên, bị sửa)
+        spawn, cursors: Gems rơi xuống (xem fill_empty)
+        points: Mảng điểm theo mã gem
+        yellow_code: Mã của YELLOW_STAR (-1 nếu không có)
+        max_depth: Số chain tối đa (tính cả chain của move)
+        stats: Mảng (STAT_SIZE,) int64, ghi thống kê các chain sau chain của move
+    
+    Returns:
+        False nếu window spawn không đủ (gọi lại với window lớn hơn)
+    """
+    rows, cols = codes.shape
+    runs = np.empty((rows * cols * 2, 2), dtype=np.int64)
+    stats[:] = 0
+    
+    for chain in range(1, max_depth + 1):
+        # Chain trước đã được ghi → rơi, spawn, tìm match mới
+        compact_columns(codes, removed)
+        if not fill_empty(codes, spawn, cursors):
+            return False
+        count = scan_matches(codes, removed, runs)
+        if count == 0 or chain == max_depth:
+            break
+        stats[STAT_DEPTH] += 1
+        score_runs(runs, count, points, yellow_code, stats, STAT_LEVEL1 if chain == 1 else STAT_DEEPER)
+    return True
+
+
+class CascadeKernel:
+    """
+    Rollout cascade qua kernel cho MoveEvaluator (board tên gem → mảng int8)
+    
+    Board được encode một lần và giữ lại (thread-local) cho các rollout tiếp theo
+    trên cùng board.
+    """
+    
+    def __init__(self, gem_points: Callable[[str], int]):
+        """
+        Initialize kernel wrapper
+        
+        Args:
+            gem_points: Điểm mỗi gem (MoveEvaluator.get_gem_points)
+        """
+        self.gem_points = gem_points
+        self._local = threading.local()
+        self._points: Dict[tuple, np.ndarray] = {}
+    
+    def _points_for(self, logic: MatchThreeLogic) -> np.ndarray:
+        """Mảng điểm theo mã gem của logic (gem lạ được thêm khi encode)"""
+        names = tuple(logic.gem_codes)
+        points = self._points.get(names)
+        if points is None:
+            points = np.array([self.gem_points(gem) for gem in names], dtype=np.int64)
+            self._points[names] = points
+        return points
+    
+    def _encoded(self, board: List[List[str]], logic: MatchThreeLogic) -> np.ndarray:
+        """encode_board, dùng lại kết quả nếu vẫn là board trước đó"""
+        cached = getattr(self._local, "board", None)
+        if cached is not None and cached[0] is logic and cached[1] == board:
+            return cached[2]
+        codes = logic.encode_board(board)
+        self._local.board = (logic, [row[:] for row in board], codes)
+        return codes
+    
+    def rollout(self, move: Move, board: List[List[str]], logic: MatchThreeLogic,
+                max_depth: int = 15) -> np.ndarray:
+        """
+        Một rollout cascade của move
+        
+        Args:
+            move: Move
+            board: Board hiện tại (trước swap)
+            logic: MatchThreeLogic (gem codes + SpawnSource)
+            max_depth: Số cấp cascade tối đa (như simulate_cascade max_iterations)
+        
+        Returns:
+            Mảng (STAT_SIZE,) int64 - xem STAT_*
+        """
+        codes = self._encoded(board, logic).copy()
+        a, b = move.from_pos, move.to_pos
+        codes[a.row, a.col], codes[b.row, b.col] = codes[b.row, b.col], codes[a.row, a.col]
+        
+        removed = np.zeros(codes.shape, dtype=np.bool_)
+        for match in move.matches:
+            for pos in match.positions:
+                removed[pos.row, pos.col] = True
+        
+        points = self._points_for(logic)
+        yellow_code = logic.gem_codes.get("YELLOW_STAR", -1)
+        stats = np.zeros(STAT_SIZE, dtype=np.int64)
+        
+        # Window đủ cho vài cấp cascade; thiếu → lấy window gấp đôi và chạy lại từ đầu
+        window = logic.rows * 4
+        while True:
+            spawn = logic.spawn_source.code_window(window)
+            cursors = np.zeros(logic.cols, dtype=np.int64)
+            if cascade_rollout(codes.copy(), removed.copy(), spawn, cursors,
+                               points, yellow_code, max_depth, stats):
+                break
+            window *= 2
+        logic.spawn_source.advance(cursors)
+        return stats
+
+
+_warmed_up = False
+
+
+def warm_up() -> float:
+    """
+    Compile các kernel trên board nhỏ (một lần mỗi process) để lượt đầu không chịu chi phí compile
+    
+    Returns:
+        Thời gian warm-up (giây), 0 nếu đã warm-up hoặc không có numba
+    """
+    global _warmed_up
+    if _warmed_up or BACKEND != "numba":
+        return 0.0
+    
+    start = time.perf_counter()
+    codes = np.array([[0, 0, 1], [1, 1, 0], [0, 1, 1]], dtype=np.int8)
+    removed = np.zeros(codes.shape, dtype=np.bool_)
+    removed[1, :] = True
+    spawn = np.zeros((3, 16), dtype=np.int8)
+    cursors = np.zeros(3, dtype=np.int64)
+    points = np.ones(2, dtype=np.int64)
+    cascade_rollout(codes, removed, spawn, cursors, points, -1, 3, np.zeros(STAT_SIZE, dtype=np.int64))
+    
+    _warmed_up = True
+    elapsed = time.perf_counter() - start
+    log.info("⚡ Numba kernels ready (%.2fs)", elapsed)
+    return elapsed
@@ -3,10 +3,17 @@ Match-3 Logic Module
 Detects valid moves and matches on the board
 """
 
-from typing import List, Tuple, Set, Optional
+from typing import List, Tuple, Set, Optional, Dict
 from dataclasses import dataclass
 from enum import Enum
-import random
+import numpy as np
+
+# Hằng số ô đặc biệt (các module khác vẫn import được từ logic)
+from constants import SPECIAL_CELLS, EMPTY_CODE, LOCKED_CODE, UNKNOWN_CODE, SPECIAL_CODES, GRAVITY_VACANT
+from spawn import SpawnSource
+
+# Bảng gravity tính sẵn cho mọi removal mask của một cột (2^rows entries)
+GRAVITY_TABLE_MAX_ROWS = 12
 
 
 class Direction(Enum):
@@ -82,6 +89,145 @@ class MatchThreeLogic:
             "RED_HEART",
             "GRAY_YINYANG"
         ]
+        
+        # Mã số gem cho board dạng numpy (gem lạ sẽ được thêm khi encode)
+        self.gem_codes = {gem: code for code, gem in enumerate(self.gem_types)}
+        
+        # Nguồn gems rơi xuống (block random tính sẵn, mỗi cột một stream)
+        self.spawn_source = SpawnSource(self.gem_types, cols)
+        
+        # Bảng swap/cửa sổ match tính sẵn cho has_valid_move / count_valid_moves
+        self._build_swap_tables()
+        
+        # Bảng nén cột tính sẵn cho simulate_gravity / simulate_gravity_batch
+        self._build_gravity_tables()
+    
+    def _build_swap_tables(self):
+        """
+        Tính sẵn danh sách swap và các cửa sổ 3 ô chứa mỗi đầu swap
+        
+        - Scalar: mỗi cửa sổ là bitmask (bit = row * cols + col)
+        - Vectorized: chỉ số ô nguồn của từng cửa sổ SAU khi swap, padding bằng
+          ô sentinel (luôn là UNKNOWN) để mọi swap có cùng số cửa sổ
+        """
+        rows, cols = self.rows, self.cols
+        
+        def windows_through(row, col):
+            """Các cửa sổ 3 ô (ngang/dọc) chứa ô (row, col)"""
+            windows = []
+            for start in range(col - 2, col + 1):
+                if start >= 0 and start + 2 < cols:
+                    windows.append([row * cols + c for c in range(start, start + 3)])
+            for start in range(row - 2, row + 1):
+                if start >= 0 and start + 2 < rows:
+                    windows.append([r * cols + col for r in range(start, start + 3)])
+            return windows
+        
+        swaps = []
+        for row in range(rows):
+            for col in range(cols):
+                if col + 1 < cols:
+                    swaps.append((row, col, row, col + 1))
+                if row + 1 < rows:
+                    swaps.append((row, col, row + 1, col))
+        
+        self._swap_bit_windows = []
+        swap_windows = []
+        for r1, c1, r2, c2 in swaps:
+            a, b = r1 * cols + c1, r2 * cols + c2
+            windows_a = windows_through(r1, c1)
+            windows_b = windows_through(r2, c2)
+            self._swap_bit_windows.append((
+                a, b,
+                [sum(1 << i for i in w) for w in windows_a],
+                [sum(1 << i for i in w) for w in windows_b]
+            ))
+            
+            # Ô a nhận gem của b và ngược lại
+            remap = {a: b, b: a}
+            swap_windows.append([[remap.get(i, i) for i in w] for w in windows_a + windows_b])
+        
+        sentinel = rows * cols
+        max_windows = max((len(w) for w in swap_windows), default=0)
+        padded = [w + [[sentinel] * 3] * (max_windows - len(w)) for w in swap_windows]
+        
+        self._swap_a = np.array([a for a, _, _, _ in self._swap_bit_windows], dtype=np.intp)
+        self._swap_b = np.array([b for _, b, _, _ in self._swap_bit_windows], dtype=np.intp)
+        self._swap_window_src = np.array(padded, dtype=np.intp).reshape(len(swaps), max_windows, 3)
+    
+    def _gravity_keep(self, mask: int) -> Tuple[int, ...]:
+        """
+        Các hàng được giữ lại của một cột, từ dưới lên
+        
+        Args:
+            mask: Removal mask của cột (bit r = hàng r bị xóa/trống)
+        
+        Returns:
+            Tuple chỉ số hàng nguồn - gem thứ i rơi xuống hàng rows - 1 - i
+        """
+        return tuple(row for row in range(self.rows - 1, -1, -1) if not mask >> row & 1)
+    
+    def _build_gravity_tables(self):
+        """
+        Tính sẵn kết quả gravity cho mọi removal mask của một cột
+        
+        - Scalar: _gravity_keep_table[mask] = hàng nguồn từ dưới lên
+        - Vectorized: _gravity_src[mask, dst_row] = hàng nguồn của dst_row,
+          hoặc `rows` (hàng sentinel EMPTY) nếu dst_row trống sau khi rơi
+        
+        Board quá cao (> GRAVITY_TABLE_MAX_ROWS hàng) → tính từng mask khi cần
+        """
+        rows = self.rows
+        if rows > GRAVITY_TABLE_MAX_ROWS:
+            self._gravity_keep_table = None
+            self._gravity_src = None
+            return
+        
+        self._gravity_keep_table = [self._gravity_keep(mask) for mask in range(1 << rows)]
+        
+        src = np.full((1 << rows, rows), rows, dtype=np.intp)
+        for mask, keep in enumerate(self._gravity_keep_table):
+            for i, row in enumerate(keep):
+                src[mask, rows - 1 - i] = row
+        self._gravity_src = src
+        self._row_bits = (1 << np.arange(rows)).reshape(rows, 1)
+    
+    def encode_board(self, board: List[List[str]]) -> np.ndarray:
+        """
+        Encode board (tên gem) sang mảng numpy int8
+        Gem types có mã >= 0, ô đặc biệt có mã âm (EMPTY_CODE, LOCKED_CODE, UNKNOWN_CODE)
+        
+        Args:
+            board: Game board
+            
+        Returns:
+            Mảng (rows, cols) int8
+        """
+        codes = np.empty((self.rows, self.cols), dtype=np.int8)
+        for row in range(self.rows):
+            for col in range(self.cols):
+                gem = board[row][col]
+                code = SPECIAL_CODES.get(gem)
+                if code is None:
+                    code = self.gem_codes.get(gem)
+                    if code is None:
+                        code = self.gem_codes[gem] = len(self.gem_codes)
+                codes[row, col] = code
+        return codes
+    
+    def decode_board(self, codes: np.ndarray) -> List[List[str]]:
+        """
+        Decode mảng numpy (từ encode_board) về board dạng tên gem
+        
+        Args:
+            codes: Mảng (rows, cols)
+            
+        Returns:
+            Game board
+        """
+        names = {code: gem for gem, code in self.gem_codes.items()}
+        names.update({code: gem for gem, code in SPECIAL_CODES.items()})
+        return [[names[int(code)] for code in row] for row in codes]
     
     def is_valid_position(self, pos: Position) -> bool:
         """Check if position is within board bounds"""
@@ -282,6 +428,138 @@ class MatchThreeLogic:
         
         return valid_moves
     
+    def _gem_bitmasks(self, board: List[List[str]]) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Tạo bitmask cho từng loại gem (bit = row * cols + col)
+        
+        Args:
+            board: Game board
+            
+        Returns:
+            Tuple (danh sách gem theo thứ tự ô, dict gem_type -> bitmask)
+        """
+        flat = [gem for row in board for gem in row]
+        masks = {}
+        bit = 1
+        for gem in flat:
+            if gem not in SPECIAL_CELLS:
+                masks[gem] = masks.get(gem, 0) | bit
+            bit <<= 1
+        return flat, masks
+    
+    def _count_valid_swaps(self, board: List[List[str]], stop_at_first: bool = False) -> int:
+        """
+        Đếm số swap hợp lệ bằng bitmask (không tạo Move/Match)
+        
+        Args:
+            board: Game board
+            stop_at_first: Dừng ngay khi tìm thấy swap hợp lệ đầu tiên
+            
+        Returns:
+            Số cặp ô (không tính chiều) có thể swap để tạo match
+        """
+        flat, masks = self._gem_bitmasks(board)
+        count = 0
+        
+        for a, b, windows_a, windows_b in self._swap_bit_windows:
+            gem_a = flat[a]
+            gem_b = flat[b]
+            if gem_a in SPECIAL_CELLS or gem_b in SPECIAL_CELLS:
+                continue
+            
+            if gem_a == gem_b:
+                # Swap 2 gem giống nhau không đổi board
+                mask_at_a = mask_at_b = masks[gem_a]
+            else:
+                bit_a = 1 << a
+                bit_b = 1 << b
+                mask_at_a = (masks[gem_b] & ~bit_b) | bit_a  # gem_b chuyển sang ô a
+                mask_at_b = (masks[gem_a] & ~bit_a) | bit_b  # gem_a chuyển sang ô b
+            
+            if (any(mask_at_a & w == w for w in windows_a) or
+                    any(mask_at_b & w == w for w in windows_b)):
+                count += 1
+                if stop_at_first:
+                    break
+        
+        return count
+    
+    def has_valid_move(self, board: List[List[str]]) -> bool:
+        """
+        Kiểm tra nhanh board còn nước đi hợp lệ không (dừng ở swap đầu tiên)
+        
+        Args:
+            board: Game board
+            
+        Returns:
+            True nếu có ít nhất một nước đi
+        """
+        return self._count_valid_swaps(board, stop_at_first=True) > 0
+    
+    def count_valid_moves(self, board: List[List[str]]) -> int:
+        """
+        Đếm số nước đi hợp lệ mà không tạo Move/Match
+        Bằng len(find_valid_moves(board)) - mỗi swap được tính theo cả 2 chiều
+        
+        Args:
+            board: Game board
+            
+        Returns:
+            Số nước đi hợp lệ
+        """
+        return 2 * self._count_valid_swaps(board)
+    
+    def _valid_swaps_batch(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Tính swap hợp lệ cho nhiều board cùng lúc
+        
+        Args:
+            codes: Mảng (N, rows, cols) hoặc (rows, cols) từ encode_board
+            
+        Returns:
+            Mảng bool (N, num_swaps)
+        """
+        codes = np.asarray(codes)
+        if codes.ndim == 2:
+            codes = codes[np.newaxis]
+        
+        n = codes.shape[0]
+        flat = np.empty((n, self.rows * self.cols + 1), dtype=np.int8)
+        flat[:, :-1] = codes.reshape(n, -1)
+        flat[:, -1] = UNKNOWN_CODE  # sentinel cho cửa sổ padding
+        
+        # Giá trị các ô trong từng cửa sổ sau khi swap: (N, swaps, windows, 3)
+        values = flat[:, self._swap_window_src]
+        first = values[..., 0]
+        matched = (first >= 0) & (first == values[..., 1]) & (first == values[..., 2])
+        
+        endpoints_ok = (flat[:, self._swap_a] >= 0) & (flat[:, self._swap_b] >= 0)
+        return matched.any(axis=2) & endpoints_ok
+    
+    def has_valid_move_batch(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Vectorized has_valid_move cho nhiều board (phát hiện dead board trong simulation)
+        
+        Args:
+            codes: Mảng (N, rows, cols) từ encode_board
+            
+        Returns:
+            Mảng bool (N,)
+        """
+        return self._valid_swaps_batch(codes).any(axis=1)
+    
+    def count_valid_moves_batch(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Vectorized count_valid_moves cho nhiều board
+        
+        Args:
+            codes: Mảng (N, rows, cols) từ encode_board
+            
+        Returns:
+            Mảng int (N,) - số nước đi hợp lệ của từng board
+        """
+        return 2 * self._valid_swaps_batch(codes).sum(axis=1)
+    
     def get_affected_gems(self, matches: List[Match]) -> Set[Position]:
         """
         Get all gem positions affected by matches
@@ -340,33 +618,72 @@ class MatchThreeLogic:
         """
         # Create a copy of the board
         new_board = [row[:] for row in board]
+        rows = self.rows
         
-        # Mark removed positions as EMPTY
+        # Removal mask từng cột: ô bị xóa + ô EMPTY/LOCKED sẵn có
+        masks = [0] * self.cols
         for pos in removed_positions:
-            new_board[pos.row][pos.col] = "EMPTY"
-        
-        # Apply gravity column by column
-        for col in range(self.cols):
-            # Collect non-empty gems from bottom to top
-            gems = []
-            for row in range(self.rows - 1, -1, -1):
-                gem = new_board[row][col]
-                if gem not in ["EMPTY", "LOCKED"]:
-                    gems.append(gem)
-            
-            # Place gems back from bottom
-            row = self.rows - 1
+            masks[pos.col] |= 1 << pos.row
+        for row in range(rows):
+            board_row = board[row]
+            for col in range(self.cols):
+                if board_row[col] in GRAVITY_VACANT:
+                    masks[col] |= 1 << row
+        
+        # Apply gravity column by column (cột không có ô trống giữ nguyên)
+        keep_table = self._gravity_keep_table
+        for col, mask in enumerate(masks):
+            if not mask:
+                continue
+            keep = keep_table[mask] if keep_table is not None else self._gravity_keep(mask)
+            
+            # Gems rơi xuống từ dưới lên theo bảng tính sẵn
+            gems = [board[row][col] for row in keep]
+            dst = rows - 1
             for gem in gems:
-                new_board[row][col] = gem
-                row -= 1
+                new_board[dst][col] = gem
+                dst -= 1
             
             # Fill remaining with EMPTY (will be refilled with random gems in real game)
-            while row >= 0:
-                new_board[row][col] = "EMPTY"
-                row -= 1
+            while dst >= 0:
+                new_board[dst][col] = "EMPTY"
+                dst -= 1
         
         return new_board
     
+    def simulate_gravity_batch(self, codes: np.ndarray, removed: np.ndarray) -> np.ndarray:
+        """
+        Vectorized simulate_gravity cho nhiều board (gather theo bảng tính sẵn)
+        
+        Args:
+            codes: Mảng (N, rows, cols) hoặc (rows, cols) từ encode_board
+            removed: Mảng bool cùng shape - ô bị xóa
+            
+        Returns:
+            Mảng cùng shape với codes sau gravity (ô trống = EMPTY_CODE,
+            LOCKED bị coi như ô trống giống simulate_gravity)
+        """
+        codes = np.asarray(codes)
+        single = codes.ndim == 2
+        if single:
+            codes = codes[np.newaxis]
+            removed = np.asarray(removed)[np.newaxis]
+        
+        if self._gravity_src is None:
+            raise ValueError(f"simulate_gravity_batch cần board <= {GRAVITY_TABLE_MAX_ROWS} hàng")
+        
+        n = codes.shape[0]
+        vacant = removed | (codes == EMPTY_CODE) | (codes == LOCKED_CODE)
+        masks = (vacant * self._row_bits).sum(axis=1)          # (N, cols)
+        src = self._gravity_src[masks].transpose(0, 2, 1)       # (N, rows, cols)
+        
+        padded = np.empty((n, self.rows + 1, self.cols), dtype=codes.dtype)
+        padded[:, :-1] = codes
+        padded[:, -1] = EMPTY_CODE  # sentinel cho ô trống sau khi rơi
+        
+        result = np.take_along_axis(padded, src, axis=1)
+        return result[0] if single else result
+    
     def spawn_random_gems(self, board: List[List[str]]) -> List[List[str]]:
         """
         Spawn random gems vào các vị trí EMPTY
@@ -376,17 +693,9 @@ class MatchThreeLogic:
             board: Board state có các vị trí EMPTY
             
         Returns:
-            Board state với EMPTY được fill bằng random gems
+            Board state với EMPTY được fill bằng random gems (lấy từ self.spawn_source)
         """
-        new_board = [row[:] for row in board]
-        
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if new_board[row][col] == "EMPTY":
-                    # Random spawn một gem từ danh sách gem types
-                    new_board[row][col] = random.choice(self.gem_types)
-        
-        return new_board
+        return self.spawn_source.fill(board)
     
     def simulate_cascade(self, board: List[List[str]], initial_matches: List[Match], 
                         max_iterations: int = 5, spawn_gems: bool = False) -> dict:
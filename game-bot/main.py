@@ -10,29 +10,45 @@ import yaml
 from pathlib import Path
 from typing import Optional, List
 import glob
+import logging
 import os
+from contextlib import nullcontext
 
 from capture import ScreenCapture
 from board_reader_color import BoardReaderColor
 from logic import MatchThreeLogic, Move
+from spawn import SpawnEstimator
 from evaluator import MoveEvaluator
 from controller import MouseController
+from time_budget import TimeBudgetManager
+from speculative import SpeculativeEvaluator
+from eval_service import EvalClient
+from tracing import Tracer, get_tracer, set_tracer
+from session_recorder import RecordingCapture, SessionRecorder
+from bot_logging import get_logger, rate_limited, setup_logging
 from turn_detector import SimpleTurnDetector, TurnDetector
-from calibrate import BoardCalibrator
 from game_state_manager import GameStateManager, GameState
 
+log = get_logger("main")
+
 
 class GameBot:
     """Main bot controller"""
     
-    def __init__(self, config_path: str = "config.yaml", auto_calibrate: bool = False):
+    def __init__(self, config_path: str = "config.yaml", auto_calibrate: bool = False,
+                 config: Optional[dict] = None, shared=None):
         """
         Initialize the game bot
         
         Args:
             config_path: Path to configuration file
             auto_calibrate: If True, run calibration before starting
+            config: Config đã load sẵn (supervisor truyền config riêng của instance)
+            shared: SharedResources của supervisor (capture/evaluator/OCR/chuột dùng chung),
+                    None = bot chạy độc lập
         """
+        self.shared = shared
+        
         # Clean up old debug screenshots
         self._cleanup_old_screenshots()
         
@@ -41,7 +57,12 @@ class GameBot:
             self._run_calibration(config_path)
         
         # Load configuration
-        self.config = self._load_config(config_path)
+        self.config = config if config is not None else self._load_config(config_path)
+        
+        # Logging (level, file/JSON sink theo mục logging trong config)
+        # Supervisor đã cấu hình cho cả process
+        if shared is None:
+            setup_logging(self.config)
         
         # Initialize components
         self._initialize_components()
@@ -56,15 +77,15 @@ class GameBot:
         try:
             debug_files = glob.glob("debug_board_*.png")
             if debug_files:
-                print(f"🧹 Cleaning up {len(debug_files)} old screenshots...")
+                log.info("🧹 Cleaning up %d old screenshots...", len(debug_files))
                 for file in debug_files:
                     try:
                         os.remove(file)
                     except:
                         pass
-                print("✓ Cleanup complete")
+                log.info("✓ Cleanup complete")
         except Exception as e:
-            print(f"⚠ Cleanup warning: {e}")
+            log.warning("⚠ Cleanup warning: %s", e)
     
     def _run_calibration(self, config_path: str):
         """Run interactive calibration"""
@@ -78,6 +99,8 @@ class GameBot:
         print("\n📌 Nhấn ENTER để bắt đầu chọn vùng...")
         input()
         
+        # calibrate chỉ cần khi chọn vùng → import tại đây để khởi động nhanh
+        from calibrate import BoardCalibrator
         calibrator = BoardCalibrator()
         board_region = calibrator.select_region()
         
@@ -102,14 +125,24 @@ class GameBot:
     
     def _initialize_components(self):
         """Initialize all bot components"""
+        # Tracing (đo latency từng stage mỗi iteration, mặc định tắt)
+        if self.shared is None:
+            self.tracer = set_tracer(Tracer.from_config(self.config))
+            if self.tracer.enabled:
+                log.info("✓ Tracing enabled → %s (%s)", self.tracer.path, self.tracer.fmt)
+        else:
+            self.tracer = get_tracer()
+        
+        # Ghi phiên chơi (frames + quyết định mỗi iteration, mặc định tắt)
+        self.recorder = SessionRecorder.from_config(self.config)
+        
+        # Chuột và slot tính toán dùng chung khi chạy dưới supervisor
+        self.input_lock = self.shared.input_lock if self.shared else None
+        self.eval_slot = self.shared.eval_slots if self.shared else nullcontext()
+        
         # Screen capture
         screen_config = self.config['screen']
-        self.capture = ScreenCapture(
-            top=screen_config['top'],
-            left=screen_config['left'],
-            width=screen_config['width'],
-            height=screen_config['height']
-        )
+        self.capture = self._make_capture(screen_config, stream='board')
         
         # Board reader (using color detection)
         board_config = self.config['board']
@@ -125,24 +158,46 @@ class GameBot:
             cols=board_config['cols']
         )
         
-        # Move evaluator
-        self.evaluator = MoveEvaluator(
-            scoring_rules=self.config['scoring']
-        )
+        # Phân phối gem rơi xuống học từ các board ổn định (thay cho phân phối đều)
+        # Dưới supervisor mọi instance dùng chung một estimator (một file thống kê)
+        if self.shared:
+            self.spawn_estimator = self.shared.spawn_estimator
+        else:
+            self.spawn_estimator = SpawnEstimator.from_config(self.config, self.logic.gem_types)
+        self._spawn_version = self.spawn_estimator.apply(self.logic.spawn_source) if self.spawn_estimator else 0
+        self._last_move = None  # Move vừa thực hiện, chưa đối chiếu với board ổn định tiếp theo
+        
+        # Move evaluator (không giữ state → dùng chung được giữa các instance)
+        if self.shared:
+            self.evaluator = self.shared.evaluator
+        else:
+            self.evaluator = MoveEvaluator.from_config(self.config)
         
         # Mouse controller
-        cell_width = screen_config['width'] // board_config['cols']
-        cell_height = screen_config['height'] // board_config['rows']
+        self.controller = self._make_controller(screen_config, board_config)
         
-        mouse_config = self.config['mouse']
-        self.controller = MouseController(
-            board_top=screen_config['top'],
-            board_left=screen_config['left'],
-            cell_width=cell_width,
-            cell_height=cell_height,
-            drag_duration=mouse_config['drag_duration'],
-            random_delay_min=mouse_config['random_delay_min'],
-            random_delay_max=mouse_config['random_delay_max']
+        # Cache kết quả đánh giá theo board: dùng lại giữa các lượt (incremental) và
+        # cho speculative evaluation (tính trước trong lượt đối thủ)
+        spec_config = self.config.get('speculative', {})
+        incremental = self.config.get('calculation', {}).get('incremental', True)
+        if spec_config.get('enabled', False) or incremental:
+            self.speculative = SpeculativeEvaluator(
+                self.evaluator, self.logic,
+                max_entries=spec_config.get('max_entries', 8),
+                max_changed_cells=spec_config.get('max_changed_cells', 16)
+            )
+        else:
+            self.speculative = None
+        
+        # Eval service dùng chung trên máy (nếu bật), lỗi/không kịp → tự tính trong process
+        self.eval_client = EvalClient.from_config(self.config)
+        if self.eval_client:
+            log.info("✓ Eval service client → %s", self.eval_client.address)
+        
+        # Time budget (budget suy nghĩ theo timer còn lại của lượt)
+        self.time_budget = TimeBudgetManager.from_config(
+            self.config,
+            default_drag_latency=self.controller.estimate_drag_latency()
         )
         
         # Turn detector (for PvP games with timer)
@@ -151,12 +206,7 @@ class GameBot:
             
             # Create a separate capture for full game window (for timer detection)
             game_window = self.config.get('game_window', screen_config)
-            self.game_capture = ScreenCapture(
-                top=game_window['top'],
-                left=game_window['left'],
-                width=game_window['width'],
-                height=game_window['height']
-            )
+            self.game_capture = self._make_capture(game_window, stream='game')
             
             # Initialize turn detector
             tesseract_cmd = self.config.get('game_automation', {}).get('tesseract_path')
@@ -166,13 +216,13 @@ class GameBot:
                 tesseract_cmd=tesseract_cmd
             )
             self.min_timer_value = turn_config.get('min_timer_value', 2)
-            print("✓ Turn detector initialized (timer-based)")
-            print(f"  Timer region: {turn_config['timer_region']}")
-            print(f"  Min timer value: {self.min_timer_value}s")
+            log.info("✓ Turn detector initialized (timer-based)")
+            log.info("  Timer region: %s", turn_config['timer_region'])
+            log.info("  Min timer value: %ss", self.min_timer_value)
         else:
             self.turn_detector = None
             self.game_capture = None
-            print("ℹ Turn detection disabled (bot sẽ chơi liên tục)")
+            log.info("ℹ Turn detection disabled (bot sẽ chơi liên tục)")
         
         # Game state manager (for UI automation)
         if self.config.get('game_automation', {}).get('enabled', False):
@@ -184,20 +234,111 @@ class GameBot:
             self.state_manager = GameStateManager(
                 config=self.config,
                 game_window_region=game_window_region,
-                board_region=screen_config
+                board_region=screen_config,
+                ui_detector=self.shared.ui_detector if self.shared else None,
+                capture=(self._make_capture(game_window_region, stream='state')
+                         if self.shared or self.recorder.enabled else None),
+                input_lock=self.input_lock
             )
-            print("✓ Game automation enabled")
+            log.info("✓ Game automation enabled")
         else:
             self.state_manager = None
             self.game_window_region = None
-            print("ℹ Game automation disabled")
+            log.info("ℹ Game automation disabled")
+        
+        log.info("✓ All components initialized")
+    
+    def _make_controller(self, screen_config: dict, board_config: dict) -> MouseController:
+        """
+        Mouse controller cho vùng bàn cờ (replay thay bằng controller giả)
+        
+        Args:
+            screen_config: Vùng bàn cờ
+            board_config: rows/cols
+        
+        Returns:
+            MouseController
+        """
+        cell_width = screen_config['width'] // board_config['cols']
+        cell_height = screen_config['height'] // board_config['rows']
+        
+        mouse_config = self.config['mouse']
+        return MouseController(
+            board_top=screen_config['top'],
+            board_left=screen_config['left'],
+            cell_width=cell_width,
+            cell_height=cell_height,
+            drag_duration=mouse_config['drag_duration'],
+            random_delay_min=mouse_config['random_delay_min'],
+            random_delay_max=mouse_config['random_delay_max'],
+            input_lock=self.input_lock
+        )
+    
+    def _click_screen(self, x: int, y: int):
+        """
+        Click tại tọa độ màn hình (khi không có state manager)
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        """
+        import pyautogui
+        with self.input_lock or nullcontext():
+            pyautogui.click(x, y)
+    
+    def _make_capture(self, region: dict, stream: Optional[str] = None):
+        """
+        Capture cho một vùng màn hình
+        
+        Args:
+            region: {"top", "left", "width", "height"}
+            stream: Tên stream khi ghi phiên chơi (None = không ghi)
+        
+        Returns:
+            ScreenCapture (bot độc lập) hoặc view của capture dùng chung (supervisor)
+        """
+        if self.shared:
+            capture = self.shared.capture.view(region['top'], region['left'], region['width'], region['height'])
+        else:
+            capture = ScreenCapture(
+                top=region['top'],
+                left=region['left'],
+                width=region['width'],
+                height=region['height']
+            )
         
-        print("✓ All components initialized")
+        if stream and self.recorder.enabled:
+            capture = RecordingCapture(capture, self.recorder, stream)
+        return capture
     
-    def wait_for_stability(self) -> bool:
+    def _grab_region(self, region: dict, stream: str) -> np.ndarray:
+        """
+        Chụp một vùng nhỏ một lần (vd: vùng nút Nhận)
+        
+        Args:
+            region: {"top", "left", "width", "height"}
+            stream: Tên stream khi ghi phiên chơi
+        
+        Returns:
+            Ảnh BGR
+        """
+        if self.shared:
+            img = self.shared.capture.grab(region)
+        else:
+            import mss
+            with mss.mss() as sct:
+                img = cv2.cvtColor(np.array(sct.grab(region)), cv2.COLOR_BGRA2BGR)
+        self.recorder.add_frame(stream, img)
+        return img
+    
+    def wait_for_stability(self, max_wait: Optional[float] = None, silent: bool = False) -> bool:
         """
         Wait for board animations to finish by checking frame stability
         
+        Args:
+            max_wait: Thời gian chờ tối đa (mặc định: animation.max_wait_time)
+            silent: If True, don't print logs
+        
         Returns:
             True if board is stable, False if timeout
         """
@@ -205,7 +346,8 @@ class GameBot:
         check_frames = anim_config['stability_check_frames']
         diff_threshold = anim_config['frame_diff_threshold']
         check_interval = anim_config['check_interval']
-        max_wait = anim_config['max_wait_time']
+        if max_wait is None:
+            max_wait = anim_config['max_wait_time']
         
         start_time = time.time()
         previous_frames = []
@@ -236,14 +378,15 @@ class GameBot:
                         break
                 
                 if all_stable:
-                    if self.config['debug']['verbose']:
-                        print(f"✓ Board stable after {time.time() - start_time:.2f}s")
+                    if not silent:
+                        log.debug("✓ Board stable after %.2fs", time.time() - start_time)
                     return True
             
             # Wait before next check
             time.sleep(check_interval)
         
-        print(f"⚠ Stability timeout after {max_wait}s")
+        if not silent:
+            log.warning("⚠ Stability timeout after %ss", max_wait)
         return False
     
     def capture_and_read_board(self) -> Optional[List[List[str]]]:
@@ -258,18 +401,19 @@ class GameBot:
             num_scans = 3
             scan_delay = 0.05  # Delay nhỏ giữa các lần quét (50ms)
             
-            if self.config['debug']['verbose']:
-                print(f"🔍 Quét board {num_scans} lần để tăng độ chính xác...")
+            log.debug("🔍 Quét board %d lần để tăng độ chính xác...", num_scans)
             
             # Lưu kết quả từ các lần quét
             all_boards = []
             
             for scan_num in range(num_scans):
                 # Capture board
-                board_img = self.capture.capture_board()
+                with self.tracer.span("capture", scan=scan_num):
+                    board_img = self.capture.capture_board()
                 
                 # Read board
-                board = self.reader.read_board(board_img)
+                with self.tracer.span("board_reader", scan=scan_num):
+                    board = self.reader.read_board(board_img)
                 
                 if board:
                     all_boards.append(board)
@@ -284,7 +428,7 @@ class GameBot:
                     time.sleep(scan_delay)
             
             if not all_boards:
-                print("✗ Tất cả các lần quét đều thất bại")
+                log.error("✗ Tất cả các lần quét đều thất bại")
                 return None
             
             # Merge kết quả từ các lần quét
@@ -295,8 +439,8 @@ class GameBot:
             total_cells = len(merged_board) * len(merged_board[0])
             accuracy = ((total_cells - unknown_count) / total_cells) * 100
             
-            if self.config['debug']['verbose']:
-                print(f"✓ Độ chính xác sau {len(all_boards)} lần quét: {accuracy:.1f}% ({total_cells - unknown_count}/{total_cells} ô)")
+            log.debug("✓ Độ chính xác sau %d lần quét: %.1f%% (%d/%d ô)",
+                      len(all_boards), accuracy, total_cells - unknown_count, total_cells)
             
             # Debug visualization
             if self.config['debug']['show_board']:
@@ -306,9 +450,7 @@ class GameBot:
             return merged_board
             
         except Exception as e:
-            print(f"✗ Error reading board: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("✗ Error reading board: %s", e)
             return None
     
     def _merge_board_scans(self, boards: List[List[List[str]]]) -> List[List[str]]:
@@ -362,59 +504,106 @@ class GameBot:
             True if move was executed, False otherwise
         """
         try:
-            # Find all valid moves
-            moves = self.logic.find_valid_moves(board)
+            with self.tracer.span("move_generation") as span:
+                # Find all valid moves
+                moves = self.logic.find_valid_moves(board)
+                span.set(moves=len(moves))
             
             if not moves:
-                print("✗ No valid moves found")
+                log.warning("✗ No valid moves found")
                 return False
             
-            if self.config['debug']['verbose']:
-                print(f"Found {len(moves)} valid moves")
+            log.debug("Found %d valid moves", len(moves))
             
-            # Get calculation time limit from config
-            calc_config = self.config.get('calculation', {})
-            max_time = calc_config.get('max_calculation_time', 0.5)
+            # Budget tính toán: theo timer còn lại (nếu có), mặc định max_calculation_time
+            budget = self.time_budget.plan()
+            if budget.remaining is not None:
+                log.debug("⏱ Budget: %.2fs (còn %.1fs, kéo ~%.2fs, rollout x%.2f)",
+                          budget.max_time, budget.remaining, self.time_budget.drag_latency, budget.rollout_scale)
             
             # Evaluate and get best move with time limit
             start_eval = time.time()
-            best_move, score = self.evaluator.get_best_move(moves, board, self.logic, max_time=max_time)
+            with self.tracer.span("evaluate", moves=len(moves), budget=round(budget.max_time, 3),
+                                  speculative=self.speculative is not None) as span, self.eval_slot:
+                evaluations = None
+                if self.eval_client:
+                    evaluations = self.eval_client.evaluate(board, moves,
+                                                            max_time=budget.max_time,
+                                                            deadline=budget.deadline,
+                                                            rollout_scale=budget.rollout_scale,
+                                                            spawn_probabilities=self.logic.spawn_source.probabilities())
+                    span.set(service=evaluations is not None)
+                
+                if evaluations is not None:
+                    best = evaluations[0] if evaluations else None
+                elif self.speculative:
+                    # Dùng lại kết quả đã tính trước trong lượt đối thủ (nếu có)
+                    evaluations = self.speculative.evaluate(board, moves,
+                                                            max_time=budget.max_time,
+                                                            deadline=budget.deadline,
+                                                            rollout_scale=budget.rollout_scale)
+                    best = evaluations[0] if evaluations else None
+                else:
+                    # Giữ cả danh sách (session recorder ghi lại các ứng viên)
+                    evaluations = self.evaluator.evaluate_moves_detailed(moves, board, self.logic,
+                                                                         use_beam_search=True,
+                                                                         max_time=budget.max_time,
+                                                                         deadline=budget.deadline,
+                                                                         rollout_scale=budget.rollout_scale)
+                    best = evaluations[0] if evaluations else None
             eval_time = time.time() - start_eval
             
-            if best_move is None:
-                print("✗ No best move determined")
+            if best is None:
+                log.warning("✗ No best move determined")
                 return False
             
-            # Show move info
-            if self.config['debug']['verbose']:
-                print(f"\n🎯 Best move (score: {score}, eval time: {eval_time:.3f}s):")
-                print(f"  From: {best_move.from_pos}")
-                print(f"  To: {best_move.to_pos}")
-                print(f"  Matches: {len(best_move.matches)}")
+            best_move, score = best.move, best.score
+            
+            if self.recorder.enabled:
+                self.recorder.note(
+                    candidates=[self._move_record(e) for e in (evaluations or [best])[:10]],
+                    chosen=self._move_record(best),
+                    eval_time=round(eval_time, 4),
+                    budget=round(budget.max_time, 3)
+                )
+            
+            # Execute move ngay - log chi tiết để sau khi kéo xong
+            with self.tracer.span("execute_move"):
+                self.controller.execute_move(best_move)
+            self._last_move = best_move
+            self.time_budget.record_drag_latency(self.controller.last_drag_latency)
+            self.move_count += 1
+            self.total_score += score
+            
+            # Show move info (render từ kết quả đã đánh giá, không mô phỏng lại)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("\n🎯 Best move (score: %s, eval time: %.3fs):", score, eval_time)
+                log.debug("  From: %s", best_move.from_pos)
+                log.debug("  To: %s", best_move.to_pos)
+                log.debug("  Matches: %d", len(best_move.matches))
                 
                 # Show detailed breakdown
-                breakdown = self.evaluator.explain_score(best_move, board, self.logic)
-                print(f"  Score breakdown:")
+                breakdown = self.evaluator.explain_score(best_move, board, self.logic, evaluation=best)
+                log.debug("  Score breakdown:")
                 for key, value in breakdown.items():
                     if value > 0:
-                        print(f"    {key}: {value}")
+                        log.debug("    %s: %s", key, value)
             
-            # Execute move
-            self.controller.execute_move(best_move)
-            self.move_count += 1
-            self.total_score += score
-            
-            if self.config['debug']['verbose']:
-                print(f"✓ Move #{self.move_count} executed")
+            log.debug("✓ Move #%d executed", self.move_count)
             
             return True
             
         except Exception as e:
-            print(f"✗ Error in find_and_execute_best_move: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("✗ Error in find_and_execute_best_move: %s", e)
             return False
     
+    @staticmethod
+    def _move_record(evaluation) -> dict:
+        """Move + điểm dạng JSON (cho session recorder)"""
+        move = evaluation.move
+        return {'from': [move.from_pos.row, move.from_pos.col], 'to': [move.to_pos.row, move.to_pos.col],
+                'score': evaluation.score, 'phase': evaluation.phase}
+    
     def run_single_iteration(self) -> bool:
         """
         Run a single bot iteration
@@ -436,52 +625,55 @@ class GameBot:
         Returns:
             True if move executed, False if waiting
         """
+        self.tracer.next_iteration()
+        self.recorder.begin_iteration()
+        
         try:
             # ============================================================
             # BƯỚC 1: KIỂM TRA TIMER (nếu turn detection được bật)
             # ============================================================
             if self.turn_detector:
                 # Chụp game window để kiểm tra timer
-                game_img = self.game_capture.capture_board()
+                timer_read_at = time.time()
+                with self.tracer.span("capture.game_window"):
+                    game_img = self.game_capture.capture_board()
                 
                 # Phát hiện giá trị timer
-                timer_value = self.turn_detector.detect_timer_value(game_img)
+                with self.tracer.span("timer_ocr") as span:
+                    timer_value = self.turn_detector.detect_timer_value(game_img)
+                    span.set(timer=timer_value)
+                self.time_budget.record_timer(timer_value, read_at=timer_read_at)
+                self.recorder.note(timer=timer_value)
                 
                 # --------------------------------------------------------
                 # TRƯỜNG HỢP 1: KHÔNG CÓ TIMER
                 # --------------------------------------------------------
                 if timer_value is None:
-                    if self.config['debug']['verbose']:
-                        print("⏸ Không phát hiện timer - Kiểm tra nút Nhận trong vùng đã set...")
+                    log.debug("⏸ Không phát hiện timer - Kiểm tra nút Nhận trong vùng đã set...",
+                              extra=rate_limited(5))
                     
                     # Kiểm tra xem có config vùng nút Nhận không
                     button_regions = self.config.get('button_regions', {})
                     
                     if not button_regions.get('nhan'):
-                        if self.config['debug']['verbose']:
-                            print("  ⚠️ Chưa config vùng nút Nhận. Chạy GUI để set vùng!")
+                        log.debug("  ⚠️ Chưa config vùng nút Nhận. Chạy GUI để set vùng!", extra=rate_limited(30))
                         return False
                     
                     # Lấy vị trí nút từ config
                     button_pos_config = self.config.get('button_positions', {})
                     if not button_pos_config.get('nhan') or not button_pos_config.get('chien') or not button_pos_config.get('batdau'):
-                        if self.config['debug']['verbose']:
-                            print("  ⚠️ Chưa config đủ vị trí 3 nút. Chạy GUI để set!")
+                        log.debug("  ⚠️ Chưa config đủ vị trí 3 nút. Chạy GUI để set!", extra=rate_limited(30))
                         return False
                     
                     # Chụp vùng nút Nhận
-                    import mss
                     nhan_region = button_regions['nhan']
-                    with mss.mss() as sct:
-                        region_monitor = {
-                            'top': nhan_region['top'],
-                            'left': nhan_region['left'],
-                            'width': nhan_region['width'],
-                            'height': nhan_region['height']
-                        }
-                        screenshot = sct.grab(region_monitor)
-                        nhan_region_img = np.array(screenshot)
-                        nhan_region_img = cv2.cvtColor(nhan_region_img, cv2.COLOR_BGRA2BGR)
+                    region_monitor = {
+                        'top': nhan_region['top'],
+                        'left': nhan_region['left'],
+                        'width': nhan_region['width'],
+                        'height': nhan_region['height']
+                    }
+                    nhan_region_img = self._grab_region(region_monitor, stream='nhan')
                     
                     # Dùng OCR đơn giản để tìm chữ "nhận" trong vùng
                     import pytesseract
@@ -517,96 +709,100 @@ class GameBot:
                     text2 = pytesseract.image_to_string(thresh2, lang='vie', config='--psm 6').lower()
                     text3 = pytesseract.image_to_string(thresh3, lang='vie', config='--psm 6').lower()
                     
-                    print(f"📝 OCR Debug:")
-                    print(f"  Otsu: '{text1.strip()}'")
-                    print(f"  Adaptive: '{text2.strip()}'")
-                    print(f"  High(180): '{text3.strip()}'")
+                    log.debug("📝 OCR Debug:")
+                    log.debug("  Otsu: '%s'", text1.strip())
+                    log.debug("  Adaptive: '%s'", text2.strip())
+                    log.debug("  High(180): '%s'", text3.strip())
                     
                     # Kiểm tra có chữ "nhận" hoặc "nhan" trong bất kỳ kết quả nào
                     combined_text = text1 + ' ' + text2 + ' ' + text3
                     nhan_detected = 'nhận' in combined_text or 'nhan' in combined_text or 'nhân' in combined_text
                     
-                    print(f"🔍 Kết quả phát hiện: {'✓ CÓ nút Nhận' if nhan_detected else '✗ KHÔNG có nút Nhận'}")
+                    log.info("🔍 Kết quả phát hiện: %s", '✓ CÓ nút Nhận' if nhan_detected else '✗ KHÔNG có nút Nhận',
+                             extra=rate_limited(5))
                     
                     if nhan_detected:
                         # ===============================================
                         # CÓ NÚT "NHẬN" → Nhấn chuỗi 3 nút theo vị trí đã set
                         # ===============================================
-                        print("\n🎁 Phát hiện nút 'Nhận' trong vùng đã set - Bắt đầu chuỗi auto-click")
+                        log.info("\n🎁 Phát hiện nút 'Nhận' trong vùng đã set - Bắt đầu chuỗi auto-click")
                         
                         # 1. Nhấn "Nhận"
                         nhan_pos = button_pos_config['nhan']
-                        print(f"  1️⃣ Click 'Nhận' tại ({nhan_pos['x']}, {nhan_pos['y']})")
+                        log.info("  1️⃣ Click 'Nhận' tại (%s, %s)", nhan_pos['x'], nhan_pos['y'])
                         self.state_manager.click_at_position(nhan_pos['x'], nhan_pos['y'])
-                        time.sleep(1.5)
+                        self._wait_for_screen(GameState.MAP)
                         
                         # 2. Nhấn "Chiến"
                         chien_pos = button_pos_config['chien']
-                        print(f"  2️⃣ Click 'Chiến' tại ({chien_pos['x']}, {chien_pos['y']})")
+                        log.info("  2️⃣ Click 'Chiến' tại (%s, %s)", chien_pos['x'], chien_pos['y'])
                         self.state_manager.click_at_position(chien_pos['x'], chien_pos['y'])
-                        time.sleep(1.5)
+                        self._wait_for_screen(GameState.READY)
                         
                         # 3. Nhấn "Bắt đầu"
                         batdau_pos = button_pos_config['batdau']
-                        print(f"  3️⃣ Click 'Bắt đầu' tại ({batdau_pos['x']}, {batdau_pos['y']})")
+                        log.info("  3️⃣ Click 'Bắt đầu' tại (%s, %s)", batdau_pos['x'], batdau_pos['y'])
                         self.state_manager.click_at_position(batdau_pos['x'], batdau_pos['y'])
                         
-                        print("✅ Hoàn thành chuỗi 3 nút → Tiếp tục màn chơi mới\n")
-                        time.sleep(1.5)
+                        log.info("✅ Hoàn thành chuỗi 3 nút → Tiếp tục màn chơi mới\n")
+                        self._wait_for_screen(GameState.PLAYING)
                         return False
                     else:
                         # ===============================================
                         # KHÔNG CÓ NÚT "NHẬN" → Chờ lượt chơi
                         # ===============================================
-                        if self.config['debug']['verbose']:
-                            print("  → Không có nút 'Nhận' trong vùng - Chờ đến lượt chơi")
+                        log.debug("  → Không có nút 'Nhận' trong vùng - Chờ đến lượt chơi", extra=rate_limited(5))
+                        self._speculate()
                         return False
                 
                 # --------------------------------------------------------
                 # TRƯỜNG HỢP 2: CÓ TIMER NHƯNG QUÁ THẤP
                 # --------------------------------------------------------
                 if timer_value < self.min_timer_value:
-                    if self.config['debug']['verbose']:
-                        print(f"⏸ Timer {timer_value}s < {self.min_timer_value}s - Chờ lượt tiếp")
+                    log.debug("⏸ Timer %ss < %ss - Chờ lượt tiếp", timer_value, self.min_timer_value,
+                              extra=rate_limited(2))
+                    self._speculate()
                     return False
                 
                 # --------------------------------------------------------
                 # TRƯỜNG HỢP 3: CÓ TIMER ĐỦ → ĐẾN LƯỢT CHƠI!
                 # --------------------------------------------------------
-                if self.config['debug']['verbose']:
-                    print(f"✓ Timer: {timer_value}s → Đến lượt chơi!")
+                log.debug("✓ Timer: %ss → Đến lượt chơi!", timer_value)
                 
                 # Click nút thẻ bài (nếu đã config)
                 button_pos_config = self.config.get('button_positions', {})
                 if button_pos_config.get('the_bai'):
                     the_bai_pos = button_pos_config['the_bai']
-                    if self.config['debug']['verbose']:
-                        print(f"🃏 Click nút Thẻ Bài tại ({the_bai_pos['x']}, {the_bai_pos['y']})")
+                    log.debug("🃏 Click nút Thẻ Bài tại (%s, %s)", the_bai_pos['x'], the_bai_pos['y'])
                     
                     if self.state_manager:
                         self.state_manager.click_at_position(the_bai_pos['x'], the_bai_pos['y'])
                     else:
                         # Fallback: dùng pyautogui trực tiếp
-                        import pyautogui
-                        pyautogui.click(the_bai_pos['x'], the_bai_pos['y'])
+                        self._click_screen(the_bai_pos['x'], the_bai_pos['y'])
                     
                     time.sleep(0.2)  # Delay nhỏ sau khi click
                 else:
-                    if self.config['debug']['verbose']:
-                        print("⚠️ Chưa config vị trí nút Thẻ Bài - Bỏ qua")
+                    log.debug("⚠️ Chưa config vị trí nút Thẻ Bài - Bỏ qua", extra=rate_limited(30))
             
             # ============================================================
             # BƯỚC 2: ĐỢI BOARD ỔN ĐỊNH
             # ============================================================
-            if not self.wait_for_stability():
+            with self.tracer.span("stability_wait") as span:
+                stable = self.wait_for_stability()
+                span.set(stable=stable)
+            if not stable:
                 return False
             
             # ============================================================
             # BƯỚC 3: ĐỌC BOARD
             # ============================================================
-            board = self.capture_and_read_board()
+            with self.tracer.span("board_read"):
+                board = self.capture_and_read_board()
             if board is None:
                 return False
+            self.recorder.note(board=board)
+            self._observe_spawns(board)
             
             # ============================================================
             # BƯỚC 4: TÍNH TOÁN VÀ THỰC HIỆN NƯỚC ĐI TỐI ƯU
@@ -614,10 +810,74 @@ class GameBot:
             return self.find_and_execute_best_move(board)
             
         except Exception as e:
-            print(f"✗ Lỗi trong run_single_iteration: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("✗ Lỗi trong run_single_iteration: %s", e)
             return False
+        
+        finally:
+            # Ghi spans của iteration này ra file trace
+            self.tracer.flush()
+            self.recorder.end_iteration()
+    
+    def _wait_for_screen(self, target: GameState):
+        """
+        Chờ màn hình tiếp theo của chuỗi Nhận → Chiến → Bắt đầu
+        Click tiếp ngay khi màn hình xuất hiện; hết timeout thì vẫn tiếp tục như cũ
+        
+        Args:
+            target: State cần chờ
+        """
+        start_time = time.time()
+        state = self.state_manager.wait_for_state(target)
+        
+        if state is None:
+            log.warning("  ⚠️ Chưa thấy màn %s sau %.1fs - tiếp tục", target.value, time.time() - start_time)
+        else:
+            log.debug("  ⏱ Màn %s sau %.2fs", target.value, time.time() - start_time)
+    
+    def _speculate(self):
+        """
+        Tính trước nước đi trong lúc chờ (lượt đối thủ)
+        Chỉ đọc board khi board đang ổn định, kết quả được cache theo board hash
+        """
+        spec_config = self.config.get('speculative', {})
+        if not self.speculative or not spec_config.get('enabled', False):
+            return
+        
+        try:
+            # Board đang có animation → bỏ qua lần này
+            if not self.wait_for_stability(max_wait=spec_config.get('stability_wait', 0.5), silent=True):
+                return
+            
+            board = self.capture_and_read_board()
+            if board is None:
+                return
+            self._observe_spawns(board)
+            
+            start_time = time.time()
+            with self.tracer.span("speculate") as span, self.eval_slot:
+                computed = self.speculative.precompute(board, max_time=spec_config.get('max_time', 1.0))
+                span.set(computed=computed)
+            if computed:
+                log.debug("🔮 Đã tính trước board trong %.2fs", time.time() - start_time)
+        
+        except Exception as e:
+            log.warning("⚠ Speculative error: %s", e, extra=rate_limited(10))
+    
+    def _observe_spawns(self, board: List[List[str]]):
+        """
+        Cập nhật thống kê gem rơi xuống từ board ổn định vừa đọc
+        (đủ dữ liệu mới → đẩy trọng số vào spawn sampler của simulation)
+        
+        Args:
+            board: Board vừa đọc
+        """
+        if not self.spawn_estimator:
+            return
+        self.spawn_estimator.observe(board, move=self._last_move, source=id(self))
+        self._last_move = None
+        # Estimator có thể được instance khác cập nhật → apply khi version đổi
+        if self.spawn_estimator.version != self._spawn_version:
+            self._spawn_version = self.spawn_estimator.apply(self.logic.spawn_source)
     
     def _verify_button_at_position(self, game_img: np.ndarray, button_pos: dict, button_type: str) -> bool:
         """
@@ -668,14 +928,13 @@ class GameBot:
             threshold = 0.20
             has_button = color_ratio > threshold
             
-            if self.config['debug']['verbose'] and has_button:
-                print(f"    ✓ Verify: {button_type} có màu đúng tại vị trí ({x}, {y}) - {color_ratio*100:.1f}%")
+            if has_button:
+                log.debug("    ✓ Verify: %s có màu đúng tại vị trí (%d, %d) - %.1f%%", button_type, x, y, color_ratio * 100)
             
             return has_button
             
         except Exception as e:
-            if self.config['debug']['verbose']:
-                print(f"    ⚠ Lỗi verify button: {e}")
+            log.debug("    ⚠ Lỗi verify button: %s", e)
             return False
     
     def run(self, max_iterations: Optional[int] = None):
@@ -685,12 +944,12 @@ class GameBot:
         Args:
             max_iterations: Maximum number of iterations (None for infinite)
         """
-        print("\n" + "="*50)
-        print("🎮 MATCH-3 BOT STARTED")
-        print("="*50)
-        print(f"Press Ctrl+C to stop")
-        print(f"Move mouse to top-left corner for emergency stop")
-        print("="*50 + "\n")
+        log.info("\n" + "="*50)
+        log.info("🎮 MATCH-3 BOT STARTED")
+        log.info("="*50)
+        log.info("Press Ctrl+C to stop")
+        log.info("Move mouse to top-left corner for emergency stop")
+        log.info("="*50 + "\n")
         
         self.running = True
         self.move_count = 0
@@ -701,19 +960,19 @@ class GameBot:
             while self.running:
                 iteration += 1
                 
-                print(f"\n--- Iteration {iteration} ---")
+                log.debug("\n--- Iteration %d ---", iteration)
                 
                 # Run single iteration
                 success = self.run_single_iteration()
                 
                 if not success:
-                    print("⚠ Iteration failed, retrying...")
+                    log.info("⚠ Iteration failed, retrying...", extra=rate_limited(10))
                     time.sleep(1)
                     continue
                 
                 # Check max iterations
                 if max_iterations and iteration >= max_iterations:
-                    print(f"\n✓ Reached max iterations ({max_iterations})")
+                    log.info("\n✓ Reached max iterations (%d)", max_iterations)
                     break
                 
                 # Delay between iterations (2-3 seconds)
@@ -724,12 +983,10 @@ class GameBot:
                 time.sleep(delay)
         
         except KeyboardInterrupt:
-            print("\n\n⏸ Bot stopped by user")
+            log.info("\n\n⏸ Bot stopped by user")
         
         except Exception as e:
-            print(f"\n\n✗ Bot error: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("\n\n✗ Bot error: %s", e)
         
         finally:
             self.stop()
@@ -738,14 +995,31 @@ class GameBot:
         """Stop the bot"""
         self.running = False
         
-        print("\n" + "="*50)
-        print("📊 SESSION SUMMARY")
-        print("="*50)
-        print(f"Total moves: {self.move_count}")
-        print(f"Total score: {self.total_score}")
+        log.info("\n" + "="*50)
+        log.info("📊 SESSION SUMMARY")
+        log.info("="*50)
+        log.info("Total moves: %d", self.move_count)
+        log.info("Total score: %s", self.total_score)
         if self.move_count > 0:
-            print(f"Average score per move: {self.total_score / self.move_count:.1f}")
-        print("="*50)
+            log.info("Average score per move: %.1f", self.total_score / self.move_count)
+        if self.speculative:
+            stats = self.speculative.stats()
+            log.info("Speculative cache: %d hits, %d partial, %d misses (hit rate %.0f%%, reused %.0f%% moves)",
+                     stats['hits'], stats['partial_hits'], stats['misses'],
+                     stats['hit_rate'] * 100, stats['move_reuse_rate'] * 100)
+        if self.eval_client:
+            self.eval_client.close()
+        if not self.shared:
+            # Tracer/evaluator dùng chung do supervisor đóng
+            if self.tracer.enabled:
+                self.tracer.close()
+                log.info("Trace: %s", self.tracer.path)
+            self.evaluator.close()
+        if not self.shared and self.spawn_estimator and self.spawn_estimator.path:
+            self.spawn_estimator.save()
+            log.info("Spawn stats: %d samples → %s", self.spawn_estimator.samples, self.spawn_estimator.path)
+        self.recorder.close()
+        log.info("="*50)
     
     def test_components(self):
         """Test all components individually"""
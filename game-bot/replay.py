@@ -0,0 +1,383 @@
+"""
+Replay Module
+Replays a recorded session headlessly through the real GameBot pipeline
+(reader, turn detector, state manager, evaluator) and diffs the decisions
+against the recording
+"""
+
+import copy
+import json
+import random
+import sys
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from main import GameBot
+from session_recorder import SessionReader
+from bot_logging import get_logger
+
+log = get_logger("replay")
+
+
+class ReplaySource:
+    """
+    Phát lại frames đã ghi theo từng iteration
+    
+    Mỗi iteration: frames của từng stream được trả lần lượt theo đúng thứ tự đã chụp.
+    Bot đòi nhiều frame hơn số đã ghi (vd: chờ ổn định lâu hơn) → lặp lại frame cuối
+    """
+    
+    def __init__(self, reader: SessionReader):
+        self.reader = reader
+        self.pending: Dict[str, deque] = defaultdict(deque)
+        self.last_frame: Dict[str, np.ndarray] = {}
+        
+        # Thống kê
+        self.served = 0
+        self.repeated = 0
+        self.unused = 0
+    
+    def iterations(self) -> Iterator[Tuple[Optional[dict], Dict[str, deque]]]:
+        """
+        Duyệt session theo iteration
+        
+        Yields:
+            (metadata của iteration hoặc None, {stream: deque frames})
+        """
+        frames: Dict[str, deque] = defaultdict(deque)
+        for record in self.reader.records():
+            if record['type'] == 'frame':
+                frames[record['stream']].append(record['frame'])
+            elif record['type'] == 'iteration':
+                yield record, frames
+                frames = defaultdict(deque)
+        if any(frames.values()):
+            yield None, frames  # Iteration cuối bị ngắt trước khi ghi metadata
+    
+    def load(self, frames: Dict[str, deque]):
+        """Nạp frames của iteration sắp chạy"""
+        self.unused += sum(len(queue) for queue in self.pending.values())
+        self.pending = frames
+    
+    def next_frame(self, stream: str, shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Frame tiếp theo của stream
+        
+        Args:
+            stream: Tên stream
+            shape: (height, width) dùng khi stream chưa từng có frame
+        
+        Returns:
+            Ảnh BGR
+        """
+        queue = self.pending.get(stream)
+        if queue:
+            frame = queue.popleft()
+            self.last_frame[stream] = frame
+            self.served += 1
+        elif stream in self.last_frame:
+            frame = self.last_frame[stream]
+            self.repeated += 1
+        else:
+            frame = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+            self.repeated += 1
+        return frame.copy()
+
+
+class ReplayCapture:
+    """Capture đọc từ ReplaySource (cùng interface với ScreenCapture)"""
+    
+    def __init__(self, source: ReplaySource, stream: str, region: dict):
+        self.source = source
+        self.stream = stream
+        self.update_region(region['top'], region['left'], region['width'], region['height'])
+    
+    def capture_board(self) -> np.ndarray:
+        return self.source.next_frame(self.stream, (self.height, self.width))
+    
+    def capture_board_rgb(self) -> np.ndarray:
+        return self.capture_board()[:, :, ::-1].copy()
+    
+    def get_board_dimensions(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+    
+    def update_region(self, top: int, left: int, width: int, height: int):
+        self.top = top
+        self.left = left
+        self.width = width
+        self.height = height
+        self.monitor = {"top": top, "left": left, "width": width, "height": height}
+    
+    def save_screenshot(self, filename: str):
+        pass
+
+
+class StubController:
+    """Controller giả: ghi lại nước đi thay vì kéo chuột"""
+    
+    def __init__(self, drag_latency: float = 0.5):
+        self.drag_latency = drag_latency
+        self.last_drag_latency = None
+        self.moves = []
+    
+    def execute_move(self, move, add_variation: bool = True):
+        self.moves.append(move)
+        self.last_drag_latency = self.drag_latency
+    
+    def estimate_drag_latency(self) -> float:
+        return self.drag_latency
+
+
+class _NoteCollector:
+    """Thay SessionRecorder trong replay: chỉ gom metadata của iteration để so sánh"""
+    
+    enabled = True
+    
+    def __init__(self):
+        self.notes = {}
+        self.finished = None
+    
+    def begin_iteration(self) -> int:
+        self.notes = {}
+        return 0
+    
+    def note(self, **values):
+        self.notes.update(values)
+    
+    def end_iteration(self, **values):
+        self.notes.update(values)
+        self.finished = self.notes
+    
+    def add_frame(self, stream: str, frame: np.ndarray):
+        pass
+    
+    def close(self):
+        pass
+
+
+class ReplayBot(GameBot):
+    """GameBot chạy trên frames đã ghi: không màn hình, không chuột"""
+    
+    def __init__(self, source: ReplaySource, config: dict):
+        self.source = source
+        self.clicks: List[Tuple[int, int]] = []
+        
+        config = copy.deepcopy(config)
+        config.setdefault('recording', {})['enabled'] = False
+        config.setdefault('eval_service', {})['enabled'] = False
+        config.setdefault('tracing', {})['enabled'] = False
+        config.setdefault('spawn_estimator', {})['path'] = ''  # Học lại từ board đã ghi, không ghi đè file thống kê
+        config.setdefault('debug', {})['save_screenshots'] = False
+        config['debug']['show_board'] = False
+        
+        super().__init__(config=config)
+        
+        self.recorder = _NoteCollector()
+        if self.state_manager:
+            self.state_manager.capture = self._make_capture(self.game_window_region, stream='state')
+            self.state_manager.click_at_position = self._record_click
+    
+    def _cleanup_old_screenshots(self):
+        pass
+    
+    def _make_controller(self, screen_config: dict, board_config: dict) -> StubController:
+        return StubController()
+    
+    def _make_capture(self, region: dict, stream: Optional[str] = None) -> ReplayCapture:
+        return ReplayCapture(self.source, stream or 'board', region)
+    
+    def _grab_region(self, region: dict, stream: str) -> np.ndarray:
+        return self.source.next_frame(stream, (region['height'], region['width']))
+    
+    def _click_screen(self, x: int, y: int):
+        self.clicks.append((x, y))
+    
+    def _record_click(self, x: int, y: int, relative: bool = True):
+        self.clicks.append((x, y))
+
+
+class VirtualClock:
+    """
+    Bỏ qua thời gian chờ: time.sleep() không ngủ mà cộng dồn vào time.time()
+    → vòng chờ (ổn định board, chuyển màn) chạy nhanh hơn thời gian thực,
+    còn thời gian tính toán thật vẫn được tính vào budget
+    """
+    
+    def __init__(self):
+        self.offset = 0.0
+        self._real_time = time.time
+        self._real_sleep = time.sleep
+    
+    def time(self) -> float:
+        return self._real_time() + self.offset
+    
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.offset += seconds
+    
+    @contextmanager
+    def installed(self):
+        """Thay time.time/time.sleep trong lúc replay"""
+        time.time, time.sleep = self.time, self.sleep
+        try:
+            yield self
+        finally:
+            time.time, time.sleep = self._real_time, self._real_sleep
+
+
+def _move_key(note: Optional[dict]) -> Optional[tuple]:
+    if not note:
+        return None
+    return (tuple(note['from']), tuple(note['to']))
+
+
+def diff_iteration(recorded: dict, replayed: dict) -> dict:
+    """
+    So sánh metadata của một iteration
+    
+    Args:
+        recorded: Metadata đã ghi
+        replayed: Metadata khi replay
+    
+    Returns:
+        Dictionary các khác biệt (rỗng nếu giống)
+    """
+    diff = {}
+    
+    if recorded.get('timer') != replayed.get('timer'):
+        diff['timer'] = [recorded.get('timer'), replayed.get('timer')]
+    
+    old_board, new_board = recorded.get('board'), replayed.get('board')
+    if old_board != new_board:
+        if old_board and new_board and len(old_board) == len(new_board):
+            cells = [[row, col] for row, (old_row, new_row) in enumerate(zip(old_board, new_board))
+                     for col, (old, new) in enumerate(zip(old_row, new_row)) if old != new]
+            diff['board_cells'] = cells
+        else:
+            diff['board'] = [old_board is not None, new_board is not None]
+    
+    old_move, new_move = _move_key(recorded.get('chosen')), _move_key(replayed.get('chosen'))
+    if old_move != new_move:
+        diff['move'] = [old_move, new_move]
+    
+    return diff
+
+
+def replay_session(session_dir: Optional[str] = None, config: Optional[dict] = None,
+                   budget: Optional[float] = None, seed: int = 0,
+                   limit: Optional[int] = None) -> dict:
+    """
+    Replay một session và so sánh quyết định với bản ghi
+    
+    Args:
+        session_dir: Thư mục session (None = session mới nhất trong recordings/)
+        config: Config dùng khi replay (None = config lưu kèm session)
+        budget: Budget tính toán cố định mỗi lượt (giây), None = như lúc chạy thật
+        seed: Seed random (cộng thêm số iteration) để rollout lặp lại được
+        limit: Số iteration tối đa
+    
+    Returns:
+        Báo cáo: số iteration, số khác biệt, thời gian, danh sách diff
+    """
+    reader = SessionReader(session_dir) if session_dir else SessionReader.latest()
+    config = config or reader.config()
+    if config is None:
+        raise ValueError(f"{reader.session_dir} không có config.json - truyền config vào")
+    
+    source = ReplaySource(reader)
+    bot = ReplayBot(source, config)
+    if budget is not None:
+        # Budget cố định (bỏ qua timer) → kết quả không phụ thuộc tốc độ máy
+        bot.time_budget.enabled = False
+        bot.time_budget.nominal_time = budget
+    
+    clock = VirtualClock()
+    report = {'session': str(reader.session_dir), 'iterations': 0, 'recorded_time': 0.0,
+              'replay_time': 0.0, 'board_mismatches': 0, 'move_mismatches': 0,
+              'timer_mismatches': 0, 'diffs': []}
+    start_time = time.perf_counter()
+    
+    with clock.installed():
+        for meta, frames in source.iterations():
+            if limit is not None and report['iterations'] >= limit:
+                break
+            
+            source.load(frames)
+            random.seed(seed + report['iterations'])
+            bot.logic.spawn_source.seed(seed + report['iterations'])
+            bot.run_single_iteration()
+            
+            report['iterations'] += 1
+            if meta is None:
+                continue
+            report['recorded_time'] += meta.get('duration', 0.0)
+            
+            diff = diff_iteration(meta, bot.recorder.finished or {})
+            if diff:
+                report['board_mismatches'] += 'board' in diff or 'board_cells' in diff
+                report['move_mismatches'] += 'move' in diff
+                report['timer_mismatches'] += 'timer' in diff
+                report['diffs'].append(dict(diff, iteration=meta['iteration']))
+                log.info("≠ Iteration %d: %s", meta['iteration'], diff)
+    
+    report['replay_time'] = round(time.perf_counter() - start_time, 3)
+    report['recorded_time'] = round(report['recorded_time'], 3)
+    report['frames_served'] = source.served
+    report['frames_repeated'] = source.repeated
+    report['frames_unused'] = source.unused
+    report['clicks'] = len(bot.clicks)
+    return report
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Replay session đã ghi (headless) và so sánh quyết định")
+    parser.add_argument('session', nargs='?', help='Thư mục session (mặc định: mới nhất trong recordings/)')
+    parser.add_argument('--config', help='Config YAML thay cho config lưu kèm session')
+    parser.add_argument('--budget', type=float, help='Budget cố định mỗi lượt (giây) để kết quả lặp lại được')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--limit', type=int, help='Số iteration tối đa')
+    parser.add_argument('--report', help='Ghi báo cáo JSON ra file')
+    parser.add_argument('--strict', action='store_true', help='Exit code 1 nếu có khác biệt')
+    args = parser.parse_args()
+    
+    config = None
+    if args.config:
+        import yaml
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+    
+    report = replay_session(args.session, config=config, budget=args.budget,
+                            seed=args.seed, limit=args.limit)
+    
+    print("\n" + "="*50)
+    print("🔁 REPLAY SUMMARY")
+    print("="*50)
+    print(f"Session: {report['session']}")
+    print(f"Iterations: {report['iterations']}")
+    print(f"Board mismatches: {report['board_mismatches']}")
+    print(f"Move mismatches: {report['move_mismatches']}")
+    print(f"Timer mismatches: {report['timer_mismatches']}")
+    speedup = report['recorded_time'] / report['replay_time'] if report['replay_time'] else 0.0
+    print(f"Time: {report['replay_time']:.1f}s replay vs {report['recorded_time']:.1f}s recorded (x{speedup:.1f})")
+    print(f"Frames: {report['frames_served']} served, {report['frames_repeated']} repeated, "
+          f"{report['frames_unused']} unused")
+    print("="*50)
+    
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    mismatches = report['board_mismatches'] + report['move_mismatches'] + report['timer_mismatches']
+    if args.strict and mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
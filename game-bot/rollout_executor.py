@@ -0,0 +1,318 @@
+"""
+Rollout Executor Module
+Chạy song song các rollout cascade của MoveEvaluator:
+- CPython free-threaded (3.13t/3.14t, GIL tắt): thread pool, không tốn spawn process/pickle
+- CPython có GIL: process pool (mỗi process một MatchThreeLogic riêng)
+Mỗi chunk rollout có stream random riêng (seed từ SeedSequence theo board và nội dung chunk)
+nên kết quả không phụ thuộc số worker hay thread nào chạy chunk nào
+"""
+
+import hashlib
+import os
+import sys
+import sysconfig
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from logic import Move, MatchThreeLogic
+from bot_logging import get_logger
+
+log = get_logger("rollout_executor")
+
+# Board nhỏ nên seed lại SpawnSource (~0.3ms) đắt hơn rollout → mỗi chunk nhiều rollout
+WORKER_BLOCK_SIZE = 256
+
+
+def gil_disabled() -> bool:
+    """
+    Interpreter đang chạy không có GIL (build free-threaded và GIL chưa bị bật lại)
+    
+    Returns:
+        True nếu các thread Python chạy song song thật sự
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def free_threaded_build() -> bool:
+    """Interpreter được build với --disable-gil (python3.13t, python3.14t)"""
+    return bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+
+
+@dataclass
+class RolloutJob:
+    """Một move cần thêm rollout"""
+    move: Move
+    first_level: Optional[float]   # Kỳ vọng cascade cấp 1 (MoveEvaluation.first_level)
+    start: int                     # Số rollout move đã có (chỉ số rollout đầu tiên của job)
+    count: int
+
+
+@dataclass
+class _Chunk:
+    """Nhóm job giao cho một worker (picklable để gửi sang process)"""
+    scoring_rules: dict
+    rows: int
+    cols: int
+    board: List[List[str]]
+    probabilities: np.ndarray
+    jobs: List[RolloutJob]
+    seed: int
+    max_depth: int
+
+
+# State riêng của từng worker (thread-local: mỗi thread một bộ; trong process con cũng dùng được)
+_worker_local = threading.local()
+
+
+def _worker_state(chunk: _Chunk):
+    """
+    (evaluator, logic) riêng của worker hiện tại, tạo lần đầu rồi dùng lại
+    
+    Args:
+        chunk: Chunk đang chạy (kích thước board, scoring rules)
+    
+    Returns:
+        (MoveEvaluator, MatchThreeLogic, [phân phối spawn đang dùng])
+    """
+    from evaluator import MoveEvaluator   # Import trễ: evaluator import module này
+    
+    states: Dict[tuple, tuple] = getattr(_worker_local, "states", None)
+    if states is None:
+        states = _worker_local.states = {}
+    
+    key = (chunk.rows, chunk.cols)
+    state = states.get(key)
+    if state is None:
+        evaluator = MoveEvaluator(chunk.scoring_rules, analytic_cascade=False, early_stop=False)
+        logic = MatchThreeLogic(chunk.rows, chunk.cols)
+        logic.spawn_source.block_size = WORKER_BLOCK_SIZE
+        state = states[key] = (evaluator, logic, [None])
+    return state
+
+
+def _run_chunk(chunk: _Chunk) -> List[List[dict]]:
+    """
+    Chạy tất cả rollout của một chunk (hàm module-level để process pool pickle được)
+    
+    Args:
+        chunk: _Chunk
+    
+    Returns:
+        Danh sách rollout cho từng job, theo thứ tự chunk.jobs
+    """
+    evaluator, logic, current_probs = _worker_state(chunk)
+    
+    # Phân phối spawn giống logic của bot (SpawnEstimator có thể đã đổi)
+    if current_probs[0] is None or not np.array_equal(current_probs[0], chunk.probabilities):
+        logic.spawn_source.set_weights(chunk.probabilities)
+        current_probs[0] = chunk.probabilities
+    logic.spawn_source.seed(chunk.seed)
+    
+    results = []
+    for job in chunk.jobs:
+        results.append([evaluator._rollout_cascade(job.move, chunk.board, logic, max_depth=chunk.max_depth,
+                                                   first_level=job.first_level)
+                        for _ in range(job.count)])
+    return results
+
+
+def _warm_up(_index: int) -> int:
+    """Task rỗng để process con import xong các module (và compile kernel) trước lượt đầu"""
+    import evaluator  # noqa: F401
+    import kernels
+    kernels.warm_up()
+    return os.getpid()
+
+
+class RolloutExecutor:
+    """
+    Pool chạy rollout cascade song song cho MoveEvaluator
+    
+    Evaluator gửi batch ~batch_rollouts rollout, batch được chia thành chunk ~chunk_rollouts
+    rollout (cả hai không phụ thuộc số worker).
+    Seed của chunk = SeedSequence(seed, hash board, move đầu tiên, chỉ số rollout đầu tiên, số rollout)
+    → cùng board + cùng jobs cho cùng kết quả, dù chạy thread hay process, trên máy bao nhiêu core;
+    board khác (lượt sau) có stream spawn khác dù swap ở cùng vị trí.
+    """
+    
+    MODES = ("auto", "thread", "process")
+    
+    def __init__(self, mode: str = "auto", workers: int = 0, seed: int = 0,
+                 chunk_rollouts: int = 8, batch_rollouts: int = 64, max_depth: int = 15):
+        """
+        Initialize rollout executor (pool được tạo lần đầu dùng hoặc khi gọi start())
+        
+        Args:
+            mode: "auto" (thread nếu GIL tắt, ngược lại process), "thread" hoặc "process"
+            workers: Số worker (0 = os.cpu_count())
+            seed: Seed gốc cho stream random của các chunk
+            chunk_rollouts: Số rollout tối đa mỗi chunk
+            batch_rollouts: Số rollout mỗi lần evaluator gọi run() (kiểm tra hết giờ giữa các batch)
+            max_depth: Số cấp cascade tối đa mỗi rollout
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"rollout executor mode không hợp lệ: {mode!r} (chọn {', '.join(self.MODES)})")
+        if mode == "auto":
+            mode = "thread" if gil_disabled() else "process"
+        
+        self.mode = mode
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.seed = seed
+        self.chunk_rollouts = max(1, chunk_rollouts)
+        self.batch_rollouts = max(self.chunk_rollouts, batch_rollouts)
+        self.max_depth = max_depth
+        
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        
+        # Thống kê
+        self.batches = 0
+        self.chunks = 0
+        self.rollouts = 0
+    
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["RolloutExecutor"]:
+        """
+        Tạo executor từ mục calculation.parallel_rollouts của config
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            RolloutExecutor đã start() (worker sẵn sàng), hoặc None nếu tắt / chỉ có 1 worker
+        """
+        calc_config = config.get('calculation', {})
+        parallel_config = calc_config.get('parallel_rollouts', {})
+        if not parallel_config.get('enabled', False):
+            return None
+        
+        executor = cls(mode=parallel_config.get('mode', 'auto'),
+                       workers=parallel_config.get('workers', 0),
+                       seed=parallel_config.get('seed', 0),
+                       chunk_rollouts=parallel_config.get('chunk_rollouts', 8),
+                       batch_rollouts=parallel_config.get('batch_rollouts', 64),
+                       max_depth=calc_config.get('cascade_max_depth', 15))
+        if executor.workers <= 1:
+            log.info("⚙️ Parallel rollouts: chỉ có 1 worker → chạy tuần tự")
+            return None
+        executor.start()
+        return executor
+    
+    def describe(self) -> str:
+        """Mô tả ngắn cho log"""
+        gil = "GIL off" if gil_disabled() else ("GIL on, free-threaded build" if free_threaded_build() else "GIL on")
+        return f"{self.mode} pool x{self.workers} ({gil})"
+    
+    def start(self):
+        """Tạo pool và khởi động worker ngay (để lượt đầu không chịu chi phí spawn process)"""
+        pool = self._get_pool()
+        if self.mode == "process":
+            list(pool.map(_warm_up, range(self.workers)))
+        log.info("⚙️ Parallel rollouts: %s", self.describe())
+    
+    def _get_pool(self) -> Executor:
+        """Pool hiện tại (tạo nếu chưa có)"""
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "thread":
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="rollout")
+                else:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+    
+    @staticmethod
+    def _board_key(board: List[List[str]], logic: MatchThreeLogic) -> int:
+        """Hash 64-bit của board (ổn định giữa các process, khác hash() của Python)"""
+        digest = hashlib.blake2b(logic.encode_board(board).tobytes(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+    
+    def _chunk_seed(self, jobs: Sequence[RolloutJob], board_key: int) -> int:
+        """Seed của chunk, chỉ phụ thuộc seed gốc, board và nội dung chunk"""
+        first = jobs[0]
+        key = (first.move.from_pos.row, first.move.from_pos.col,
+               first.move.to_pos.row, first.move.to_pos.col)
+        entropy = [self.seed, board_key, *key, first.start, sum(job.count for job in jobs), len(jobs)]
+        return int(np.random.SeedSequence(entropy).generate_state(1, np.uint64)[0])
+    
+    def _split(self, jobs: List[RolloutJob]) -> List[List[RolloutJob]]:
+        """
+        Chia jobs thành các chunk tối đa chunk_rollouts rollout (job lớn hơn bị cắt nhỏ)
+        
+        Returns:
+            Danh sách chunk (mỗi chunk là list RolloutJob)
+        """
+        chunks: List[List[RolloutJob]] = []
+        current: List[RolloutJob] = []
+        size = 0
+        for job in jobs:
+            start, remaining = job.start, job.count
+            while remaining > 0:
+                take = min(remaining, self.chunk_rollouts - size)
+                current.append(RolloutJob(job.move, job.first_level, start, take))
+                start += take
+                remaining -= take
+                size += take
+                if size >= self.chunk_rollouts:
+                    chunks.append(current)
+                    current, size = [], 0
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def run(self, jobs: List[RolloutJob], board: List[List[str]], scoring_rules: dict,
+            logic: MatchThreeLogic) -> List[List[dict]]:
+        """
+        Chạy rollout cho tất cả jobs, song song theo chunk
+        
+        Args:
+            jobs: Các move cần thêm rollout
+            board: Current board state
+            scoring_rules: MoveEvaluator.rules (worker tạo evaluator riêng)
+            logic: MatchThreeLogic của bot (kích thước board + phân phối spawn)
+        
+        Returns:
+            Danh sách rollout của từng job, theo thứ tự jobs
+        """
+        jobs = [job for job in jobs if job.count > 0]
+        if not jobs:
+            return []
+        
+        probabilities = logic.spawn_source.probabilities()
+        board_copy = [row[:] for row in board]
+        chunks = self._split(jobs)
+        board_key = self._board_key(board, logic)
+        tasks = [_Chunk(scoring_rules=scoring_rules, rows=logic.rows, cols=logic.cols,
+                        board=board_copy, probabilities=probabilities, jobs=chunk,
+                        seed=self._chunk_seed(chunk, board_key), max_depth=self.max_depth)
+                 for chunk in chunks]
+        
+        # Job bị cắt qua nhiều chunk → nối lại theo thứ tự (move, start)
+        pieces: Dict[Tuple[int, int], List[dict]] = {}
+        for task, chunk_results in zip(tasks, self._get_pool().map(_run_chunk, tasks)):
+            for job, rollouts in zip(task.jobs, chunk_results):
+                pieces[(id(job.move), job.start)] = rollouts
+        
+        results = []
+        for job in jobs:
+            rollouts = []
+            while len(rollouts) < job.count:
+                rollouts.extend(pieces[(id(job.move), job.start + len(rollouts))])
+            results.append(rollouts)
+        
+        self.batches += 1
+        self.chunks += len(tasks)
+        self.rollouts += sum(job.count for job in jobs)
+        return results
+    
+    def shutdown(self):
+        """Dừng pool (chờ các chunk đang chạy)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
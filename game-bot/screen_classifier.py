@@ -0,0 +1,204 @@
+"""
+Screen State Classifier Module
+Classifies the game screen (reward/map/ready/playing) by matching small downscaled
+reference snapshots captured during calibration
+"""
+
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bot_logging import get_logger
+
+log = get_logger("screen_classifier")
+
+
+@dataclass
+class ScreenClassification:
+    """Kết quả phân loại một frame"""
+    state: Optional[str]    # Tên state tốt nhất ('reward', 'map', 'ready', 'playing'), None nếu chưa có mẫu
+    confidence: float       # Normalized correlation với mẫu gần nhất (-1..1)
+    margin: float           # Chênh lệch với state đứng thứ 2 (càng lớn càng chắc chắn)
+    confident: bool         # True nếu vượt ngưỡng confidence và margin
+
+
+class ScreenStateClassifier:
+    """
+    Phân loại màn hình game bằng thumbnail grayscale nhỏ
+    
+    - Mỗi state có 1+ ảnh mẫu (chụp khi calibrate), lưu dạng thumbnail đã chuẩn hóa
+    - Frame hiện tại → thumbnail → normalized correlation (tích vô hướng của
+      vector zero-mean, unit-norm) với mọi mẫu: chỉ vài ms
+    - Không đủ chắc chắn (confidence/margin thấp) → caller fallback sang
+      dò nút bằng màu/OCR
+    """
+    
+    def __init__(self, thumbnail_size: Tuple[int, int] = (32, 24),
+                 min_confidence: float = 0.9, min_margin: float = 0.05,
+                 reference_path: str = "screen_states.npz"):
+        """
+        Initialize classifier
+        
+        Args:
+            thumbnail_size: (width, height) của thumbnail
+            min_confidence: Correlation tối thiểu để tin kết quả
+            min_margin: Chênh lệch tối thiểu giữa state tốt nhất và state thứ 2
+            reference_path: File .npz chứa các mẫu
+        """
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.reference_path = Path(reference_path)
+        
+        # Mẫu: ma trận (N, W*H) đã chuẩn hóa + nhãn state tương ứng
+        self.references = np.zeros((0, self.thumbnail_size[0] * self.thumbnail_size[1]), dtype=np.float32)
+        self.labels: List[str] = []
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "ScreenStateClassifier":
+        """
+        Tạo classifier từ game_automation.screen_classifier và load mẫu (nếu có)
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            ScreenStateClassifier
+        """
+        classifier_config = config.get('game_automation', {}).get('screen_classifier', {})
+        classifier = cls(
+            thumbnail_size=(classifier_config.get('thumbnail_width', 32),
+                            classifier_config.get('thumbnail_height', 24)),
+            min_confidence=classifier_config.get('min_confidence', 0.9),
+            min_margin=classifier_config.get('min_margin', 0.05),
+            reference_path=classifier_config.get('references', 'screen_states.npz')
+        )
+        classifier.load()
+        return classifier
+    
+    @property
+    def has_references(self) -> bool:
+        """True nếu đã có mẫu của ít nhất 2 state (cần để tính margin)"""
+        return len(set(self.labels)) >= 2
+    
+    def make_thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Chuyển frame thành vector thumbnail đã chuẩn hóa (zero-mean, unit-norm)
+        
+        Args:
+            frame: Ảnh game window (BGR hoặc grayscale)
+        
+        Returns:
+            Vector float32 độ dài W*H
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        
+        vector = thumb.astype(np.float32).ravel()
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        if norm > 1e-6:
+            vector /= norm
+        return vector
+    
+    def add_reference(self, state: str, frame: np.ndarray):
+        """
+        Thêm một ảnh mẫu cho state
+        
+        Args:
+            state: Tên state (GameState.value)
+            frame: Ảnh game window ở màn hình đó
+        """
+        vector = self.make_thumbnail(frame)
+        self.references = np.vstack([self.references, vector[None, :]])
+        self.labels.append(state)
+    
+    def clear(self, state: Optional[str] = None):
+        """
+        Xóa mẫu (của một state hoặc tất cả)
+        
+        Args:
+            state: State cần xóa, None = xóa hết
+        """
+        if state is None:
+            keep = []
+        else:
+            keep = [i for i, label in enumerate(self.labels) if label != state]
+        self.references = self.references[keep]
+        self.labels = [self.labels[i] for i in keep]
+    
+    def classify(self, frame: np.ndarray) -> ScreenClassification:
+        """
+        Phân loại frame hiện tại
+        
+        Args:
+            frame: Ảnh game window (BGR)
+        
+        Returns:
+            ScreenClassification (state, confidence, margin, confident)
+        """
+        if not self.labels:
+            return ScreenClassification(state=None, confidence=0.0, margin=0.0, confident=False)
+        
+        similarities = self.references @ self.make_thumbnail(frame)
+        
+        # Điểm của mỗi state = mẫu giống nhất của state đó
+        state_scores: Dict[str, float] = {}
+        for label, similarity in zip(self.labels, similarities):
+            if similarity > state_scores.get(label, -2.0):
+                state_scores[label] = float(similarity)
+        
+        ranked = sorted(state_scores.items(), key=lambda item: item[1], reverse=True)
+        best_state, best_score = ranked[0]
+        margin = best_score - ranked[1][1] if len(ranked) > 1 else 0.0
+        
+        confident = (len(ranked) > 1 and best_score >= self.min_confidence
+                     and margin >= self.min_margin)
+        
+        return ScreenClassification(state=best_state, confidence=best_score,
+                                    margin=margin, confident=confident)
+    
+    def save(self, path: Optional[str] = None):
+        """
+        Lưu mẫu ra file .npz
+        
+        Args:
+            path: File output (mặc định: reference_path)
+        """
+        path = Path(path) if path else self.reference_path
+        np.savez_compressed(path,
+                            references=self.references,
+                            labels=np.array(self.labels),
+                            thumbnail_size=np.array(self.thumbnail_size))
+        log.info("💾 Đã lưu %d mẫu màn hình vào: %s", len(self.labels), path)
+    
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Load mẫu từ file .npz
+        
+        Args:
+            path: File input (mặc định: reference_path)
+        
+        Returns:
+            True nếu load thành công
+        """
+        path = Path(path) if path else self.reference_path
+        if not path.exists():
+            return False
+        
+        try:
+            data = np.load(path)
+            thumbnail_size = tuple(int(v) for v in data['thumbnail_size'])
+            if thumbnail_size != self.thumbnail_size:
+                log.warning("⚠ Mẫu màn hình có kích thước %s, khác config %s - bỏ qua",
+                            thumbnail_size, self.thumbnail_size)
+                return False
+            
+            self.references = data['references'].astype(np.float32)
+            self.labels = [str(label) for label in data['labels']]
+            return True
+        except Exception as e:
+            log.warning("⚠ Không load được mẫu màn hình %s: %s", path, e)
+            return False
@@ -0,0 +1,408 @@
+"""
+Session Recorder Module
+Records captured frames and per-iteration decisions into a chunked, compressed
+container (delta-encoded frames, bounded disk usage, background writer thread)
+"""
+
+import io
+import itertools
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from bot_logging import get_logger, rate_limited
+
+log = get_logger("recorder")
+
+FORMAT_VERSION = 1
+
+# Session đang ghi có file ACTIVE_MARKER, writer thread chạm vào file này mỗi HEARTBEAT_INTERVAL giây;
+# marker cũ hơn STALE_AFTER = process đã chết mà chưa kịp close()
+ACTIVE_MARKER = "recording.active"
+HEARTBEAT_INTERVAL = 30.0
+STALE_AFTER = 300.0
+
+# Số thứ tự session trong process (nhiều instance của supervisor cùng một pid)
+_session_counter = itertools.count()
+
+
+class SessionRecorder:
+    """
+    Ghi lại phiên chơi để debug nước đi sai
+    
+    Container: recordings/session_<thời gian>_<pid>_<n>/chunk_00000.zip, chunk_00001.zip, ...
+    - Mỗi chunk là một file zip (deflate) gồm frames (.npy) + meta.json
+    - Frame đầu tiên của mỗi stream trong chunk là keyframe, các frame sau là
+      XOR với frame trước (màn hình tĩnh → gần như toàn số 0 → nén rất nhỏ)
+      → mỗi chunk tự giải mã được, xóa chunk cũ không ảnh hưởng chunk sau
+    - Tổng dung lượng thư mục recordings bị giới hạn bởi max_bytes (xóa chunk cũ nhất của
+      session này hoặc của session đã kết thúc, không đụng tới session đang ghi của instance khác)
+    - Vòng lặp bot chỉ đưa vào queue (không chặn); encode/nén/ghi trong writer thread.
+      Queue đầy → bỏ frame và đếm
+    """
+    
+    def __init__(self, enabled: bool = False, directory: str = "recordings",
+                 chunk_frames: int = 120, keyframe_interval: int = 30,
+                 scale: float = 1.0, max_bytes: int = 500_000_000,
+                 max_queue: int = 256, flush_interval: float = 30.0,
+                 config: Optional[dict] = None):
+        """
+        Initialize recorder
+        
+        Args:
+            enabled: Bật/tắt ghi
+            directory: Thư mục chứa các session
+            chunk_frames: Số frame tối đa mỗi chunk
+            keyframe_interval: Chèn keyframe sau mỗi N frame của một stream
+            scale: Thu nhỏ frame (1.0 = giữ nguyên, cần cho replay; <1 chỉ để xem lại)
+            max_bytes: Tổng dung lượng tối đa của thư mục recordings
+            max_queue: Số item tối đa chờ ghi
+            flush_interval: Ghi chunk dở dang ra đĩa sau mỗi N giây
+            config: Config của bot, lưu kèm session (replay dùng lại)
+        """
+        self.enabled = enabled
+        self.directory = Path(directory)
+        self.chunk_frames = chunk_frames
+        self.keyframe_interval = keyframe_interval
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.config = config
+        
+        self.session_dir: Optional[Path] = None
+        self.iteration = 0
+        self._notes: Dict = {}
+        self._iteration_start = 0.0
+        
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        
+        # State của writer thread
+        self._chunk_index = 0
+        self._chunk_frames: List = []
+        self._chunk_meta: List[dict] = []
+        self._previous: Dict[str, np.ndarray] = {}
+        self._since_key: Dict[str, int] = {}
+        self._last_flush = time.time()
+        self._last_heartbeat = 0.0
+        
+        # Thống kê
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        
+        if enabled:
+            self._start()
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "SessionRecorder":
+        """
+        Tạo recorder từ mục `recording` trong config
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            SessionRecorder
+        """
+        record_config = config.get('recording', {})
+        return cls(
+            enabled=record_config.get('enabled', False),
+            directory=record_config.get('directory', 'recordings'),
+            chunk_frames=record_config.get('chunk_frames', 120),
+            keyframe_interval=record_config.get('keyframe_interval', 30),
+            scale=record_config.get('scale', 1.0),
+            max_bytes=record_config.get('max_bytes', 500_000_000),
+            max_queue=record_config.get('max_queue', 256),
+            flush_interval=record_config.get('flush_interval', 30.0),
+            config=config
+        )
+    
+    def _start(self):
+        """Tạo thư mục session và chạy writer thread"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("session_%Y%m%d_%H%M%S")
+        while True:
+            # Tên riêng cho mỗi recorder (nhiều instance có thể bắt đầu trong cùng một giây)
+            self.session_dir = self.directory / f"{stamp}_{os.getpid()}_{next(_session_counter)}"
+            try:
+                self.session_dir.mkdir(exist_ok=False)
+                break
+            except FileExistsError:
+                continue
+        self._heartbeat()
+        if self.config is not None:
+            with open(self.session_dir / "config.json", 'w', encoding='utf-8') as f:
+                json.dump(self.config, f, ensure_ascii=False, indent=2, default=str)
+        self._thread = threading.Thread(target=self._writer_loop, name="recorder", daemon=True)
+        self._thread.start()
+        log.info("⏺ Recording session → %s", self.session_dir)
+    
+    # ------------------------------------------------------------------
+    # API cho vòng lặp bot (không chặn)
+    # ------------------------------------------------------------------
+    
+    def _put(self, item: tuple):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            log.warning("⚠ Recorder queue full - dropping frames", extra=rate_limited(10))
+    
+    def begin_iteration(self) -> int:
+        """Bắt đầu iteration mới (frames/notes sau đó được gắn số iteration này)"""
+        if not self.enabled:
+            return 0
+        self.iteration += 1
+        self._notes = {}
+        self._iteration_start = time.time()
+        return self.iteration
+    
+    def note(self, **values):
+        """
+        Gắn metadata vào iteration hiện tại (board, candidates, chosen, timings...)
+        Giá trị phải serialize được bằng JSON
+        """
+        if self.enabled:
+            self._notes.update(values)
+    
+    def end_iteration(self, **values):
+        """Kết thúc iteration: đưa metadata vào queue ghi"""
+        if not self.enabled:
+            return
+        self._notes.update(values)
+        meta = {'type': 'iteration', 'iteration': self.iteration, 't': self._iteration_start,
+                'duration': round(time.time() - self._iteration_start, 4)}
+        meta.update(self._notes)
+        self._notes = {}
+        self._put(('meta', meta))
+    
+    def add_frame(self, stream: str, frame: np.ndarray):
+        """
+        Ghi một frame vừa chụp
+        
+        Args:
+            stream: Tên nguồn ('board', 'game', 'state', 'nhan')
+            frame: Ảnh BGR
+        """
+        if not self.enabled:
+            return
+        self.frames += 1
+        self._put(('frame', stream, self.iteration, time.time(), frame.copy()))
+    
+    def close(self):
+        """Ghi nốt dữ liệu còn lại và dừng writer thread"""
+        if not self.enabled or self._thread is None:
+            return
+        self._queue.put(('close',))
+        self._thread.join(timeout=30)
+        self._thread = None
+        (self.session_dir / ACTIVE_MARKER).unlink(missing_ok=True)
+        log.info("⏹ Recording: %d frames, %d dropped, %.1f MB → %s",
+                 self.frames, self.dropped, self.bytes_written / 1e6, self.session_dir)
+    
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    
+    def _writer_loop(self):
+        """Encode và ghi chunk (chạy trong background thread)"""
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+            
+            try:
+                if item is not None:
+                    if item[0] == 'close':
+                        self._flush_chunk()
+                        return
+                    if item[0] == 'meta':
+                        self._chunk_meta.append(item[1])
+                    else:
+                        self._encode_frame(*item[1:])
+                
+                if (len(self._chunk_frames) >= self.chunk_frames
+                        or (self._chunk_meta and time.time() - self._last_flush >= self.flush_interval)):
+                    self._flush_chunk()
+                if time.time() - self._last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self._heartbeat()
+            except Exception as e:
+                log.warning("⚠ Recorder error: %s", e, extra=rate_limited(10))
+    
+    def _encode_frame(self, stream: str, iteration: int, timestamp: float, frame: np.ndarray):
+        """Thu nhỏ (nếu cần) và delta-encode frame so với frame trước cùng stream"""
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        
+        previous = self._previous.get(stream)
+        since_key = self._since_key.get(stream, 0)
+        is_key = (previous is None or previous.shape != frame.shape
+                  or since_key >= self.keyframe_interval)
+        
+        data = frame if is_key else np.bitwise_xor(frame, previous)
+        self._previous[stream] = frame
+        self._since_key[stream] = 0 if is_key else since_key + 1
+        
+        index = len(self._chunk_frames)
+        self._chunk_frames.append(data)
+        self._chunk_meta.append({'type': 'frame', 'index': index, 'stream': stream,
+                                 'iteration': iteration, 't': timestamp, 'key': is_key,
+                                 'scale': self.scale})
+    
+    def _flush_chunk(self):
+        """Ghi chunk hiện tại ra file zip rồi bắt đầu chunk mới"""
+        self._last_flush = time.time()
+        if not self._chunk_frames and not self._chunk_meta:
+            return
+        
+        path = self.session_dir / f"chunk_{self._chunk_index:05d}.zip"
+        tmp_path = path.with_suffix(".tmp")
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            for index, data in enumerate(self._chunk_frames):
+                buffer = io.BytesIO()
+                np.save(buffer, data, allow_pickle=False)
+                archive.writestr(f"frame_{index:05d}.npy", buffer.getvalue())
+            archive.writestr("meta.json", json.dumps({'version': FORMAT_VERSION, 'records': self._chunk_meta},
+                                                     ensure_ascii=False))
+        tmp_path.replace(path)
+        self.bytes_written += path.stat().st_size
+        
+        self._chunk_index += 1
+        self._chunk_frames = []
+        self._chunk_meta = []
+        # Chunk mới phải tự giải mã được → keyframe cho mọi stream
+        self._previous = {}
+        self._since_key = {}
+        
+        self._enforce_disk_limit()
+    
+    def _heartbeat(self):
+        """Đánh dấu session đang ghi (tạo/cập nhật mtime của ACTIVE_MARKER)"""
+        (self.session_dir / ACTIVE_MARKER).write_text(str(os.getpid()), encoding='utf-8')
+        self._last_heartbeat = time.time()
+    
+    def _is_live(self, session_dir: Path) -> bool:
+        """Session của recorder khác vẫn đang ghi (marker còn được cập nhật)"""
+        marker = session_dir / ACTIVE_MARKER
+        try:
+            return time.time() - marker.stat().st_mtime < STALE_AFTER
+        except FileNotFoundError:
+            return False
+    
+    def _enforce_disk_limit(self):
+        """
+        Xóa chunk cũ nhất khi vượt max_bytes: chỉ chunk của session này hoặc của session
+        đã kết thúc (session đang ghi của instance/process khác được giữ nguyên)
+        """
+        chunks = sorted(self.directory.glob("session_*/chunk_*.zip"), key=lambda p: (p.parent.name, p.name))
+        total = sum(chunk.stat().st_size for chunk in chunks)
+        
+        live = {chunk.parent for chunk in chunks
+                if chunk.parent != self.session_dir and self._is_live(chunk.parent)}
+        latest = self.session_dir / f"chunk_{self._chunk_index - 1:05d}.zip"
+        for chunk in chunks:
+            if total <= self.max_bytes:
+                break
+            if chunk.parent in live or chunk == latest:  # Luôn giữ chunk vừa ghi
+                continue
+            total -= chunk.stat().st_size
+            chunk.unlink()
+            if chunk.parent != self.session_dir and not any(chunk.parent.glob("chunk_*.zip")):
+                shutil.rmtree(chunk.parent, ignore_errors=True)
+
+
+class RecordingCapture:
+    """Bọc một capture (ScreenCapture/RegionCapture): mọi frame chụp được đều được ghi lại"""
+    
+    def __init__(self, inner, recorder: SessionRecorder, stream: str):
+        """
+        Args:
+            inner: Capture thật
+            recorder: SessionRecorder
+            stream: Tên stream ghi frame
+        """
+        self.inner = inner
+        self.recorder = recorder
+        self.stream = stream
+    
+    def capture_board(self) -> np.ndarray:
+        frame = self.inner.capture_board()
+        self.recorder.add_frame(self.stream, frame)
+        return frame
+    
+    def save_screenshot(self, filename: str):
+        cv2.imwrite(filename, self.capture_board())
+    
+    def __getattr__(self, name):
+        # monitor, width, height, update_region... → capture thật
+        return getattr(self.inner, name)
+
+
+class SessionReader:
+    """Đọc lại một session đã ghi (dùng cho replay/phân tích)"""
+    
+    def __init__(self, session_dir: str):
+        """
+        Args:
+            session_dir: Thư mục session (recordings/session_...)
+        """
+        self.session_dir = Path(session_dir)
+        self.chunks = sorted(self.session_dir.glob("chunk_*.zip"))
+        if not self.chunks:
+            raise FileNotFoundError(f"Không có chunk nào trong {self.session_dir}")
+    
+    def config(self) -> Optional[dict]:
+        """Config của bot lúc ghi (None nếu không có)"""
+        path = self.session_dir / "config.json"
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def latest(directory: str = "recordings") -> "SessionReader":
+        """Session mới nhất trong thư mục recordings"""
+        sessions = sorted(Path(directory).glob("session_*"))
+        if not sessions:
+            raise FileNotFoundError(f"Không có session nào trong {directory}")
+        return SessionReader(str(sessions[-1]))
+    
+    def records(self) -> Iterator[dict]:
+        """
+        Duyệt toàn bộ records theo thứ tự ghi
+        
+        Yields:
+            dict: record 'iteration' (metadata), hoặc record 'frame' có thêm key 'frame' (ảnh đã giải mã)
+        """
+        for chunk in self.chunks:
+            previous: Dict[str, np.ndarray] = {}
+            with zipfile.ZipFile(chunk) as archive:
+                meta = json.loads(archive.read("meta.json"))
+                for record in meta['records']:
+                    if record['type'] == 'frame':
+                        data = np.load(io.BytesIO(archive.read(f"frame_{record['index']:05d}.npy")))
+                        frame = data if record['key'] else np.bitwise_xor(data, previous[record['stream']])
+                        previous[record['stream']] = frame
+                        record = dict(record, frame=frame)
+                    yield record
+    
+    def iterations(self) -> List[dict]:
+        """Metadata của tất cả iteration (không giải mã frame)"""
+        result = []
+        for chunk in self.chunks:
+            with zipfile.ZipFile(chunk) as archive:
+                meta = json.loads(archive.read("meta.json"))
+                result.extend(record for record in meta['records'] if record['type'] == 'iteration')
+        return result
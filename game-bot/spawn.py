@@ -0,0 +1,523 @@
+"""
+Spawn Source Module
+Pooled random gem stream for cascade simulation: gems are drawn in large
+NumPy blocks (alias table for weighted distributions) instead of one
+random.choice per EMPTY cell
+"""
+
+import json
+import random
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from constants import EMPTY_CODE, SPECIAL_CELLS
+from bot_logging import get_logger
+
+log = get_logger("spawn")
+
+
+def build_alias_table(weights: Sequence[float]):
+    """
+    Alias table (Vose) cho phân phối rời rạc
+    
+    Args:
+        weights: Trọng số từng gem (không cần chuẩn hóa)
+    
+    Returns:
+        (prob, alias): mảng float64 và intp cùng độ dài
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    if n == 0 or weights.min() < 0 or weights.sum() <= 0:
+        raise ValueError(f"Trọng số spawn không hợp lệ: {weights.tolist()}")
+    
+    scaled = weights * n / weights.sum()
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.intp)
+    
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    
+    return prob, alias
+
+
+class _ColumnStream:
+    """Block gems đã random sẵn của một cột (mã gem + tên gem)"""
+    
+    def __init__(self, rng: np.random.Generator, prob: np.ndarray, alias: np.ndarray):
+        self.rng = rng
+        self.prob = prob
+        self.alias = alias
+        self.codes = np.empty(0, dtype=np.int8)
+        self.names: List[str] = []
+        self.cursor = 0
+
+
+class SpawnSource:
+    """
+    Nguồn gem rơi xuống khi simulation cần lấp ô EMPTY
+    
+    - Gems được random theo block lớn (block_size) và refill hàng loạt
+    - Mỗi cột một stream riêng (Generator con từ cùng SeedSequence):
+      cùng seed → cùng chuỗi gems cho từng cột, không phụ thuộc cột khác dùng bao nhiêu
+    - Phân phối có trọng số qua alias table (chung hoặc riêng từng cột)
+    """
+    
+    def __init__(self, gem_types: Sequence[str], cols: int, weights=None,
+                 seed: Optional[int] = None, block_size: int = 4096):
+        """
+        Initialize spawn source
+        
+        Args:
+            gem_types: Danh sách gem có thể rơi (thứ tự = mã gem trong encode_board)
+            cols: Số cột của board
+            weights: None = đều; list trọng số cho mọi cột; hoặc list (cols) các list trọng số
+            seed: Seed (None = lấy từ module random ở lần rút gems đầu tiên, xem seed())
+            block_size: Số gems random mỗi lần refill một cột
+        """
+        self.gem_types = list(gem_types)
+        self.cols = cols
+        self.block_size = block_size
+        self._names = np.array(self.gem_types, dtype=object)
+        self._lock = threading.Lock()
+        
+        self._tables = self._alias_tables(weights)
+        self._probabilities = self._column_probabilities(weights)
+        self.seed(seed)
+        
+        # Thống kê
+        self.refills = 0
+    
+    def _alias_tables(self, weights) -> list:
+        """Alias table cho từng cột"""
+        if weights is None:
+            weights = [1.0] * len(self.gem_types)
+        if len(weights) and np.ndim(weights[0]) == 1:
+            if len(weights) != self.cols:
+                raise ValueError(f"Cần {self.cols} bộ trọng số (mỗi cột một), nhận {len(weights)}")
+            return [build_alias_table(column) for column in weights]
+        table = build_alias_table(weights)
+        return [table] * self.cols
+    
+    def _column_probabilities(self, weights) -> np.ndarray:
+        """Phân phối đã chuẩn hóa của từng cột: mảng (cols, len(gem_types))"""
+        if weights is None:
+            weights = [1.0] * len(self.gem_types)
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim == 1:
+            weights = np.tile(weights, (self.cols, 1))
+        return weights / weights.sum(axis=1, keepdims=True)
+    
+    def probabilities(self) -> np.ndarray:
+        """
+        Xác suất rơi xuống của từng gem theo cột (dùng cho tính kỳ vọng giải tích)
+        
+        Returns:
+            Mảng (cols, len(gem_types)), mỗi hàng tổng = 1
+        """
+        return self._probabilities
+    
+    def seed(self, seed: Optional[int] = None):
+        """
+        Reset tất cả stream theo seed (bỏ các gems đã random sẵn)
+        
+        seed=None: stream chỉ được tạo ở lần rút gems đầu tiên, với seed lấy từ
+        random.getrandbits → random.seed() gọi trước lần rút đó vẫn quyết định chuỗi gems.
+        Sau đó SpawnSource có generator riêng, random.seed() không còn ảnh hưởng
+        → muốn lặp lại simulation thì gọi seed() (với seed cụ thể hoặc None sau random.seed()).
+        
+        Args:
+            seed: Seed mới (None = lấy từ module random khi cần)
+        """
+        with self._lock:
+            self._streams = None if seed is None else self._make_streams(seed)
+    
+    def _make_streams(self, seed: int) -> List[_ColumnStream]:
+        """Mỗi cột một stream (Generator con của cùng SeedSequence)"""
+        children = np.random.SeedSequence(seed).spawn(self.cols)
+        return [_ColumnStream(np.random.default_rng(child), *self._tables[col])
+                for col, child in enumerate(children)]
+    
+    def _active_streams(self) -> List[_ColumnStream]:
+        """Các stream hiện tại, tạo từ module random nếu chưa seed (gọi khi đang giữ _lock)"""
+        if self._streams is None:
+            self._streams = self._make_streams(random.getrandbits(64))
+        return self._streams
+    
+    def set_weights(self, weights):
+        """
+        Đổi phân phối spawn (gems đã random sẵn bị bỏ, stream tiếp tục từ generator hiện tại)
+        
+        Args:
+            weights: Như tham số weights của __init__
+        """
+        tables = self._alias_tables(weights)
+        with self._lock:
+            self._tables = tables
+            self._probabilities = self._column_probabilities(weights)
+            for stream, (prob, alias) in zip(self._streams or [], tables):
+                stream.prob, stream.alias = prob, alias
+                stream.codes = np.empty(0, dtype=np.int8)
+                stream.names = []
+                stream.cursor = 0
+    
+    def _refill(self, stream: _ColumnStream, count: int):
+        """Random block mới (giữ lại phần chưa dùng của block cũ)"""
+        size = max(self.block_size, count)
+        n = len(stream.prob)
+        index = stream.rng.integers(0, n, size=size)
+        codes = np.where(stream.rng.random(size) < stream.prob[index], index, stream.alias[index]).astype(np.int8)
+        
+        stream.codes = np.concatenate([stream.codes[stream.cursor:], codes])
+        stream.names = stream.names[stream.cursor:] + self._names[codes].tolist()
+        stream.cursor = 0
+        self.refills += 1
+    
+    def _reserve(self, col: int, count: int) -> tuple:
+        """Giữ chỗ `count` gems của cột (refill nếu cần) → (stream, start)"""
+        stream = self._active_streams()[col]
+        if stream.cursor + count > len(stream.codes):
+            self._refill(stream, count)
+        start = stream.cursor
+        stream.cursor += count
+        return stream, start
+    
+    def take(self, col: int, count: int) -> List[str]:
+        """
+        Lấy `count` gems tiếp theo của cột
+        
+        Args:
+            col: Cột
+            count: Số gems
+        
+        Returns:
+            List tên gem (theo thứ tự rơi: ô EMPTY trên cùng trước)
+        """
+        with self._lock:
+            stream, start = self._reserve(col, count)
+            return stream.names[start:start + count]
+    
+    def take_codes(self, col: int, count: int) -> np.ndarray:
+        """
+        Như take() nhưng trả mã gem (cho board dạng numpy)
+        
+        Returns:
+            Mảng int8 (count,)
+        """
+        with self._lock:
+            stream, start = self._reserve(col, count)
+            return stream.codes[start:start + count].copy()
+    
+    def code_window(self, count: int) -> np.ndarray:
+        """
+        Xem trước `count` mã gem tiếp theo của mọi cột (chưa lấy, dùng advance() để lấy)
+        
+        Args:
+            count: Số gems mỗi cột
+        
+        Returns:
+            Mảng int8 (cols, count)
+        """
+        window = np.empty((self.cols, count), dtype=np.int8)
+        with self._lock:
+            for col, stream in enumerate(self._active_streams()):
+                if stream.cursor + count > len(stream.codes):
+                    self._refill(stream, count)
+                window[col] = stream.codes[stream.cursor:stream.cursor + count]
+        return window
+    
+    def advance(self, counts: Sequence[int]):
+        """
+        Bỏ qua gems đã dùng từ code_window()
+        
+        Args:
+            counts: Số gems đã dùng của từng cột
+        """
+        with self._lock:
+            for stream, count in zip(self._active_streams(), counts):
+                stream.cursor += int(count)
+    
+    def fill(self, board: List[List[str]]) -> List[List[str]]:
+        """
+        Lấp các ô EMPTY của board (từ trên xuống trong từng cột)
+        
+        Args:
+            board: Board state có các vị trí EMPTY
+        
+        Returns:
+            Board mới với EMPTY được thay bằng gems
+        """
+        new_board = [row[:] for row in board]
+        
+        # Hàng không có EMPTY bị bỏ qua ngay (so sánh trong C)
+        empty_rows = [row for row in new_board if "EMPTY" in row]
+        if not empty_rows:
+            return new_board
+        
+        with self._lock:
+            for col in range(self.cols):
+                targets = [row for row in empty_rows if row[col] == "EMPTY"]
+                if not targets:
+                    continue
+                stream, start = self._reserve(col, len(targets))
+                for row, gem in zip(targets, stream.names[start:start + len(targets)]):
+                    row[col] = gem
+        
+        return new_board
+    
+    def fill_batch(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Vectorized fill cho nhiều board: mỗi cột lấy một lần đủ gems cho mọi board
+        
+        Args:
+            codes: Mảng (N, rows, cols) hoặc (rows, cols) từ encode_board
+        
+        Returns:
+            Mảng mới, ô EMPTY_CODE được thay bằng mã gem
+        """
+        result = np.array(codes, copy=True)
+        empty = result == EMPTY_CODE
+        
+        for col in range(self.cols):
+            column_empty = empty[..., col]
+            count = int(column_empty.sum())
+            if count:
+                column = result[..., col]
+                column[column_empty] = self.take_codes(col, count)
+        
+        return result
+
+
+class SpawnEstimator:
+    """
+    Ước lượng online tần suất gem rơi xuống (thay cho giả định phân phối đều)
+    
+    Giữa hai board ổn định liên tiếp, cột nào có gem bị ăn thì ô hàng trên cùng
+    chắc chắn là gem mới rơi xuống → đếm gem đó. Ô swap của nước đi vừa thực hiện
+    mà không bị ăn chỉ đổi chỗ, không phải gem mới → không tính là thay đổi.
+    Cột chỉ đổi đúng 1 ô (không phải hàng trên cùng) cũng là do swap → bỏ qua.
+    
+    Một estimator có thể dùng chung cho nhiều instance (supervisor): board trước đó
+    được nhớ riêng theo `source`, số đếm/lưu file được bảo vệ bằng lock.
+    
+    Trọng số = số lần đếm + prior chia đều cho các gem đã từng thấy trên board
+    (gem chưa bao giờ xuất hiện có trọng số 0 → rollout không mô phỏng gem không tồn tại).
+    Số đếm được giảm một nửa khi vượt max_samples để theo kịp thay đổi của game.
+    """
+    
+    def __init__(self, gem_types: Sequence[str], prior: float = 8.0, max_samples: int = 5000,
+                 update_interval: int = 10, save_interval: int = 100, path: str = ""):
+        """
+        Initialize spawn estimator
+        
+        Args:
+            gem_types: Danh sách gem (thứ tự trọng số trả về = thứ tự này)
+            prior: Tổng pseudo-count chia đều cho các gem đã thấy
+            max_samples: Tổng số đếm tối đa trước khi giảm một nửa
+            update_interval: Số gem quan sát được giữa 2 lần cập nhật sampler
+            save_interval: Số gem quan sát được giữa 2 lần lưu file
+            path: File JSON lưu thống kê giữa các phiên ('' = không lưu)
+        """
+        self.gem_types = list(gem_types)
+        self.prior = prior
+        self.max_samples = max_samples
+        self.update_interval = update_interval
+        self.save_interval = save_interval
+        self.path = Path(path) if path else None
+        
+        self.counts: Dict[str, float] = {gem: 0.0 for gem in self.gem_types}
+        self.seen = set()
+        self.samples = 0
+        
+        self._last_boards: Dict[Hashable, List[List[str]]] = {}   # Board ổn định trước đó theo source
+        self._pending = 0      # Quan sát chưa đẩy vào sampler
+        self._unsaved = 0      # Quan sát chưa lưu file
+        self._seen_changed = False
+        self._lock = threading.RLock()
+        
+        # Tăng mỗi khi đủ dữ liệu mới cho sampler (mỗi instance tự apply() khi thấy version đổi)
+        self.version = 0
+    
+    @classmethod
+    def from_config(cls, config: dict, gem_types: Sequence[str]) -> Optional["SpawnEstimator"]:
+        """
+        Tạo estimator từ mục spawn_estimator và load thống kê đã lưu
+        
+        Args:
+            config: Full configuration dictionary
+            gem_types: MatchThreeLogic.gem_types
+        
+        Returns:
+            SpawnEstimator, hoặc None nếu tắt
+        """
+        estimator_config = config.get('spawn_estimator', {})
+        if not estimator_config.get('enabled', False):
+            return None
+        
+        estimator = cls(
+            gem_types,
+            prior=estimator_config.get('prior', 8.0),
+            max_samples=estimator_config.get('max_samples', 5000),
+            update_interval=estimator_config.get('update_interval', 10),
+            save_interval=estimator_config.get('save_interval', 100),
+            path=estimator_config.get('path', 'spawn_stats.json')
+        )
+        estimator.load()
+        return estimator
+    
+    def observe(self, board: List[List[str]], move=None, source: Hashable = None) -> bool:
+        """
+        Ghi nhận một board ổn định (so với board ổn định trước đó của cùng source)
+        
+        Args:
+            board: Board vừa đọc
+            move: Move đã thực hiện trên board trước đó (None = không biết / không có)
+            source: Instance gửi board (mỗi instance so với board trước của chính nó)
+        
+        Returns:
+            True nếu nên cập nhật sampler (đủ update_interval quan sát hoặc có gem mới xuất hiện),
+            khi đó version được tăng
+        """
+        with self._lock:
+            if self._observe(board, move, source):
+                self.version += 1
+                self._pending = 0
+                self._seen_changed = False
+                return True
+            return False
+    
+    def _observe(self, board: List[List[str]], move, source: Hashable) -> bool:
+        """observe() khi đang giữ lock"""
+        for row in board:
+            for gem in row:
+                if gem not in self.seen and gem in self.counts:
+                    self.seen.add(gem)
+                    self._seen_changed = True
+        
+        previous = self._last_boards.get(source)
+        self._last_boards[source] = [row[:] for row in board]
+        if previous is None or len(previous) != len(board):
+            return self._seen_changed
+        
+        # Ô swap không bị ăn: gem chỉ đổi chỗ, không phải gem rơi xuống
+        swapped = set()
+        if move is not None:
+            cleared = {(pos.row, pos.col) for match in move.matches for pos in match.positions}
+            swapped = {(pos.row, pos.col) for pos in (move.from_pos, move.to_pos)} - cleared
+        
+        observed = 0
+        for col in range(len(board[0])):
+            changed = [row for row in range(len(board))
+                       if previous[row][col] != board[row][col] and (row, col) not in swapped]
+            if not changed or (len(changed) == 1 and changed[0] != 0):
+                continue
+            
+            top = board[0][col]
+            if top in self.counts and top not in SPECIAL_CELLS:
+                self.counts[top] += 1
+                observed += 1
+        
+        if observed:
+            self.samples += observed
+            self._pending += observed
+            self._unsaved += observed
+            
+            if sum(self.counts.values()) > self.max_samples:
+                self.counts = {gem: count / 2 for gem, count in self.counts.items()}
+            
+            if self.path and self._unsaved >= self.save_interval:
+                self.save()
+        
+        return self._seen_changed or self._pending >= self.update_interval
+    
+    def weights(self) -> List[float]:
+        """
+        Trọng số spawn hiện tại
+        
+        Returns:
+            List trọng số theo thứ tự gem_types (chưa có dữ liệu → phân phối đều)
+        """
+        with self._lock:
+            if not self.seen and not any(self.counts.values()):
+                return [1.0] * len(self.gem_types)
+            
+            prior = self.prior / len(self.seen) if self.seen else 0.0
+            return [self.counts[gem] + (prior if gem in self.seen else 0.0) for gem in self.gem_types]
+    
+    def apply(self, source: SpawnSource) -> int:
+        """
+        Đẩy trọng số hiện tại vào spawn sampler
+        
+        Args:
+            source: SpawnSource của MatchThreeLogic
+        
+        Returns:
+            version của thống kê đã apply
+        """
+        with self._lock:
+            weights = self.weights()
+            version = self.version
+        source.set_weights(weights)
+        
+        total = sum(weights)
+        log.debug("🎲 Spawn distribution (%d samples): %s", self.samples,
+                  ", ".join(f"{gem}={weight / total:.2f}" for gem, weight in zip(self.gem_types, weights) if weight))
+        return version
+    
+    def save(self, path: Optional[str] = None):
+        """
+        Lưu thống kê ra file JSON
+        
+        Args:
+            path: File output (mặc định: self.path)
+        """
+        path = Path(path) if path else self.path
+        if path is None:
+            return
+        
+        with self._lock:
+            data = {'counts': self.counts, 'seen': sorted(self.seen), 'samples': self.samples}
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                self._unsaved = 0
+            except OSError as e:
+                log.warning("⚠ Không lưu được thống kê spawn %s: %s", path, e)
+    
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Load thống kê đã lưu từ phiên trước
+        
+        Args:
+            path: File input (mặc định: self.path)
+        
+        Returns:
+            True nếu load thành công
+        """
+        path = Path(path) if path else self.path
+        if path is None or not path.exists():
+            return False
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                for gem, count in data.get('counts', {}).items():
+                    if gem in self.counts:
+                        self.counts[gem] = float(count)
+                self.seen = {gem for gem in data.get('seen', []) if gem in self.counts}
+                self.samples = int(data.get('samples', 0))
+                self._seen_changed = bool(self.seen)
+            return True
+        except (OSError, ValueError) as e:
+            log.warning("⚠ Không load được thống kê spawn %s: %s", path, e)
+            return False
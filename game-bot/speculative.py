@@ -0,0 +1,267 @@
+"""
+Speculative Evaluation Module
+Pre-evaluates the board during the opponent's turn and caches results by board hash
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from logic import Move, Position, MatchThreeLogic
+from evaluator import MoveEvaluator, MoveEvaluation, move_key
+
+
+class SpeculativeEvaluator:
+    """
+    Đánh giá trước board trong lượt đối thủ (khi máy rảnh)
+    
+    - Kết quả được cache theo board hash
+    - Khi đến lượt mình: trùng board → dùng lại toàn bộ rollout (hit), evaluator chạy thêm
+      trong budget của lượt
+    - Board chỉ khác vài ô → chỉ đánh giá lại các move có vùng phụ thuộc
+      giao với các ô thay đổi (partial hit); các move còn lại giữ nguyên rollout
+      và được evaluator chạy tiếp như kết quả có sẵn (prior)
+    
+    Vùng phụ thuộc của mỗi move được lưu dạng bitmask (bit = row * cols + col)
+    cùng kết quả, nên kiểm tra giao nhau chỉ là một phép AND.
+    """
+    
+    def __init__(self, evaluator: MoveEvaluator, logic: MatchThreeLogic,
+                 max_entries: int = 8, max_changed_cells: int = 16):
+        """
+        Initialize speculative evaluator
+        
+        Args:
+            evaluator: MoveEvaluator dùng để đánh giá
+            logic: MatchThreeLogic instance
+            max_entries: Số board tối đa giữ trong cache (LRU)
+            max_changed_cells: Số ô thay đổi tối đa để còn dùng lại một phần
+        """
+        self.evaluator = evaluator
+        self.logic = logic
+        self.max_entries = max_entries
+        self.max_changed_cells = max_changed_cells
+        
+        # board_key -> (board, {move_key: MoveEvaluation}, {move_key: footprint bitmask})
+        self.cache = OrderedDict()
+        
+        # Thống kê
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.reused_moves = 0
+        self.researched_moves = 0
+        self.precomputed_boards = 0
+    
+    @staticmethod
+    def board_key(board: List[List[str]]) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Board hash key (tuple of tuples, hashable)
+        
+        Args:
+            board: Game board
+        
+        Returns:
+            Hashable key
+        """
+        return tuple(tuple(row) for row in board)
+    
+    @staticmethod
+    def move_key(move: Move) -> Tuple[int, int, int, int]:
+        """Key của move theo vị trí swap"""
+        return move_key(move)
+    
+    def move_footprint(self, move: Move) -> Set[Position]:
+        """
+        Vùng ô mà đánh giá của move phụ thuộc vào:
+        - Các ô trong bán kính 2 (ngang/dọc) quanh 2 ô swap (quyết định match ban đầu)
+        - Với mỗi ô bị ăn: mọi ô phía trên trong cột ±2 đến hàng ô đó + 2
+          (gems rơi xuống và tạo match mới ở cấp cascade đầu)
+        
+        Args:
+            move: Move to check
+        
+        Returns:
+            Set of Position
+        """
+        footprint = set()
+        
+        for pos in (move.from_pos, move.to_pos):
+            for offset in range(-2, 3):
+                footprint.add(Position(pos.row + offset, pos.col))
+                footprint.add(Position(pos.row, pos.col + offset))
+        
+        for match in move.matches:
+            for pos in match.positions:
+                for col in range(pos.col - 2, pos.col + 3):
+                    for row in range(0, pos.row + 3):
+                        footprint.add(Position(row, col))
+        
+        return {pos for pos in footprint if self.logic.is_valid_position(pos)}
+    
+    def footprint_bits(self, move: Move) -> int:
+        """move_footprint dạng bitmask (bit = row * cols + col)"""
+        cols = self.logic.cols
+        bits = 0
+        for pos in self.move_footprint(move):
+            bits |= 1 << (pos.row * cols + pos.col)
+        return bits
+    
+    def _changed_bits(self, old_board: List[List[str]], new_board: List[List[str]]) -> int:
+        """Bitmask các ô khác nhau giữa 2 board"""
+        cols = self.logic.cols
+        bits = 0
+        for row, (old_row, new_row) in enumerate(zip(old_board, new_board)):
+            if old_row != new_row:
+                for col, (old, new) in enumerate(zip(old_row, new_row)):
+                    if old != new:
+                        bits |= 1 << (row * cols + col)
+        return bits
+    
+    def _store(self, board: List[List[str]], evaluations: List[MoveEvaluation]):
+        """Lưu kết quả vào cache (LRU), kèm vùng phụ thuộc của từng move"""
+        key = self.board_key(board)
+        self.cache[key] = ([row[:] for row in board],
+                           {move_key(e.move): e for e in evaluations},
+                           {move_key(e.move): self.footprint_bits(e.move) for e in evaluations})
+        self.cache.move_to_end(key)
+        
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+    
+    def _closest_entry(self, board: List[List[str]]):
+        """
+        Tìm board trong cache gần nhất (ít ô thay đổi nhất)
+        
+        Returns:
+            (key, entry, changed_bits) hoặc (None, None, None)
+        """
+        best = (None, None, None)
+        best_count = None
+        for key, entry in self.cache.items():
+            changed = self._changed_bits(entry[0], board)
+            count = bin(changed).count("1")
+            if count <= self.max_changed_cells and (best_count is None or count < best_count):
+                best = (key, entry, changed)
+                best_count = count
+        return best
+    
+    def precompute(self, board: List[List[str]], max_time: float = 1.0) -> bool:
+        """
+        Đánh giá trước board (gọi trong lượt đối thủ)
+        
+        Args:
+            board: Board ổn định đọc được
+            max_time: Thời gian tối đa cho lần đánh giá trước
+        
+        Returns:
+            True nếu đã đánh giá mới, False nếu board đã có trong cache
+        """
+        key = self.board_key(board)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return False
+        
+        moves = self.logic.find_valid_moves(board)
+        if not moves:
+            return False
+        evaluations = self._evaluate(board, moves, max_time=max_time)
+        self._store(board, evaluations)
+        self.precomputed_boards += 1
+        return True
+    
+    def evaluate(self, board: List[List[str]], moves: List[Move],
+                 max_time: float = 3.0, deadline: Optional[float] = None,
+                 rollout_scale: float = 1.0) -> List[MoveEvaluation]:
+        """
+        Đánh giá moves, dùng lại kết quả đã tính trước nếu có
+        
+        Args:
+            board: Current board state
+            moves: Valid moves trên board
+            max_time: Maximum time in seconds
+            deadline: Thời điểm tuyệt đối phải dừng
+            rollout_scale: Hệ số nhân số rollout
+        
+        Returns:
+            List of MoveEvaluation, sorted (giống evaluate_moves_detailed)
+        """
+        key = self.board_key(board)
+        entry = self.cache.get(key)
+        
+        if entry is not None:
+            # HIT: board giống hệt board đã tính trước → mọi move giữ rollout cũ (prior),
+            # phase 2/3 vẫn chạy thêm rollout trong max_time/deadline/rollout_scale của lượt này
+            cached = entry[1]
+            if all(self.move_key(move) in cached for move in moves):
+                self.hits += 1
+                self.reused_moves += len(moves)
+                prior = {move_key(move): cached[move_key(move)] for move in moves}
+                evaluations = self._evaluate(board, moves, max_time, deadline, rollout_scale, prior=prior)
+                self._store(board, evaluations)
+                return evaluations
+        
+        _, entry, changed = self._closest_entry(board)
+        if entry is None:
+            # MISS: đánh giá đầy đủ
+            self.misses += 1
+            self.researched_moves += len(moves)
+            evaluations = self._evaluate(board, moves, max_time, deadline, rollout_scale)
+            self._store(board, evaluations)
+            return evaluations
+        
+        # PARTIAL HIT: move có vùng phụ thuộc không giao ô thay đổi → giữ kết quả + rollout,
+        # evaluator chỉ chạy rollout mới cho các move bị ảnh hưởng (và thêm cho đủ số rollout)
+        self.partial_hits += 1
+        cached, footprints = entry[1], entry[2]
+        prior = {}
+        
+        for move in moves:
+            mkey = move_key(move)
+            previous = cached.get(mkey)
+            if previous is not None and not (footprints[mkey] & changed):
+                prior[mkey] = previous
+        
+        self.reused_moves += len(prior)
+        self.researched_moves += len(moves) - len(prior)
+        
+        evaluations = self._evaluate(board, moves, max_time, deadline, rollout_scale, prior=prior)
+        self._store(board, evaluations)
+        return evaluations
+    
+    def _evaluate(self, board: List[List[str]], moves: List[Move], max_time: float,
+                  deadline: Optional[float] = None, rollout_scale: float = 1.0,
+                  prior: Optional[Dict[tuple, MoveEvaluation]] = None) -> List[MoveEvaluation]:
+        """Đánh giá bằng MoveEvaluator"""
+        if not moves:
+            return []
+        return self.evaluator.evaluate_moves_detailed(moves, board, self.logic,
+                                                      use_beam_search=True,
+                                                      max_time=max_time,
+                                                      deadline=deadline,
+                                                      rollout_scale=rollout_scale,
+                                                      prior=prior)
+    
+    @property
+    def hit_rate(self) -> float:
+        """Tỉ lệ lượt dùng được cache (hit + partial hit)"""
+        total = self.hits + self.partial_hits + self.misses
+        return (self.hits + self.partial_hits) / total if total else 0.0
+    
+    def stats(self) -> dict:
+        """
+        Thống kê cache
+        
+        Returns:
+            Dictionary với hits, partial_hits, misses, hit_rate, reused/researched moves
+        """
+        total_moves = self.reused_moves + self.researched_moves
+        return {
+            'hits': self.hits,
+            'partial_hits': self.partial_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'precomputed_boards': self.precomputed_boards,
+            'reused_moves': self.reused_moves,
+            'researched_moves': self.researched_moves,
+            'move_reuse_rate': self.reused_moves / total_moves if total_moves else 0.0,
+        }
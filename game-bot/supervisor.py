@@ -0,0 +1,364 @@
+"""
+Bot Supervisor Module
+Runs several game windows from one process: each window gets its own GameBot
+(own screen/game_window regions) while capture, evaluation, OCR and mouse
+input are shared
+"""
+
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import mss
+import numpy as np
+import yaml
+
+from evaluator import MoveEvaluator
+from logic import MatchThreeLogic
+from spawn import SpawnEstimator
+from ui_detector import UIDetector
+from tracing import Tracer, set_tracer
+from bot_logging import ROOT_LOGGER, ConsoleFormatter, StdoutHandler, get_logger, setup_logging
+from main import GameBot
+
+log = get_logger("supervisor")
+
+
+class SharedScreenCapture:
+    """
+    Một phiên chụp màn hình dùng chung cho mọi instance
+    
+    - Chụp 1 lần vùng bao (union) của tất cả các vùng đã đăng ký
+    - Frame được dùng lại cho mọi instance trong `max_age` giây
+      → N cửa sổ đọc board cùng lúc chỉ tốn 1 lần grab
+    - Vùng nằm ngoài union (chưa đăng ký) → grab riêng
+    """
+    
+    def __init__(self, max_age: float = 0.03):
+        """
+        Initialize shared capture
+        
+        Args:
+            max_age: Tuổi tối đa (giây) của frame được dùng lại
+        """
+        self.max_age = max_age
+        self.union: Optional[Dict[str, int]] = None
+        
+        self._lock = threading.Lock()
+        self._local = threading.local()   # mss handle theo thread (mss không dùng chung giữa thread)
+        self._frame: Optional[np.ndarray] = None
+        self._frame_time = 0.0
+        
+        # Thống kê
+        self.grabs = 0
+        self.reuses = 0
+    
+    def register(self, region: dict):
+        """
+        Đăng ký một vùng (mở rộng union)
+        
+        Args:
+            region: {"top", "left", "width", "height"}
+        """
+        bottom = region['top'] + region['height']
+        right = region['left'] + region['width']
+        
+        with self._lock:
+            if self.union is None:
+                self.union = {'top': region['top'], 'left': region['left'],
+                              'width': region['width'], 'height': region['height']}
+            else:
+                top = min(self.union['top'], region['top'])
+                left = min(self.union['left'], region['left'])
+                bottom = max(self.union['top'] + self.union['height'], bottom)
+                right = max(self.union['left'] + self.union['width'], right)
+                self.union = {'top': top, 'left': left, 'width': right - left, 'height': bottom - top}
+            self._frame = None
+    
+    def view(self, top: int, left: int, width: int, height: int) -> "RegionCapture":
+        """
+        Tạo capture cho một vùng (cùng interface với ScreenCapture)
+        
+        Returns:
+            RegionCapture
+        """
+        self.register({'top': top, 'left': left, 'width': width, 'height': height})
+        return RegionCapture(self, top, left, width, height)
+    
+    def _sct(self):
+        """mss handle của thread hiện tại"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        return sct
+    
+    def _contains(self, monitor: dict) -> bool:
+        union = self.union
+        return (union is not None
+                and monitor['top'] >= union['top'] and monitor['left'] >= union['left']
+                and monitor['top'] + monitor['height'] <= union['top'] + union['height']
+                and monitor['left'] + monitor['width'] <= union['left'] + union['width'])
+    
+    def grab(self, monitor: dict) -> np.ndarray:
+        """
+        Ảnh BGR của một vùng màn hình
+        
+        Args:
+            monitor: {"top", "left", "width", "height"}
+        
+        Returns:
+            numpy array (BGR)
+        """
+        with self._lock:
+            if not self._contains(monitor):
+                bgra = np.array(self._sct().grab(monitor))
+                return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
+            
+            now = time.perf_counter()
+            if self._frame is None or now - self._frame_time > self.max_age:
+                self._frame = np.asarray(self._sct().grab(self.union))
+                self._frame_time = now
+                self.grabs += 1
+            else:
+                self.reuses += 1
+            frame = self._frame
+        
+        y = monitor['top'] - self.union['top']
+        x = monitor['left'] - self.union['left']
+        return cv2.cvtColor(frame[y:y + monitor['height'], x:x + monitor['width']], cv2.COLOR_BGRA2BGR)
+
+
+class RegionCapture:
+    """Một vùng của SharedScreenCapture (thay cho ScreenCapture trong GameBot)"""
+    
+    def __init__(self, shared: SharedScreenCapture, top: int, left: int, width: int, height: int):
+        self.shared = shared
+        self.update_region(top, left, width, height)
+    
+    def capture_board(self) -> np.ndarray:
+        """Ảnh BGR của vùng"""
+        return self.shared.grab(self.monitor)
+    
+    def capture_board_rgb(self) -> np.ndarray:
+        """Ảnh RGB của vùng"""
+        return cv2.cvtColor(self.capture_board(), cv2.COLOR_BGR2RGB)
+    
+    def get_board_dimensions(self) -> Tuple[int, int]:
+        """(width, height) của vùng"""
+        return (self.width, self.height)
+    
+    def update_region(self, top: int, left: int, width: int, height: int):
+        """Đổi vùng chụp"""
+        self.top = top
+        self.left = left
+        self.width = width
+        self.height = height
+        self.monitor = {"top": top, "left": left, "width": width, "height": height}
+        self.shared.register(self.monitor)
+    
+    def save_screenshot(self, filename: str):
+        """Lưu ảnh vùng ra file"""
+        cv2.imwrite(filename, self.capture_board())
+
+
+@dataclass
+class SharedResources:
+    """Tài nguyên dùng chung giữa các GameBot trong cùng process"""
+    capture: SharedScreenCapture
+    evaluator: MoveEvaluator
+    ui_detector: UIDetector                 # OCR engine (pytesseract + tìm Tesseract 1 lần)
+    input_lock: threading.Lock              # Chuột: mỗi lần kéo/click giữ lock → không xen kẽ
+    eval_slots: threading.BoundedSemaphore  # Số instance được tính nước đi cùng lúc
+    spawn_estimator: Optional[SpawnEstimator]  # Thống kê gem rơi xuống chung (một file spawn_stats)
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "SharedResources":
+        """
+        Tạo tài nguyên dùng chung từ config gốc
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            SharedResources
+        """
+        supervisor_config = config.get('supervisor', {})
+        return cls(
+            capture=SharedScreenCapture(max_age=supervisor_config.get('capture_max_age', 0.03)),
+            evaluator=MoveEvaluator.from_config(config),
+            ui_detector=UIDetector(config),
+            input_lock=threading.Lock(),
+            eval_slots=threading.BoundedSemaphore(max(1, supervisor_config.get('eval_workers', 1))),
+            spawn_estimator=SpawnEstimator.from_config(
+                config, MatchThreeLogic(config['board']['rows'], config['board']['cols']).gem_types)
+        )
+
+
+def _deep_merge(base: dict, override: dict) -> dict:
+    """Merge override vào bản sao của base (dict lồng nhau được merge đệ quy)"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def instance_configs(config: dict) -> List[Tuple[str, dict]]:
+    """
+    Config của từng instance = config gốc + override trong supervisor.instances
+    
+    Mỗi instance cần ít nhất `screen` và `game_window`; có thể override thêm
+    turn_detection.timer_region, button_positions, button_regions...
+    
+    Args:
+        config: Full configuration dictionary
+    
+    Returns:
+        List (name, config)
+    """
+    base = {key: value for key, value in config.items() if key != 'supervisor'}
+    instances = []
+    
+    for index, override in enumerate(config.get('supervisor', {}).get('instances', []) or []):
+        override = dict(override)
+        name = str(override.pop('name', f"bot{index + 1}"))
+        
+        missing = [key for key in ('screen', 'game_window') if key not in override]
+        if missing:
+            raise ValueError(f"Instance '{name}' thiếu: {', '.join(missing)}")
+        
+        instances.append((name, _deep_merge(base, override)))
+    
+    return instances
+
+
+class BotSupervisor:
+    """
+    Quản lý N GameBot (mỗi cửa sổ game một bot) trong một process
+    
+    Mỗi bot chạy vòng lặp riêng trên một thread; capture, evaluator, OCR và
+    chuột được dùng chung qua SharedResources.
+    """
+    
+    def __init__(self, config_path: str = "config.yaml"):
+        """
+        Initialize supervisor
+        
+        Args:
+            config_path: Config gốc (có mục supervisor.instances)
+        """
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = yaml.safe_load(f)
+        
+        # Logging/tracing cấu hình 1 lần cho cả process, log có tên instance
+        setup_logging(self.config)
+        for handler in logging.getLogger(ROOT_LOGGER).handlers:
+            if isinstance(handler, StdoutHandler):
+                handler.setFormatter(ConsoleFormatter("[%(threadName)s] %(message)s"))
+        self.tracer = set_tracer(Tracer.from_config(self.config))
+        
+        configs = instance_configs(self.config)
+        if not configs:
+            raise ValueError("supervisor.instances trống - cần ít nhất 1 instance")
+        
+        self.shared = SharedResources.from_config(self.config)
+        
+        self.bots = {}
+        for name, instance_config in configs:
+            log.info("🪟 Khởi tạo instance %s (board @ %d,%d)", name,
+                     instance_config['screen']['left'], instance_config['screen']['top'])
+            self.bots[name] = GameBot(config=instance_config, shared=self.shared)
+        
+        self.threads: List[threading.Thread] = []
+    
+    def start(self, max_iterations: Optional[int] = None):
+        """
+        Chạy tất cả instance (mỗi instance một thread)
+        
+        Args:
+            max_iterations: Giới hạn iteration mỗi instance (None = không giới hạn)
+        """
+        for name, bot in self.bots.items():
+            thread = threading.Thread(target=bot.run, kwargs={'max_iterations': max_iterations},
+                                      name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        log.info("🚀 Đã chạy %d instance", len(self.threads))
+    
+    def stop(self, timeout: float = 10.0):
+        """
+        Dừng tất cả instance và chờ thread kết thúc
+        
+        Args:
+            timeout: Thời gian chờ tối đa mỗi thread
+        """
+        for bot in self.bots.values():
+            bot.running = False
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+        self.shared.evaluator.close()
+        estimator = self.shared.spawn_estimator
+        if estimator and estimator.path:
+            estimator.save()
+            log.info("Spawn stats: %d samples → %s", estimator.samples, estimator.path)
+        self.tracer.close()
+    
+    def run(self, max_iterations: Optional[int] = None):
+        """
+        Chạy và chờ đến khi tất cả instance dừng (Ctrl+C để dừng)
+        
+        Args:
+            max_iterations: Giới hạn iteration mỗi instance
+        """
+        self.start(max_iterations)
+        try:
+            while any(thread.is_alive() for thread in self.threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            log.info("\n⏸ Supervisor stopped by user")
+        finally:
+            self.stop()
+            self.print_summary()
+    
+    def print_summary(self):
+        """Tổng kết tất cả instance"""
+        log.info("\n" + "="*50)
+        log.info("📊 SUPERVISOR SUMMARY")
+        log.info("="*50)
+        for name, bot in self.bots.items():
+            log.info("%s: %d moves, score %s", name, bot.move_count, bot.total_score)
+        capture = self.shared.capture
+        total = capture.grabs + capture.reuses
+        if total:
+            log.info("Capture: %d grabs, %d reused (%.0f%%)", capture.grabs, capture.reuses,
+                     capture.reuses / total * 100)
+        log.info("="*50)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Match-3 Bot Supervisor (nhiều cửa sổ game)")
+    parser.add_argument('--config', default='config.yaml', help='Config file path')
+    parser.add_argument('--iterations', type=int, help='Max iterations per instance')
+    args = parser.parse_args()
+    
+    supervisor = BotSupervisor(config_path=args.config)
+    
+    print("\n⏱️  Starting in 3 seconds...")
+    print("📌 Make sure all game windows are visible!")
+    time.sleep(3)
+    
+    supervisor.run(max_iterations=args.iterations)
+
+
+if __name__ == "__main__":
+    main()
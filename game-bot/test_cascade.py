@@ -102,6 +102,15 @@ for key, value in breakdown.items():
     if isinstance(value, (int, float)) and value > 0:
         print(f"   {key:20s}: {value}")
 
+# Breakdown rendered from the evaluation result (no re-simulation)
+print("\n5b. Score breakdown from evaluation result:")
+best_eval = evaluator.get_best_evaluation(moves, test_board, logic, max_time=0.5)
+print(f"   Rollouts: {best_eval.rollouts}, cascade scores: {best_eval.cascade_scores}")
+breakdown = evaluator.explain_score(best_eval.move, test_board, logic, evaluation=best_eval)
+for key, value in breakdown.items():
+    if isinstance(value, (int, float)) and value > 0:
+        print(f"   {key:20s}: {value}")
+
 print("\n" + "="*60)
 print("COMPARISON WITH OLD SYSTEM")
 print("="*60)
@@ -0,0 +1,58 @@
+"""
+Test analytic first-cascade expectation against find_all_matches and Monte Carlo
+"""
+
+import sys
+
+import numpy as np
+import yaml
+
+from board_fixtures import random_board, seeded_logic, stable_board
+from evaluator import MoveEvaluator
+
+print("="*60)
+print("TESTING ANALYTIC FIRST-CASCADE ESTIMATOR")
+print("="*60)
+
+with open('config.yaml', 'r', encoding='utf-8') as f:
+    scoring_rules = yaml.safe_load(f)['scoring']
+
+logic, gem_pool = seeded_logic(3)
+logic.spawn_source.seed(3)
+evaluator = MoveEvaluator(scoring_rules)
+sampler = MoveEvaluator(scoring_rules, analytic_cascade=False)
+estimator = evaluator.first_cascade
+
+
+# 1. Board đã biết hết (xác suất 0/1) → phải bằng đúng điểm của find_all_matches
+print("\n1. Known boards vs find_all_matches...")
+uniform = np.full((logic.cols, len(logic.gem_types)), 1 / len(logic.gem_types))
+mismatches = 0
+for _ in range(500):
+    board = random_board(logic, gem_pool)
+    expected = sum(len(m.positions) * evaluator.get_gem_points(m.gem_type) for m in logic.find_all_matches(board))
+    if abs(estimator.expected_score(board, logic.gem_types, uniform) - expected) > 1e-6:
+        mismatches += 1
+print(f"   {'✓' if mismatches == 0 else '✗'} 500 boards, {mismatches} mismatches")
+
+# 2. Kỳ vọng cấp 1 vs trung bình Monte Carlo (rollout chỉ 1 cấp cascade)
+print("\n2. Analytic vs Monte Carlo (2000 rollouts)...")
+logic.spawn_source.set_weights([3, 1, 1, 1, 1, 2, 0, 0])
+worst = 0.0
+for _ in range(4):
+    board = stable_board(logic, gem_pool)
+    move = logic.find_valid_moves(board)[0]
+    analytic = evaluator._first_cascade_level(move, board, logic)
+    samples = [sampler._rollout_cascade(move, board, logic, max_depth=2)['score'] for _ in range(2000)]
+    stderr = np.std(samples) / np.sqrt(len(samples))
+    z = abs(np.mean(samples) - analytic) / max(stderr, 1e-9)
+    worst = max(worst, z)
+    print(f"   analytic {analytic:6.1f}   monte carlo {np.mean(samples):6.1f} ± {stderr:.1f}")
+print(f"   {'✓' if worst < 4 else '✗'} max deviation {worst:.1f} stderr")
+
+print("\n" + "="*60)
+if mismatches or worst >= 4:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
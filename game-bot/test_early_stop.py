@@ -0,0 +1,53 @@
+"""
+Test early stopping: Student-t quantile, variance floor of the confidence bounds
+"""
+
+import sys
+
+from logic import Direction, Move, Position
+from evaluator import MoveEvaluation, t_quantile
+
+print("="*60)
+print("TESTING EARLY STOP")
+print("="*60)
+
+failed = False
+
+print("\n1. Student-t quantiles match reference tables...")
+# (p, df) → giá trị tra bảng
+reference = {(0.95, 1): 6.3138, (0.95, 2): 2.9200, (0.95, 3): 2.3534, (0.95, 4): 2.1318,
+             (0.95, 9): 1.8331, (0.975, 2): 4.3027, (0.975, 3): 3.1824, (0.99, 4): 3.7469}
+errors = {key: abs(t_quantile(*key) - value) / value for key, value in reference.items()}
+worst = max(errors, key=errors.get)
+if errors[worst] > 0.005:
+    print(f"   ✗ t{worst} = {t_quantile(*worst):.4f}, expected {reference[worst]}")
+    failed = True
+else:
+    print(f"   ✓ Max relative error {errors[worst]:.2%}")
+
+print("\n2. Confidence bounds use t with n - 1 degrees of freedom...")
+move = Move(Position(0, 0), Position(0, 1), Direction.RIGHT, [])
+evaluation = MoveEvaluation(move, score=0, immediate_score=50, cascade_scores=[0, 30, 60])
+lower, upper = evaluation.confidence_bounds(0.95)
+expected = t_quantile(0.95, 2) * (900 / 3) ** 0.5
+if abs((upper - lower) / 2 - expected) > 1e-9 or abs((upper + lower) / 2 - 80) > 1e-9:
+    print(f"   ✗ Bounds ({lower:.2f}, {upper:.2f}), expected 80 ± {expected:.2f}")
+    failed = True
+else:
+    print(f"   ✓ 80 ± {expected:.2f}")
+
+print("\n3. Identical rollouts still leave a margin (variance floor)...")
+identical = MoveEvaluation(move, score=0, cascade_scores=[40, 40, 40])
+lower, upper = identical.confidence_bounds(0.95, variance_floor=100.0)
+no_floor = identical.confidence_bounds(0.95)
+if not lower < 40 < upper or no_floor != (40.0, 40.0):
+    print(f"   ✗ Bounds ({lower:.2f}, {upper:.2f}) with floor, {no_floor} without")
+    failed = True
+else:
+    print(f"   ✓ 40 ± {(upper - lower) / 2:.2f}")
+
+print("\n" + "="*60)
+if failed:
+    print("✗ EARLY STOP TESTS FAILED")
+    sys.exit(1)
+print("✓ ALL EARLY STOP TESTS PASSED")
@@ -0,0 +1,66 @@
+"""
+Test vectorized move features against the scalar heuristics in evaluator.py
+"""
+
+import sys
+import time
+
+import yaml
+
+from board_fixtures import random_board, seeded_logic
+from evaluator import MoveEvaluator
+from feature_extractor import MoveFeatureExtractor, FEATURES
+
+print("="*60)
+print("TESTING FEATURE EXTRACTOR")
+print("="*60)
+
+with open("config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+logic, gem_pool = seeded_logic(5)
+evaluator = MoveEvaluator(config['scoring'])
+extractor = MoveFeatureExtractor(evaluator.get_gem_points)
+
+
+def scalar_features(move, board) -> list:
+    """Các heuristic tính từng move (cách cũ), cùng thứ tự FEATURES"""
+    immediate = evaluator._evaluate_immediate(move, board)
+    return [immediate.immediate_score, immediate.immediate_gems, immediate.immediate_yellow,
+            evaluator._calculate_chain_potential(move, board, logic),
+            evaluator._calculate_setup_bonus(move, board, logic),
+            evaluator._calculate_position_bonus(move, logic),
+            evaluator._calculate_cascade_bonus_simple(move, board)]
+
+
+print(f"\n1. Comparing {len(FEATURES)} features with the scalar heuristics...")
+boards = [random_board(logic, gem_pool, special_rate=0.05) for _ in range(200)]
+cases = [(board, logic.find_valid_moves(board)) for board in boards]
+
+vector_time = scalar_time = 0.0
+mismatches = total = 0
+for board, moves in cases:
+    start = time.perf_counter()
+    features = extractor.extract(moves, board, logic)
+    vector_time += time.perf_counter() - start
+    
+    start = time.perf_counter()
+    expected = [scalar_features(move, board) for move in moves]
+    scalar_time += time.perf_counter() - start
+    
+    for row, reference in zip(features.tolist(), expected):
+        total += 1
+        if row != reference:
+            mismatches += 1
+print(f"   {'✓' if mismatches == 0 else '✗'} {total} moves, {mismatches} mismatches")
+
+print("\n2. Timing (per board)...")
+print(f"   scalar:     {scalar_time / len(cases) * 1000:.2f} ms")
+print(f"   vectorized: {vector_time / len(cases) * 1000:.2f} ms")
+
+print("\n" + "="*60)
+if mismatches:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
@@ -0,0 +1,82 @@
+"""
+Test gravity tables (scalar + vectorized) against the column-scan reference
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from board_fixtures import random_board, seeded_logic
+from logic import Position
+
+print("="*60)
+print("TESTING GRAVITY TABLES")
+print("="*60)
+
+logic, gem_pool = seeded_logic(7)
+
+
+def random_removed() -> set:
+    """Random removed positions (~15% of cells)"""
+    return {Position(row, col) for row in range(logic.rows) for col in range(logic.cols)
+            if random.random() < 0.15}
+
+
+def reference_gravity(board: list, removed_positions: set) -> list:
+    """Column scan (cách cũ): LOCKED bị coi như ô trống"""
+    new_board = [row[:] for row in board]
+    for pos in removed_positions:
+        new_board[pos.row][pos.col] = "EMPTY"
+    for col in range(logic.cols):
+        gems = [new_board[row][col] for row in range(logic.rows - 1, -1, -1)
+                if new_board[row][col] not in ["EMPTY", "LOCKED"]]
+        gems += ["EMPTY"] * (logic.rows - len(gems))
+        for i, gem in enumerate(gems):
+            new_board[logic.rows - 1 - i][col] = gem
+    return new_board
+
+
+cases = [(random_board(logic, gem_pool, special_rate=0.05), random_removed()) for _ in range(500)]
+
+# 1. Scalar
+print("\n1. Comparing simulate_gravity with reference...")
+mismatches = sum(1 for board, removed in cases
+                 if logic.simulate_gravity(board, removed) != reference_gravity(board, removed))
+print(f"   {'✓' if mismatches == 0 else '✗'} {len(cases)} boards, {mismatches} mismatches")
+
+# 2. Vectorized
+print("\n2. Comparing simulate_gravity_batch...")
+codes = np.stack([logic.encode_board(board) for board, _ in cases])
+removed_mask = np.zeros(codes.shape, dtype=bool)
+for index, (_, removed) in enumerate(cases):
+    for pos in removed:
+        removed_mask[index, pos.row, pos.col] = True
+batch = logic.simulate_gravity_batch(codes, removed_mask)
+batch_mismatches = sum(1 for (board, removed), result in zip(cases, batch)
+                       if logic.decode_board(result) != reference_gravity(board, removed))
+print(f"   {'✓' if batch_mismatches == 0 else '✗'} {batch_mismatches} mismatches")
+
+# 3. Timing
+print("\n3. Timing (8x8)...")
+board, removed = cases[0]
+for name, func in [("reference", lambda: reference_gravity(board, removed)),
+                   ("simulate_gravity", lambda: logic.simulate_gravity(board, removed))]:
+    start = time.perf_counter()
+    for _ in range(2000):
+        func()
+    print(f"   {name:20s}: {(time.perf_counter() - start) / 2000 * 1000:.4f} ms")
+
+many_codes = np.repeat(codes, 10, axis=0)
+many_removed = np.repeat(removed_mask, 10, axis=0)
+start = time.perf_counter()
+logic.simulate_gravity_batch(many_codes, many_removed)
+print(f"   batch ({len(many_codes)} boards): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+print("\n" + "="*60)
+if mismatches or batch_mismatches:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
@@ -0,0 +1,85 @@
+"""
+Test cascade kernels against MatchThreeLogic (same spawn seed → same rollouts)
+"""
+
+import sys
+
+import numpy as np
+import yaml
+
+from board_fixtures import random_board, seeded_logic
+import kernels
+from evaluator import MoveEvaluator
+
+print("="*60)
+print(f"TESTING CASCADE KERNELS (backend: {kernels.BACKEND})")
+print("="*60)
+
+with open("config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+logic, gem_pool = seeded_logic(11)
+
+
+# 1. Match scan
+print("\n1. scan_matches vs find_all_matches...")
+scan_mismatches = 0
+for _ in range(500):
+    board = random_board(logic, gem_pool, special_rate=0.03)
+    codes = logic.encode_board(board)
+    removed = np.zeros(codes.shape, dtype=bool)
+    runs = np.empty((codes.size * 2, 2), dtype=np.int64)
+    count = kernels.scan_matches(codes, removed, runs)
+    matches = logic.find_all_matches(board)
+    expected = [(logic.gem_codes[m.gem_type], m.length) for m in matches]
+    expected_removed = {(p.row, p.col) for p in logic.get_affected_gems(matches)}
+    if [tuple(run) for run in runs[:count].tolist()] != expected or \
+            set(zip(*np.nonzero(removed))) != expected_removed:
+        scan_mismatches += 1
+print(f"   {'✓' if scan_mismatches == 0 else '✗'} {scan_mismatches} mismatches")
+
+# 2. Full rollouts
+print("\n2. Rollouts (kernel vs MatchThreeLogic, same seed)...")
+reference = MoveEvaluator(config['scoring'], jit_kernels=False)
+jitted = MoveEvaluator(config['scoring'], jit_kernels=False)
+jitted.kernel = kernels.CascadeKernel(jitted.get_gem_points)   # Ép dùng kernel (kể cả không có numba)
+
+rollout_mismatches = 0
+total = 0
+for case in range(40):
+    board = random_board(logic, gem_pool, special_rate=0.03)
+    moves = logic.find_valid_moves(board)
+    for index, move in enumerate(moves[:5]):
+        first_level = None if index % 2 else 123.4
+        logic.spawn_source.seed(case * 100 + index)
+        expected = [reference._rollout_cascade(move, board, logic, first_level=first_level) for _ in range(3)]
+        logic.spawn_source.seed(case * 100 + index)
+        actual = [jitted._rollout_cascade(move, board, logic, first_level=first_level) for _ in range(3)]
+        total += 1
+        if actual != expected:
+            rollout_mismatches += 1
+print(f"   {'✓' if rollout_mismatches == 0 else '✗'} {total} moves x 3 rollouts, {rollout_mismatches} mismatches")
+
+# 3. Shallow max_depth
+print("\n3. max_depth 1..3...")
+depth_mismatches = 0
+board = random_board(logic, gem_pool, special_rate=0.03)
+for move in logic.find_valid_moves(board)[:10]:
+    for depth in (1, 2, 3):
+        logic.spawn_source.seed(depth)
+        expected = reference._rollout_cascade(move, board, logic, max_depth=depth)
+        logic.spawn_source.seed(depth)
+        if jitted._rollout_cascade(move, board, logic, max_depth=depth) != expected:
+            depth_mismatches += 1
+print(f"   {'✓' if depth_mismatches == 0 else '✗'} {depth_mismatches} mismatches")
+
+# 4. Warm-up
+print("\n4. Warm-up...")
+print(f"   {kernels.warm_up():.2f}s (0 = không có numba hoặc đã warm-up)")
+
+print("\n" + "="*60)
+if scan_mismatches or rollout_mismatches or depth_mismatches:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
@@ -0,0 +1,72 @@
+"""
+Test parallel rollouts: same results for thread/process pools and any worker count
+"""
+
+import sys
+import time
+
+import yaml
+
+from board_fixtures import seeded_logic, stable_board
+from evaluator import MoveEvaluator, move_key
+from rollout_executor import RolloutExecutor, RolloutJob, gil_disabled, free_threaded_build
+
+print("="*60)
+print("TESTING ROLLOUT EXECUTOR")
+print("="*60)
+print(f"GIL disabled: {gil_disabled()}, free-threaded build: {free_threaded_build()}")
+
+with open("config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+logic, gem_pool = seeded_logic(8)
+
+# Đủ nhiều moves (> 15) để chạy cả 3 pha
+board = stable_board(logic, gem_pool, min_moves=16)
+moves = logic.find_valid_moves(board)
+
+
+def evaluate(executor) -> tuple:
+    """(kết quả theo move, thời gian) với executor cho trước"""
+    evaluator = MoveEvaluator(config['scoring'], executor=executor)
+    start = time.perf_counter()
+    evaluations = evaluator.evaluate_moves_detailed(moves, board, logic, max_time=60)
+    elapsed = time.perf_counter() - start
+    evaluator.close()
+    return [(move_key(e.move), e.score, e.cascade_scores) for e in evaluations], elapsed
+
+
+# 1. Serial baseline
+print(f"\n1. Serial ({len(moves)} moves)...")
+_, serial_time = evaluate(None)
+print(f"   {serial_time * 1000:.1f} ms")
+
+# 2. Pools
+print("\n2. Thread / process pools...")
+results = {}
+for mode in ("thread", "process"):
+    for workers in (2, 4):
+        executor = RolloutExecutor(mode=mode, workers=workers)
+        executor.start()
+        results[mode, workers], elapsed = evaluate(executor)
+        print(f"   {mode:7s} x{workers}: {elapsed * 1000:.1f} ms, "
+              f"{executor.rollouts} rollouts in {executor.chunks} chunks")
+
+reference = results["thread", 2]
+different = [name for name, result in results.items() if result != reference]
+print(f"\n   {'✓' if not different else '✗'} identical results: {not different} {different or ''}")
+
+# 3. Lượt sau (board khác) không được lặp lại stream spawn của cùng vị trí swap
+print("\n3. Chunk seeds depend on the board...")
+next_board = stable_board(logic, gem_pool)
+jobs = [RolloutJob(moves[0], None, 0, 8)]
+seeds = {executor._chunk_seed(jobs, executor._board_key(b, logic)) for b in (board, next_board, board)}
+reseeded = len(seeds) == 2
+print(f"   {'✓' if reseeded else '✗'} same board → same seed, next board → new seed")
+
+print("\n" + "="*60)
+if different or not reseeded:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
@@ -0,0 +1,68 @@
+"""
+Test SpawnEstimator: spawn counting around the executed move, shared use by several instances
+"""
+
+import sys
+
+from logic import MatchThreeLogic
+from spawn import SpawnEstimator
+
+print("="*60)
+print("TESTING SPAWN ESTIMATOR")
+print("="*60)
+
+logic = MatchThreeLogic(rows=4, cols=3)
+R, G, B, Y, P = "RED_FIRE", "GREEN_HEART", "BLUE_LIGHTNING", "YELLOW_STAR", "PURPLE_MOON"
+failed = False
+
+# Swap ngang ở hàng 0: cột 1 ăn 3 gems (1 gem mới lộ ra ở hàng trên cùng),
+# cột 0 chỉ nhận gem swap sang (không bị ăn, không phải gem rơi xuống)
+before = [[G, R, B],
+          [B, G, Y],
+          [Y, G, B],
+          [B, Y, G]]
+after = [[R, P, B],
+         [B, P, Y],
+         [Y, Y, B],
+         [B, Y, G]]
+move = next(m for m in logic.find_valid_moves(before)
+            if {(m.from_pos.row, m.from_pos.col), (m.to_pos.row, m.to_pos.col)} == {(0, 0), (0, 1)})
+
+print("\n1. Swapped-in gem in row 0 is not counted as a spawn...")
+estimator = SpawnEstimator(logic.gem_types)
+estimator.observe(before)
+estimator.observe(after, move=move)
+counted = {gem: count for gem, count in estimator.counts.items() if count}
+if counted != {P: 1.0}:
+    print(f"   ✗ Counted {counted}, expected only {P}")
+    failed = True
+else:
+    print(f"   ✓ 1 spawn ({P})")
+
+print("\n2. Shared estimator compares each source with its own previous board...")
+shared = SpawnEstimator(logic.gem_types)
+shared.observe(before, source="a")
+shared.observe(after, source="b")          # Board đầu tiên của b → chưa có gì để so
+shared.observe(after, move=move, source="a")
+if shared.samples != 1:
+    print(f"   ✗ {shared.samples} samples, expected 1")
+    failed = True
+else:
+    print("   ✓ Boards of other instances are not mixed in")
+
+print("\n3. Version changes when the sampler should be updated...")
+version = shared.version
+for _ in range(shared.update_interval):
+    shared.observe(before, source="a")
+    shared.observe(after, move=move, source="a")
+if shared.version == version:
+    print("   ✗ Version unchanged")
+    failed = True
+else:
+    print(f"   ✓ Version {version} → {shared.version}")
+
+print("\n" + "="*60)
+if failed:
+    print("✗ SPAWN ESTIMATOR TESTS FAILED")
+    sys.exit(1)
+print("✓ ALL SPAWN ESTIMATOR TESTS PASSED")
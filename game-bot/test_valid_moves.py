@@ -0,0 +1,61 @@
+"""
+Test fast valid-move detection (bitmask + vectorized) against find_valid_moves
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from board_fixtures import random_board, seeded_logic
+
+print("="*60)
+print("TESTING FAST VALID-MOVE DETECTION")
+print("="*60)
+
+logic, gem_pool = seeded_logic(42)
+boards = [random_board(logic, gem_pool[:random.choice([3, 4, 6])], special_rate=0.05) for _ in range(500)]
+
+# 1. Scalar API phải khớp với find_valid_moves
+print("\n1. Comparing has_valid_move / count_valid_moves with find_valid_moves...")
+mismatches = 0
+for board in boards:
+    expected = len(logic.find_valid_moves(board))
+    if logic.count_valid_moves(board) != expected or logic.has_valid_move(board) != (expected > 0):
+        mismatches += 1
+print(f"   {'✓' if mismatches == 0 else '✗'} {len(boards)} boards, {mismatches} mismatches")
+
+# 2. Vectorized API
+print("\n2. Comparing count_valid_moves_batch...")
+codes = np.stack([logic.encode_board(board) for board in boards])
+batch_counts = logic.count_valid_moves_batch(codes)
+batch_mismatches = sum(
+    1 for board, count in zip(boards, batch_counts) if count != logic.count_valid_moves(board)
+)
+print(f"   {'✓' if batch_mismatches == 0 else '✗'} {batch_mismatches} mismatches")
+dead = int((~logic.has_valid_move_batch(codes)).sum())
+print(f"   Dead boards: {dead}/{len(boards)}")
+
+# 3. Timing
+print("\n3. Timing (8x8, 6 gem types)...")
+board = random_board(logic, gem_pool, special_rate=0.05)
+for name, func in [("find_valid_moves", lambda: logic.find_valid_moves(board)),
+                   ("count_valid_moves", lambda: logic.count_valid_moves(board)),
+                   ("has_valid_move", lambda: logic.has_valid_move(board))]:
+    start = time.perf_counter()
+    for _ in range(200):
+        func()
+    print(f"   {name:20s}: {(time.perf_counter() - start) / 200 * 1000:.3f} ms")
+
+many = np.repeat(codes, 10, axis=0)
+start = time.perf_counter()
+logic.count_valid_moves_batch(many)
+print(f"   batch ({len(many)} boards): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+print("\n" + "="*60)
+if mismatches or batch_mismatches:
+    print("TEST FAILED!")
+    sys.exit(1)
+print("TEST COMPLETED!")
+print("="*60)
@@ -0,0 +1,116 @@
+"""
+Test value model: features, fit/predict, save/load and phase 1 ranking in MoveEvaluator
+"""
+
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+import yaml
+
+from board_fixtures import seeded_logic, stable_board
+from evaluator import MoveEvaluator, move_key
+from value_model import ValueFeatures, ValueModel, VALUE_FEATURES
+
+print("="*60)
+print("TESTING VALUE MODEL")
+print("="*60)
+
+with open("config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+logic, gem_pool = seeded_logic(11)
+evaluator = MoveEvaluator(config['scoring'], early_stop=False, jit_kernels=False)
+features = ValueFeatures(evaluator.get_gem_points)
+failed = False
+
+boards = []
+for _ in range(30):
+    board = stable_board(logic, gem_pool)
+    boards.append((board, logic.find_valid_moves(board)))
+
+print("\n1. Features match scalar first-level estimate and falling gems...")
+mismatches = 0
+for board, moves in boards:
+    matrix = features.extract(moves, board, logic)
+    if matrix.shape != (len(moves), len(VALUE_FEATURES)):
+        mismatches += 1
+        continue
+    for row, move in zip(matrix, moves):
+        expected_first = evaluator.first_cascade.expected_move_score(move, board, logic)
+        removed = logic.get_affected_gems(move.matches)
+        expected_falling = sum(min(p.row for p in removed if p.col == col)
+                               for col in {p.col for p in removed})
+        if abs(row[VALUE_FEATURES.index("first_level")] - expected_first) > 1e-9 \
+                or row[VALUE_FEATURES.index("falling_gems")] != expected_falling:
+            mismatches += 1
+if mismatches:
+    print(f"   ✗ {mismatches} mismatches")
+    failed = True
+else:
+    print("   ✓ All features match")
+
+print("\n2. Fit: linear recovers a linear target, MLP learns a non-linear one...")
+rng = np.random.default_rng(0)
+x = rng.normal(size=(500, len(VALUE_FEATURES))) * 5 + 10
+linear_target = x @ np.arange(1, len(VALUE_FEATURES) + 1) + 3
+linear = ValueModel.fit(x, linear_target, VALUE_FEATURES, hidden=0)
+linear_error = np.abs(linear.predict(x) - linear_target).max()
+nonlinear_target = np.maximum(x[:, 0] - 10, 0) * 4
+mlp = ValueModel.fit(x, nonlinear_target, VALUE_FEATURES, hidden=16, epochs=1500)
+mlp_rmse = float(np.sqrt(np.mean((mlp.predict(x) - nonlinear_target) ** 2)))
+if linear_error > 1e-6 or mlp_rmse > 0.2 * nonlinear_target.std():
+    print(f"   ✗ linear max error {linear_error:.2e}, MLP RMSE {mlp_rmse:.2f}")
+    failed = True
+else:
+    print(f"   ✓ linear max error {linear_error:.1e}, MLP RMSE {mlp_rmse:.2f} (std {nonlinear_target.std():.2f})")
+
+print("\n3. Save/load round trip...")
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "value_model.json")
+    mlp.save(path)
+    loaded = ValueModel.load(path)
+    loaded_config = {'calculation': {'value_model': {'enabled': True, 'path': path}}}
+    from_config = ValueModel.from_config(loaded_config)
+    missing = ValueModel.from_config({'calculation': {'value_model': {
+        'enabled': True, 'path': os.path.join(directory, "missing.json")}}})
+if not np.array_equal(loaded.predict(x), mlp.predict(x)) or from_config is None or missing is not None:
+    print("   ✗ Round trip / from_config failed")
+    failed = True
+else:
+    print("   ✓ Same predictions after load, missing file → None")
+
+print("\n4. Phase 1 ranks by immediate + predicted cascade...")
+# Model chỉ dựa vào first_level → phase 1 xếp hạng theo immediate + kỳ vọng cấp 1
+first_only = ValueModel(VALUE_FEATURES, np.zeros(len(VALUE_FEATURES)), np.ones(len(VALUE_FEATURES)),
+                        [(np.eye(len(VALUE_FEATURES))[:, [VALUE_FEATURES.index("first_level")]], np.zeros(1))])
+ranked = MoveEvaluator(config['scoring'], early_stop=False, jit_kernels=False, value_model=first_only)
+board, moves = max(boards, key=lambda case: len(case[1]))
+evaluations = ranked.evaluate_moves_detailed(moves, board, logic, max_time=0.0)
+phase1 = [e for e in evaluations if e.phase == 1]
+wrong = [e for e in phase1
+         if e.score != e.immediate_score + int(round(ranked.first_cascade.expected_move_score(e.move, board, logic)))]
+if not phase1 or wrong:
+    print(f"   ✗ {len(wrong)} of {len(phase1)} phase-1 scores differ")
+    failed = True
+else:
+    print(f"   ✓ {len(phase1)} phase-1 moves scored by the model")
+
+print("\n5. Moves reused from the previous board are ranked on the same phase-1 scale...")
+# Kết quả cũ có điểm đầy đủ (immediate + cascade) cao hơn hẳn → không được dùng để xếp hạng phase 1
+prior = {move_key(e.move): replace(e, score=e.score + 10000) for e in evaluations}
+reused = ranked.evaluate_moves_detailed(moves, board, logic, max_time=0.0, prior=prior)
+inflated = [e for e in reused if e.phase == 1 and e.score >= 10000]
+if not any(e.phase == 1 for e in reused) or inflated:
+    print(f"   ✗ {len(inflated)} phase-1 moves kept the previous board's score")
+    failed = True
+else:
+    print("   ✓ Prior moves scored like fresh ones")
+
+print("\n" + "="*60)
+if failed:
+    print("✗ VALUE MODEL TESTS FAILED")
+    sys.exit(1)
+print("✓ ALL VALUE MODEL TESTS PASSED")
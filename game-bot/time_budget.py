@@ -0,0 +1,163 @@
+"""
+Time Budget Module
+Derives the think-time budget for each turn from the live turn timer
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ThinkBudget:
+    """Budget cho một lượt tính toán"""
+    max_time: float         # Thời gian tối đa được phép tính (giây)
+    deadline: float         # Thời điểm phải dừng tính (time.time())
+    rollout_scale: float    # Hệ số nhân số rollout (<1 khi gấp, >1 khi dư thời gian)
+    remaining: Optional[float] = None  # Thời gian còn lại của lượt lúc lập budget (None = không có timer)
+
+
+class TimeBudgetManager:
+    """
+    Tính budget suy nghĩ từ timer còn lại của lượt, độ trễ kéo chuột đo được
+    và khoảng an toàn:
+    
+        budget = timer_còn_lại - độ_trễ_kéo - safety_margin
+    
+    Budget được kẹp trong [min_think_time, max_think_time]. Nếu không đọc được
+    timer, dùng nominal_time (max_calculation_time trong config).
+    """
+    
+    def __init__(self, nominal_time: float = 3.0, min_think_time: float = 0.2,
+                 max_think_time: float = 5.0, safety_margin: float = 0.5,
+                 default_drag_latency: float = 1.0, latency_smoothing: float = 0.3,
+                 min_rollout_scale: float = 0.2, max_rollout_scale: float = 2.5,
+                 enabled: bool = True):
+        """
+        Initialize time budget manager
+        
+        Args:
+            nominal_time: Budget mặc định khi không có timer (rollout_scale = 1.0)
+            min_think_time: Budget tối thiểu (giây)
+            max_think_time: Budget tối đa khi còn nhiều thời gian (giây)
+            safety_margin: Khoảng an toàn trừ thêm (giây)
+            default_drag_latency: Độ trễ kéo ước tính trước khi đo được
+            latency_smoothing: Hệ số EMA cho độ trễ kéo đo được (0-1)
+            min_rollout_scale: Hệ số rollout tối thiểu
+            max_rollout_scale: Hệ số rollout tối đa
+            enabled: False = luôn dùng nominal_time (bỏ qua timer)
+        """
+        self.enabled = enabled
+        self.nominal_time = nominal_time
+        self.min_think_time = min_think_time
+        self.max_think_time = max(max_think_time, min_think_time)
+        self.safety_margin = safety_margin
+        self.latency_smoothing = latency_smoothing
+        self.min_rollout_scale = min_rollout_scale
+        self.max_rollout_scale = max_rollout_scale
+        
+        self.drag_latency = default_drag_latency
+        self.latency_samples = 0
+        
+        # Timer đọc gần nhất
+        self.timer_value = None
+        self.timer_read_at = None
+    
+    @classmethod
+    def from_config(cls, config: dict, default_drag_latency: float = 1.0) -> "TimeBudgetManager":
+        """
+        Tạo manager từ config (mục calculation + calculation.time_budget)
+        
+        Args:
+            config: Full configuration dictionary
+            default_drag_latency: Độ trễ kéo ước tính (từ MouseController)
+        
+        Returns:
+            TimeBudgetManager
+        """
+        calc_config = config.get('calculation', {})
+        budget_config = calc_config.get('time_budget', {})
+        nominal = calc_config.get('max_calculation_time', 0.5)
+        
+        return cls(
+            nominal_time=nominal,
+            min_think_time=budget_config.get('min_think_time', 0.2),
+            max_think_time=budget_config.get('max_think_time', nominal),
+            safety_margin=budget_config.get('safety_margin', 0.5),
+            default_drag_latency=default_drag_latency,
+            latency_smoothing=budget_config.get('latency_smoothing', 0.3),
+            enabled=budget_config.get('enabled', True)
+        )
+    
+    def record_timer(self, timer_value: Optional[int], read_at: Optional[float] = None):
+        """
+        Ghi nhận giá trị timer vừa đọc (TurnDetector.detect_timer_value)
+        
+        Args:
+            timer_value: Số giây còn lại trên timer (None nếu không đọc được)
+            read_at: Thời điểm chụp ảnh timer (mặc định: bây giờ)
+        """
+        self.timer_value = timer_value
+        self.timer_read_at = read_at if read_at is not None else time.time()
+    
+    def record_drag_latency(self, seconds: Optional[float]):
+        """
+        Cập nhật độ trễ kéo chuột đo được (MouseController.last_drag_latency)
+        
+        Args:
+            seconds: Thời gian từ lúc bắt đầu execute_move đến lúc thả chuột
+        """
+        if seconds is None or seconds <= 0:
+            return
+        
+        if self.latency_samples == 0:
+            self.drag_latency = seconds
+        else:
+            alpha = self.latency_smoothing
+            self.drag_latency = alpha * seconds + (1 - alpha) * self.drag_latency
+        self.latency_samples += 1
+    
+    def remaining_turn_time(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Thời gian còn lại của lượt tính từ timer đọc gần nhất
+        
+        Args:
+            now: Thời điểm hiện tại (mặc định: time.time())
+        
+        Returns:
+            Số giây còn lại, hoặc None nếu không có timer
+        """
+        if not self.enabled or self.timer_value is None or self.timer_read_at is None:
+            return None
+        
+        now = now if now is not None else time.time()
+        return self.timer_value - (now - self.timer_read_at)
+    
+    def plan(self, now: Optional[float] = None) -> ThinkBudget:
+        """
+        Lập budget cho lượt hiện tại
+        
+        Args:
+            now: Thời điểm bắt đầu tính (mặc định: time.time())
+        
+        Returns:
+            ThinkBudget với max_time, deadline và rollout_scale
+        """
+        now = now if now is not None else time.time()
+        remaining = self.remaining_turn_time(now)
+        
+        if remaining is None:
+            max_time = self.nominal_time
+        else:
+            available = remaining - self.drag_latency - self.safety_margin
+            max_time = min(max(available, self.min_think_time), self.max_think_time)
+        
+        scale = max_time / self.nominal_time if self.nominal_time > 0 else 1.0
+        scale = min(max(scale, self.min_rollout_scale), self.max_rollout_scale)
+        
+        return ThinkBudget(
+            max_time=max_time,
+            deadline=now + max_time,
+            rollout_scale=scale,
+            remaining=remaining
+        )
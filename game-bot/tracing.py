@@ -0,0 +1,248 @@
+"""
+Tracing Module
+Lightweight per-stage latency spans written to a rolling JSONL or Chrome-trace file
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from bot_logging import get_logger, rate_limited
+
+log = get_logger("tracing")
+
+
+class _NullSpan:
+    """Span rỗng khi tracing tắt (không ghi gì, gần như không tốn chi phí)"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Một span đang chạy (ghi lại khi thoát khỏi with)"""
+    
+    __slots__ = ('tracer', 'name', 'args', 'start')
+    
+    def __init__(self, tracer: "Tracer", name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, self.args)
+        return False
+    
+    def set(self, **args):
+        """Gắn thêm thông tin vào span (vd: số moves, số rollout)"""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Span tracer cho từng iteration của bot
+    
+    Dùng:
+        with tracer.span("board_read"):
+            ...
+    
+    Khi tắt, span() trả về một context rỗng dùng chung.
+    Events được gom theo iteration và ghi ra file khi flush():
+    - format "jsonl": mỗi dòng một span
+    - format "chrome": JSON Array Format (mở bằng chrome://tracing hoặc Perfetto)
+    File được xoay vòng khi vượt max_bytes (giữ `backups` file cũ).
+    """
+    
+    def __init__(self, enabled: bool = False, path: str = "traces/trace.jsonl",
+                 fmt: str = "jsonl", max_bytes: int = 5_000_000, backups: int = 3):
+        """
+        Initialize tracer
+        
+        Args:
+            enabled: Bật/tắt tracing
+            path: File output
+            fmt: "jsonl" hoặc "chrome"
+            max_bytes: Kích thước tối đa mỗi file trước khi xoay vòng
+            backups: Số file cũ giữ lại (path.1, path.2, ...)
+        """
+        self.enabled = enabled
+        self.path = Path(path)
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.backups = backups
+        
+        self.iteration = 0
+        self._events = []
+        self._lock = threading.Lock()
+        self._file = None
+        
+        # Mốc thời gian: perf_counter cho độ chính xác, time.time() cho timestamp tuyệt đối
+        self._perf0 = time.perf_counter()
+        self._wall0 = time.time()
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "Tracer":
+        """
+        Tạo tracer từ mục `tracing` trong config
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            Tracer
+        """
+        trace_config = config.get('tracing', {})
+        return cls(
+            enabled=trace_config.get('enabled', False),
+            path=trace_config.get('path', 'traces/trace.jsonl'),
+            fmt=trace_config.get('format', 'jsonl'),
+            max_bytes=trace_config.get('max_bytes', 5_000_000),
+            backups=trace_config.get('backups', 3)
+        )
+    
+    def span(self, name: str, **args):
+        """
+        Tạo span cho một stage
+        
+        Args:
+            name: Tên stage (vd: "capture", "board_read", "eval.phase2")
+            **args: Thông tin thêm ghi kèm span
+        
+        Returns:
+            Context manager
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+    
+    def next_iteration(self) -> int:
+        """Bắt đầu iteration mới (spans sau đó được gắn số iteration này)"""
+        self.iteration += 1
+        return self.iteration
+    
+    def _record(self, name: str, start: float, end: float, args: dict):
+        """Lưu event vào buffer"""
+        self._events.append((name, start, end, self.iteration, threading.get_ident(), args))
+    
+    def _format_event(self, event: tuple) -> str:
+        """Chuyển event sang 1 dòng JSON theo format đã chọn"""
+        name, start, end, iteration, thread_id, args = event
+        start_us = (self._wall0 + (start - self._perf0)) * 1e6
+        dur_us = (end - start) * 1e6
+        
+        if self.fmt == "chrome":
+            record = {
+                "name": name, "ph": "X", "ts": round(start_us), "dur": round(dur_us),
+                "pid": os.getpid(), "tid": thread_id,
+                "args": dict(args, iteration=iteration)
+            }
+            return json.dumps(record, ensure_ascii=False) + ",\n"
+        
+        record = {
+            "name": name, "iteration": iteration,
+            "start": round(start_us / 1e6, 6), "dur_ms": round(dur_us / 1000, 3),
+            "thread": thread_id
+        }
+        record.update(args)
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    
+    def _open(self):
+        """Mở file output (xoay vòng nếu đã quá lớn)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+            self._rotate()
+        
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if is_new and self.fmt == "chrome":
+            # JSON Array Format cho phép bỏ dấu "]" cuối → có thể append liên tục
+            self._file.write("[\n")
+    
+    def _rotate(self):
+        """Xoay vòng file: trace → trace.1 → trace.2 ..."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+    
+    def flush(self):
+        """Ghi các span đã buffer ra file (gọi cuối mỗi iteration)"""
+        if not self._events:
+            return
+        
+        with self._lock:
+            events, self._events = self._events, []
+            try:
+                if self._file is None:
+                    self._open()
+                
+                self._file.write("".join(self._format_event(event) for event in events))
+                self._file.flush()
+                
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+                    self._open()
+            except OSError as e:
+                log.warning("⚠ Trace write error: %s", e, extra=rate_limited(30))
+    
+    def close(self):
+        """Flush và đóng file"""
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+# Tracer dùng chung cho toàn bộ bot (mặc định tắt)
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    """Tracer hiện tại của process"""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """
+    Đặt tracer dùng chung (GameBot gọi khi khởi tạo)
+    
+    Args:
+        tracer: Tracer mới
+    
+    Returns:
+        Tracer vừa đặt
+    """
+    global _tracer
+    _tracer = tracer
+    return tracer
@@ -0,0 +1,172 @@
+"""
+Train Value Model
+Self-play offline trên simulator (không cần game): sinh board ngẫu nhiên, chạy rollout cascade
+cho từng move, rồi fit ValueModel dự đoán điểm cascade trung bình từ VALUE_FEATURES.
+Trọng số được lưu ra JSON (calculation.value_model.path) để MoveEvaluator load khi khởi động.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from board_fixtures import LIVE_GEMS, random_boards
+
+BOT_DIR = Path(__file__).parent
+
+
+def build_dataset(evaluator, features, logic, boards: int, rollouts: int, seed: int):
+    """
+    Feature + target (điểm cascade trung bình qua `rollouts` rollout) của mọi move
+    
+    Returns:
+        (X (N, F), y (N,), board_ids (N,), baseline (N,) điểm phase 1 cũ, immediate (N,))
+    """
+    rows_x, rows_y, rows_board, rows_baseline, rows_immediate = [], [], [], [], []
+    started = time.perf_counter()
+    for board_id, (board, moves) in enumerate(random_boards(logic, boards, seed)):
+        rows_x.append(features.extract(moves, board, logic))
+        for move in moves:
+            evaluation = evaluator._start_evaluation(move, board, logic)
+            evaluator._rollout_batch([(evaluation, rollouts)], board, logic)
+            rows_y.append(sum(evaluation.cascade_scores) / rollouts)
+            rows_board.append(board_id)
+            rows_baseline.append(evaluation.immediate_score + evaluation.immediate_yellow * 20)
+            rows_immediate.append(evaluation.immediate_score)
+        
+        if (board_id + 1) % 50 == 0:
+            print(f"   {board_id + 1}/{boards} boards, {len(rows_y)} moves ({time.perf_counter() - started:.0f}s)")
+    
+    return (np.vstack(rows_x), np.array(rows_y), np.array(rows_board),
+            np.array(rows_baseline, dtype=np.float64), np.array(rows_immediate, dtype=np.float64))
+
+
+def ranking_report(ranking: np.ndarray, truth: np.ndarray, board_ids: np.ndarray, top: int = 5) -> dict:
+    """
+    Chất lượng xếp hạng theo board: move tốt nhất (theo rollout) có đứng đầu / trong top không
+    
+    Args:
+        ranking: Điểm dùng để xếp hạng
+        truth: immediate + cascade trung bình (rollout)
+        board_ids: Board của từng move
+        top: Kích thước top-k
+    
+    Returns:
+        {'top1': tỉ lệ, 'top_k': tỉ lệ, 'regret': điểm mất trung bình khi chọn move đứng đầu}
+    """
+    hits = in_top = 0
+    regret = 0.0
+    boards = np.unique(board_ids)
+    for board_id in boards:
+        index = np.flatnonzero(board_ids == board_id)
+        order = index[np.argsort(-ranking[index], kind="stable")]
+        best = truth[index].max()
+        hits += truth[order[0]] == best
+        in_top += truth[order[:top]].max() == best
+        regret += best - truth[order[0]]
+    return {'top1': hits / len(boards), 'top_k': in_top / len(boards), 'regret': regret / len(boards)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train value model cho phase 1 của MoveEvaluator (offline)")
+    parser.add_argument('--config', default=str(BOT_DIR / "config.yaml"), help='File config')
+    parser.add_argument('--boards', type=int, default=400, help='Số board ngẫu nhiên')
+    parser.add_argument('--rollouts', type=int, default=16, help='Số rollout mỗi move (target = trung bình)')
+    parser.add_argument('--gems', type=int, default=0,
+                        help=f'Chỉ dùng N loại gem đầu tiên, phân phối đều '
+                             f'(0 = spawn_stats.json nếu có, không thì {LIVE_GEMS} gems)')
+    parser.add_argument('--hidden', type=int, default=16, help='Số neuron lớp ẩn (0 = tuyến tính)')
+    parser.add_argument('--epochs', type=int, default=3000, help='Số bước Adam')
+    parser.add_argument('--lr', type=float, default=0.01, help='Learning rate')
+    parser.add_argument('--holdout', type=float, default=0.2, help='Tỉ lệ board giữ lại để đánh giá')
+    parser.add_argument('--seed', type=int, default=7, help='Seed (board, rollout, khởi tạo trọng số)')
+    parser.add_argument('--output', default=None, help='File weights (mặc định calculation.value_model.path)')
+    args = parser.parse_args()
+    
+    import yaml
+    from logic import MatchThreeLogic
+    from evaluator import MoveEvaluator
+    from spawn import SpawnEstimator
+    from value_model import ValueFeatures, ValueModel, VALUE_FEATURES
+    
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    calc_config = config.get('calculation', {})
+    output = args.output or calc_config.get('value_model', {}).get('path', 'value_model.json')
+    
+    print("=" * 60)
+    print("🧠 TRAIN VALUE MODEL")
+    print("=" * 60)
+    
+    logic = MatchThreeLogic(config['board']['rows'], config['board']['cols'])
+    estimator = SpawnEstimator.from_config(config, logic.gem_types) if args.gems <= 0 else None
+    if estimator is not None and estimator.samples:
+        estimator.apply(logic.spawn_source)
+        spawn_label = f"{estimator.path} ({estimator.samples} samples)"
+    else:
+        gems = args.gems if args.gems > 0 else LIVE_GEMS
+        weights = [1.0 if i < gems else 0.0 for i in range(len(logic.gem_types))]
+        logic.spawn_source.set_weights(weights)
+        spawn_label = f"{gems} gems, đều"
+    spawn_gems = [gem for gem, p in zip(logic.gem_types, logic.spawn_source.probabilities().mean(axis=0)) if p > 0]
+    print(f"📋 Board {logic.rows}x{logic.cols}, spawn: {spawn_label}")
+    
+    # Rollout tuần tự, không dừng sớm: target là trung bình đủ `rollouts` lần
+    evaluator = MoveEvaluator(config['scoring'], analytic_cascade=calc_config.get('analytic_cascade', True),
+                              early_stop=False, jit_kernels=calc_config.get('jit_kernels', True))
+    features = ValueFeatures(evaluator.get_gem_points)
+    
+    print(f"\n1. Self-play: {args.boards} boards x {args.rollouts} rollouts/move...")
+    start = time.perf_counter()
+    x, y, board_ids, baseline, immediate = build_dataset(evaluator, features, logic,
+                                                         args.boards, args.rollouts, args.seed)
+    print(f"   ✓ {len(y)} moves ({time.perf_counter() - start:.0f}s)")
+    
+    rng = np.random.default_rng(args.seed)
+    holdout_boards = rng.permutation(args.boards)[:int(args.boards * args.holdout)]
+    test = np.isin(board_ids, holdout_boards)
+    train = ~test if test.any() else np.ones(len(y), dtype=bool)
+    
+    print(f"\n2. Fit ({'linear' if args.hidden <= 0 else f'MLP {args.hidden} hidden'}) "
+          f"trên {train.sum()} moves...")
+    start = time.perf_counter()
+    model = ValueModel.fit(x[train], y[train], VALUE_FEATURES, hidden=args.hidden,
+                           epochs=args.epochs, learning_rate=args.lr, seed=args.seed)
+    print(f"   ✓ {model.describe()} ({time.perf_counter() - start:.1f}s)")
+    
+    metrics = {}
+    if test.any():
+        predicted = model.predict(x[test])
+        rmse = float(np.sqrt(np.mean((predicted - y[test]) ** 2)))
+        corr = float(np.corrcoef(predicted, y[test])[0, 1])
+        truth = immediate[test] + y[test]
+        learned = ranking_report(immediate[test] + predicted, truth, board_ids[test])
+        old = ranking_report(baseline[test], truth, board_ids[test])
+        # Holdout lấy từ cùng phân phối spawn với tập train
+        metrics = {'spawn': spawn_label, 'rmse': round(rmse, 3), 'corr': round(corr, 4),
+                   'top1': round(learned['top1'], 4), 'top5': round(learned['top_k'], 4),
+                   'baseline_top1': round(old['top1'], 4), 'baseline_top5': round(old['top_k'], 4)}
+        
+        print(f"\n3. Holdout ({len(holdout_boards)} boards, {test.sum()} moves):")
+        print(f"   RMSE cascade: {rmse:.2f} (target std {y[test].std():.2f}), corr {corr:.3f}")
+        print(f"   {'':22s} {'top-1':>7s} {'top-5':>7s} {'regret':>8s}")
+        for label, report in (("immediate + vàng x20", old), ("value model", learned)):
+            print(f"   {label:22s} {report['top1']:7.1%} {report['top_k']:7.1%} {report['regret']:8.2f}")
+    
+    # Timing dự đoán (feature + predict) trên một board
+    board, moves = next(random_boards(logic, 1, args.seed + 1))
+    start = time.perf_counter()
+    for _ in range(50):
+        model.predict(features.extract(moves, board, logic))
+    per_board_us = (time.perf_counter() - start) / 50 * 1e6
+    print(f"\n⏱ Feature + predict: {per_board_us:.0f} us / board ({len(moves)} moves)")
+    
+    model.metadata = {'boards': args.boards, 'rollouts': args.rollouts, 'moves': int(len(y)),
+                      'spawn': spawn_label, 'gems': spawn_gems, 'seed': args.seed, 'holdout': metrics}
+    model.save(output)
+    print(f"\n💾 Saved → {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,13 @@ Detects when it's the player's turn and checks the turn timer
 
 import cv2
 import numpy as np
-import pytesseract
 from typing import Optional, Tuple
 import re
 
+from bot_logging import get_logger, rate_limited
+
+log = get_logger("turn_detector")
+
 
 class TurnDetector:
     """Detects player turn and timer in PvP match-3 game"""
@@ -28,9 +31,18 @@ class TurnDetector:
         self.your_turn_region = your_turn_region
         self.timer_region = timer_region
         
-        # Set tesseract path if provided
-        if tesseract_cmd:
-            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        # pytesseract chỉ được import (và set đường dẫn) ở lần OCR đầu tiên
+        self.tesseract_cmd = tesseract_cmd
+        self._pytesseract = None
+    
+    def _get_pytesseract(self):
+        """Import pytesseract khi cần (lazy) để không làm chậm khởi động"""
+        if self._pytesseract is None:
+            import pytesseract
+            if self.tesseract_cmd:
+                pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+            self._pytesseract = pytesseract
+        return self._pytesseract
     
     def detect_your_turn_text(self, screen_img: np.ndarray) -> bool:
         """
@@ -85,7 +97,7 @@ class TurnDetector:
             _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
             
             # OCR
-            text = pytesseract.image_to_string(thresh, config='--psm 7')
+            text = self._get_pytesseract().image_to_string(thresh, config='--psm 7')
             text_clean = text.lower().replace(' ', '').replace('\n', '')
             
             # Check for "your turn" variations
@@ -97,7 +109,7 @@ class TurnDetector:
             return False
             
         except Exception as e:
-            print(f"⚠ Error detecting 'Your Turn': {e}")
+            log.warning("⚠ Error detecting 'Your Turn': %s", e, extra=rate_limited(5))
             return False
     
     def detect_timer_value(self, screen_img: np.ndarray) -> Optional[int]:
@@ -138,7 +150,7 @@ class TurnDetector:
             
             # Method 2: OCR to read the number
             # Configure OCR for single digits/numbers
-            text = pytesseract.image_to_string(
+            text = self._get_pytesseract().image_to_string(
                 mask, 
                 config='--psm 7 --oem 3 -c tessedit_char_whitelist=0123456789'
             )
@@ -156,7 +168,7 @@ class TurnDetector:
             return None
             
         except Exception as e:
-            print(f"⚠ Error detecting timer: {e}")
+            log.warning("⚠ Error detecting timer: %s", e, extra=rate_limited(5))
             return None
     
     def is_action_allowed(self, screen_img: np.ndarray, 
@@ -228,13 +240,13 @@ class TurnDetector:
             allowed, info = self.is_action_allowed(screen_img, min_timer_value=1)
             
             if allowed:
-                print(f"✓ Your turn detected! Timer: {info['timer']}s")
+                log.info("✓ Your turn detected! Timer: %ss", info['timer'])
                 return True
             
             # Wait before next check
             time.sleep(check_interval)
         
-        print(f"⏱ Timeout waiting for turn ({max_wait_time}s)")
+        log.warning("⏱ Timeout waiting for turn (%ss)", max_wait_time)
         return False
 
 
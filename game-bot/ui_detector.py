@@ -5,12 +5,15 @@ Detects buttons and UI elements using OCR (pytesseract)
 
 import cv2
 import numpy as np
-import pytesseract
 import sys
 from typing import Optional, Dict, Tuple, List
 from pathlib import Path
 import re
 
+from bot_logging import get_logger, rate_limited
+
+log = get_logger("ui_detector")
+
 
 class UIDetector:
     """Detects UI elements (buttons) in game window using OCR"""
@@ -25,10 +28,9 @@ class UIDetector:
         self.config = config
         self.ocr_config = config.get('game_automation', {})
         
-        # Configure tesseract path - tự động tìm trong bundle hoặc system
-        tesseract_path = self._find_tesseract_path()
-        if tesseract_path:
-            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        # Tesseract (bundle hoặc system) chỉ được tìm ở lần OCR đầu tiên
+        # → khởi động nhanh khi OCR không được dùng
+        self._pytesseract = None
         
         # Button keywords to detect
         self.button_keywords = {
@@ -40,6 +42,21 @@ class UIDetector:
         # OCR confidence threshold
         self.confidence_threshold = self.ocr_config.get('ocr_confidence', 60)
     
+    def _get_pytesseract(self):
+        """
+        Import pytesseract và cấu hình đường dẫn Tesseract khi cần (lazy)
+        
+        Returns:
+            Module pytesseract
+        """
+        if self._pytesseract is None:
+            import pytesseract
+            tesseract_path = self._find_tesseract_path()
+            if tesseract_path:
+                pytesseract.pytesseract.tesseract_cmd = tesseract_path
+            self._pytesseract = pytesseract
+        return self._pytesseract
+    
     def _find_tesseract_path(self) -> Optional[str]:
         """
         Tự động tìm Tesseract OCR (bundle hoặc system)
@@ -65,13 +82,13 @@ class UIDetector:
         
         bundle_tess = bundle_dir / "bundle" / "tesseract" / "tesseract.exe"
         if bundle_tess.exists():
-            print(f"✓ Found bundled Tesseract: {bundle_tess}")
+            log.info("✓ Found bundled Tesseract: %s", bundle_tess)
             return str(bundle_tess)
         
         # 3. Kiểm tra thư mục tesseract cùng cấp với .exe
         local_tess = bundle_dir / "tesseract" / "tesseract.exe"
         if local_tess.exists():
-            print(f"✓ Found local Tesseract: {local_tess}")
+            log.info("✓ Found local Tesseract: %s", local_tess)
             return str(local_tess)
         
         # 4. Kiểm tra PATH system (nếu user đã cài)
@@ -81,17 +98,17 @@ class UIDetector:
         ]
         for path in system_paths:
             if Path(path).exists():
-                print(f"✓ Found system Tesseract: {path}")
+                log.info("✓ Found system Tesseract: %s", path)
                 return path
         
         # 5. Thử tìm trong PATH
         import shutil
         tess_in_path = shutil.which("tesseract")
         if tess_in_path:
-            print(f"✓ Found Tesseract in PATH: {tess_in_path}")
+            log.info("✓ Found Tesseract in PATH: %s", tess_in_path)
             return tess_in_path
         
-        print("⚠️ Tesseract not found - OCR features will be disabled")
+        log.warning("⚠️ Tesseract not found - OCR features will be disabled")
         return None
     
     def get_search_region(self, button_type: str, img_shape: tuple) -> Optional[Tuple[int, int, int, int]]:
@@ -178,6 +195,7 @@ class UIDetector:
         processed = self.preprocess_for_ocr(image)
         
         # OCR with bounding boxes
+        pytesseract = self._get_pytesseract()
         ocr_data = pytesseract.image_to_data(
             processed,
             lang='vie+eng',  # Vietnamese + English
@@ -287,25 +305,21 @@ class UIDetector:
         
         return False
     
-    def detect_button_by_color_position(self, screenshot: np.ndarray, 
-                                        button_type: str) -> Optional[Tuple[int, int]]:
+    # Nhóm màu của từng loại nút (Nhận/Chiến dùng chung mask xanh)
+    BUTTON_COLORS = {'nhan': 'blue', 'chien': 'blue', 'batdau': 'orange'}
+    
+    def _color_mask(self, hsv: np.ndarray, color: str) -> np.ndarray:
         """
-        Detect button by color and position (fallback method)
+        Tạo mask màu nút đã làm sạch bằng morphology
         
         Args:
-            screenshot: Game window screenshot (BGR)
-            button_type: Type of button to detect
+            hsv: Ảnh HSV
+            color: 'blue' (Nhận, Chiến) hoặc 'orange' (Bắt đầu)
             
         Returns:
-            (x, y) position of button center or None
+            Binary mask
         """
-        height, width = screenshot.shape[:2]
-        
-        # Convert to HSV for color detection
-        hsv = cv2.cvtColor(screenshot, cv2.COLOR_BGR2HSV)
-        
-        # Define color ranges based on button type
-        if button_type == 'batdau':
+        if color == 'orange':
             # "Bắt đầu" button is ORANGE/YELLOW
             lower_orange = np.array([10, 100, 100])
             upper_orange = np.array([25, 255, 255])
@@ -329,6 +343,61 @@ class UIDetector:
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
         mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
         mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        return mask
+    
+    def _candidate_score(self, button_type: str, rel_x: float, rel_y: float,
+                         area: float) -> Optional[float]:
+        """
+        Điểm của một vùng màu theo vị trí tương đối trong vùng tìm kiếm
+        
+        Args:
+            button_type: Type of button
+            rel_x: Vị trí tâm theo chiều ngang (0-1)
+            rel_y: Vị trí tâm theo chiều dọc (0-1)
+            area: Diện tích contour
+        
+        Returns:
+            Score (nhỏ hơn = tốt hơn), hoặc None nếu sai vị trí
+        """
+        if button_type == 'chien':
+            # "Chiến" button: bottom-right corner
+            # Right 40%, Bottom 40%
+            if rel_x > 0.6 and rel_y > 0.6:
+                # Calculate distance from bottom-right
+                return ((1.0 - rel_x) ** 2 + (1.0 - rel_y) ** 2) ** 0.5
+        
+        elif button_type == 'batdau':
+            # "Bắt đầu" button: search entire screen, prefer larger buttons
+            # No position restriction - find anywhere in game window
+            # Score based on area (larger = better)
+            return 1.0 / (area + 1)  # Inverse of area (smaller score = better)
+        
+        elif button_type == 'nhan':
+            # "Nhận" button: center of screen
+            # Center both horizontally and vertically
+            if 0.3 < rel_x < 0.7 and 0.4 < rel_y < 0.7:
+                # Distance from center
+                return ((0.5 - rel_x) ** 2 + (0.55 - rel_y) ** 2) ** 0.5
+        
+        return None
+    
+    def detect_button_by_color_position(self, screenshot: np.ndarray, 
+                                        button_type: str) -> Optional[Tuple[int, int]]:
+        """
+        Detect button by color and position (fallback method)
+        
+        Args:
+            screenshot: Game window screenshot (BGR)
+            button_type: Type of button to detect
+        
+        Returns:
+            (x, y) position of button center or None
+        """
+        height, width = screenshot.shape[:2]
+        
+        # Convert to HSV for color detection
+        hsv = cv2.cvtColor(screenshot, cv2.COLOR_BGR2HSV)
+        mask = self._color_mask(hsv, self.BUTTON_COLORS.get(button_type, 'blue'))
         
         # Find contours
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -351,33 +420,10 @@ class UIDetector:
             center_x = x + w // 2
             center_y = y + h // 2
             
-            # Calculate relative position
-            rel_x = center_x / width
-            rel_y = center_y / height
-            
             # Filter by position based on button type
-            if button_type == 'chien':
-                # "Chiến" button: bottom-right corner
-                # Right 40%, Bottom 40%
-                if rel_x > 0.6 and rel_y > 0.6:
-                    # Calculate distance from bottom-right
-                    dist = ((1.0 - rel_x) ** 2 + (1.0 - rel_y) ** 2) ** 0.5
-                    candidates.append((center_x, center_y, dist, area))
-            
-            elif button_type == 'batdau':
-                # "Bắt đầu" button: search entire screen, prefer larger buttons
-                # No position restriction - find anywhere in game window
-                # Score based on area (larger = better)
-                score = 1.0 / (area + 1)  # Inverse of area (smaller score = better)
+            score = self._candidate_score(button_type, center_x / width, center_y / height, area)
+            if score is not None:
                 candidates.append((center_x, center_y, score, area))
-            
-            elif button_type == 'nhan':
-                # "Nhận" button: center of screen
-                # Center both horizontally and vertically
-                if 0.3 < rel_x < 0.7 and 0.4 < rel_y < 0.7:
-                    # Distance from center
-                    dist = ((0.5 - rel_x) ** 2 + (0.55 - rel_y) ** 2) ** 0.5
-                    candidates.append((center_x, center_y, dist, area))
         
         if not candidates:
             return None
@@ -388,6 +434,82 @@ class UIDetector:
         # Return best candidate
         return (candidates[0][0], candidates[0][1])
     
+    def detect_button_candidates(self, screenshot: np.ndarray,
+                                 use_region_hints: bool = True) -> Tuple[Dict[str, List[Dict]], Tuple[int, int, int, int]]:
+        """
+        Tìm ứng viên cho TẤT CẢ loại nút trong một lần quét
+        
+        - Cắt vùng hợp (union) của các vùng tìm kiếm, chuyển HSV MỘT lần
+        - Mỗi nhóm màu (xanh / cam) chỉ tạo mask + morphology + contours một lần
+        - Mỗi contour được gán cho các loại nút có vùng tìm kiếm chứa tâm của nó
+        
+        Args:
+            screenshot: Game window screenshot (BGR)
+            use_region_hints: If True, mỗi nút chỉ tìm trong vùng ưu tiên của nó
+        
+        Returns:
+            (candidates, union_region)
+            - candidates: {button_type: [{'x', 'y', 'score', 'area', 'bbox'}, ...]} đã sắp xếp (tốt nhất trước)
+            - union_region: (x1, y1, x2, y2) vùng đã quét
+        """
+        height, width = screenshot.shape[:2]
+        full = (0, 0, width, height)
+        
+        regions = {}
+        for button_type in self.button_keywords:
+            region = self.get_search_region(button_type, screenshot.shape) if use_region_hints else None
+            regions[button_type] = region or full
+        
+        ux1 = min(r[0] for r in regions.values())
+        uy1 = min(r[1] for r in regions.values())
+        ux2 = max(r[2] for r in regions.values())
+        uy2 = max(r[3] for r in regions.values())
+        
+        # View (không copy) + 1 lần cvtColor cho mọi loại nút
+        hsv = cv2.cvtColor(screenshot[uy1:uy2, ux1:ux2], cv2.COLOR_BGR2HSV)
+        
+        candidates = {button_type: [] for button_type in self.button_keywords}
+        
+        for color in set(self.BUTTON_COLORS[bt] for bt in self.button_keywords):
+            button_types = [bt for bt in self.button_keywords if self.BUTTON_COLORS[bt] == color]
+            mask = self._color_mask(hsv, color)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            for contour in contours:
+                area = cv2.contourArea(contour)
+                if area < 500:  # Minimum 500 pixels
+                    continue
+                
+                x, y, w, h = cv2.boundingRect(contour)
+                center_x = ux1 + x + w // 2
+                center_y = uy1 + y + h // 2
+                
+                for button_type in button_types:
+                    x1, y1, x2, y2 = regions[button_type]
+                    if not (x1 <= center_x < x2 and y1 <= center_y < y2):
+                        continue
+                    
+                    # Vị trí tương đối trong vùng tìm kiếm của nút (giống detect_button)
+                    score = self._candidate_score(button_type,
+                                                  (center_x - x1) / (x2 - x1),
+                                                  (center_y - y1) / (y2 - y1),
+                                                  area)
+                    if score is None:
+                        continue
+                    
+                    candidates[button_type].append({
+                        'x': center_x,
+                        'y': center_y,
+                        'score': score,
+                        'area': area,
+                        'bbox': (ux1 + x, uy1 + y, w, h)
+                    })
+        
+        for button_list in candidates.values():
+            button_list.sort(key=lambda c: (c['score'], -c['area']))
+        
+        return candidates, (ux1, uy1, ux2, uy2)
+    
     def detect_button(self, screenshot: np.ndarray, 
                      button_type: str, use_region_hint: bool = True) -> Optional[Tuple[int, int]]:
         """
@@ -423,12 +545,12 @@ class UIDetector:
             return (color_result[0] + region_offset[0], color_result[1] + region_offset[1])
         
         # Method 2: Fallback to OCR detection (SLOWER but more accurate - 0.1-0.3s)
-        print(f"   ⚠️ Color detection không tìm thấy '{button_type}', thử OCR...")
+        log.debug("   ⚠️ Color detection không tìm thấy '%s', thử OCR...", button_type)
         text_regions = self.detect_text_regions(img_to_search)
         ocr_result = self.find_button_by_text(text_regions, button_type, img_to_search.shape)
         
         if ocr_result:
-            print(f"   ✅ Tìm thấy bằng OCR!")
+            log.debug("   ✅ Tìm thấy bằng OCR!")
             # Điều chỉnh tọa độ về màn hình gốc nếu dùng region
             return (ocr_result[0] + region_offset[0], ocr_result[1] + region_offset[1])
         
@@ -438,23 +560,51 @@ class UIDetector:
                           use_region_hints: bool = True) -> Dict[str, Tuple[int, int]]:
         """
         Detect all buttons in screenshot
+        Một lần quét màu cho mọi nút (detect_button_candidates), OCR chạy tối đa
+        một lần ở bước cuối: tìm nút chưa thấy (nếu use_fallback) hoặc phân biệt
+        Nhận/Chiến khi cả hai cùng chọn một vùng xanh
         
         Args:
             screenshot: Game window screenshot (BGR)
-            use_fallback: If True, use color detection as fallback
+            use_fallback: If True, use OCR as fallback for buttons not found by color
             use_region_hints: If True, search in optimal regions for faster detection
             
         Returns:
             Dictionary mapping button types to positions
         """
-        buttons = {}
+        candidates, union_region = self.detect_button_candidates(screenshot, use_region_hints)
+        
+        buttons = {
+            button_type: (button_list[0]['x'], button_list[0]['y'])
+            for button_type, button_list in candidates.items() if button_list
+        }
         
-        # Tìm từng nút riêng biệt trong vùng ưu tiên của nó
-        for button_type in self.button_keywords.keys():
-            # Sử dụng detect_button với region hint để tìm nhanh
-            pos = self.detect_button(screenshot, button_type, use_region_hint=use_region_hints)
-            if pos:
-                buttons[button_type] = pos
+        missing = [bt for bt in self.button_keywords if bt not in buttons] if use_fallback else []
+        ambiguous = 'nhan' in buttons and buttons.get('chien') == buttons['nhan']
+        
+        if not missing and not ambiguous:
+            return buttons
+        
+        # OCR một lần trên vùng đã quét
+        ux1, uy1, ux2, uy2 = union_region
+        union_img = screenshot[uy1:uy2, ux1:ux2]
+        try:
+            text_regions = self.detect_text_regions(union_img)
+        except Exception as e:
+            log.warning("   ⚠️ OCR error: %s", e, extra=rate_limited(5))
+            return buttons
+        
+        for button_type in missing:
+            ocr_result = self.find_button_by_text(text_regions, button_type, union_img.shape)
+            if ocr_result:
+                buttons[button_type] = (ocr_result[0] + ux1, ocr_result[1] + uy1)
+        
+        if ambiguous:
+            # Cùng một vùng xanh → dựa vào chữ trên màn hình để chọn Nhận hay Chiến
+            if self.find_button_by_text(text_regions, 'nhan', union_img.shape):
+                buttons.pop('chien', None)
+            elif self.find_button_by_text(text_regions, 'chien', union_img.shape):
+                buttons.pop('nhan', None)
         
         return buttons
     
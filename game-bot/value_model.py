@@ -0,0 +1,258 @@
+"""
+Value Model Module
+Mô hình nhỏ (tuyến tính hoặc MLP 1 lớp ẩn, NumPy thuần) dự đoán điểm cascade kỳ vọng
+của một move từ feature của board, dùng để xếp hạng moves ở phase 1 trước khi chạy rollout.
+Train offline bằng train_value_model.py (self-play trên simulator), lưu trọng số ra JSON.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from logic import Move, MatchThreeLogic
+from cascade_estimator import FirstCascadeEstimator
+from feature_extractor import MoveFeatureExtractor, FEATURES
+from bot_logging import get_logger
+
+log = get_logger("value_model")
+
+# Input của model: heuristic phase 1 + kỳ vọng chain 1 + số gem sẽ rơi
+VALUE_FEATURES = FEATURES + (
+    "first_level",        # FirstCascadeEstimator.expected_move_scores
+    "falling_gems",       # Σ theo cột: số gem nằm trên ô bị ăn cao nhất (sẽ rơi xuống)
+)
+
+
+class ValueFeatures:
+    """Ma trận feature (moves x VALUE_FEATURES) cho value model"""
+    
+    def __init__(self, gem_points):
+        """
+        Initialize feature builder
+        
+        Args:
+            gem_points: Điểm mỗi gem (MoveEvaluator.get_gem_points)
+        """
+        self.extractor = MoveFeatureExtractor(gem_points)
+        self.first_cascade = FirstCascadeEstimator(gem_points)
+    
+    @staticmethod
+    def falling_gems(moves: List[Move], rows: int, cols: int) -> np.ndarray:
+        """
+        Số gem phía trên các ô bị ăn (rơi xuống sau move) của từng move
+        
+        Returns:
+            Mảng (len(moves),)
+        """
+        top = np.full((len(moves), cols), rows, dtype=np.int64)
+        for index, move in enumerate(moves):
+            for match in move.matches:
+                for pos in match.positions:
+                    if pos.row < top[index, pos.col]:
+                        top[index, pos.col] = pos.row
+        return np.where(top < rows, top, 0).sum(axis=1)
+    
+    def extract(self, moves: List[Move], board: List[List[str]], logic: MatchThreeLogic) -> np.ndarray:
+        """
+        Feature của tất cả moves
+        
+        Args:
+            moves: Danh sách moves
+            board: Current board state
+            logic: MatchThreeLogic instance
+        
+        Returns:
+            Mảng (len(moves), len(VALUE_FEATURES)) float64
+        """
+        return np.column_stack([
+            self.extractor.extract(moves, board, logic),
+            self.first_cascade.expected_move_scores(moves, board, logic),
+            self.falling_gems(moves, logic.rows, logic.cols),
+        ]).astype(np.float64)
+
+
+class ValueModel:
+    """
+    Dự đoán điểm cascade trung bình (MoveEvaluation.cascade_scores) của move
+    
+    Input được chuẩn hóa (mean/std lúc train), các lớp ẩn dùng ReLU,
+    không có lớp ẩn = hồi quy tuyến tính.
+    """
+    
+    def __init__(self, feature_names: Sequence[str], mean: np.ndarray, std: np.ndarray,
+                 layers: List[Tuple[np.ndarray, np.ndarray]], metadata: Optional[dict] = None):
+        """
+        Initialize value model
+        
+        Args:
+            feature_names: Tên các cột input (phải khớp VALUE_FEATURES khi dùng)
+            mean, std: Chuẩn hóa input
+            layers: Danh sách (weights (in, out), bias (out,)), lớp cuối có out = 1
+            metadata: Thông tin lúc train (số board, rollout, chỉ số đánh giá...)
+        """
+        self.feature_names = tuple(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.layers = [(np.asarray(w, dtype=np.float64), np.asarray(b, dtype=np.float64)) for w, b in layers]
+        self.metadata = metadata or {}
+    
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["ValueModel"]:
+        """
+        Load model theo mục calculation.value_model
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            ValueModel, hoặc None nếu tắt / chưa có file / file không dùng được
+        """
+        model_config = config.get('calculation', {}).get('value_model', {})
+        if not model_config.get('enabled', False):
+            return None
+        
+        path = Path(model_config.get('path', 'value_model.json'))
+        if not path.exists():
+            log.info("ℹ️ Chưa có value model (%s) - chạy train_value_model.py để tạo", path)
+            return None
+        
+        try:
+            model = cls.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("⚠ Không load được value model %s: %s", path, e)
+            return None
+        if model.feature_names != VALUE_FEATURES:
+            log.warning("⚠ Value model %s dùng feature khác (%s) - train lại", path, ", ".join(model.feature_names))
+            return None
+        
+        log.info("🧠 Value model: %s (%s)", path, model.describe())
+        return model
+    
+    def describe(self) -> str:
+        """Mô tả ngắn cho log"""
+        sizes = [len(self.feature_names)] + [len(b) for _, b in self.layers]
+        return "x".join(str(size) for size in sizes)
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Dự đoán điểm cascade
+        
+        Args:
+            features: Mảng (N, len(feature_names))
+        
+        Returns:
+            Mảng (N,)
+        """
+        hidden = (np.asarray(features, dtype=np.float64) - self.mean) / self.std
+        for weights, bias in self.layers[:-1]:
+            hidden = np.maximum(hidden @ weights + bias, 0.0)
+        weights, bias = self.layers[-1]
+        return (hidden @ weights + bias)[:, 0]
+    
+    @classmethod
+    def fit(cls, features: np.ndarray, targets: np.ndarray, feature_names: Sequence[str],
+            hidden: int = 16, epochs: int = 3000, learning_rate: float = 0.01,
+            weight_decay: float = 1e-4, seed: int = 0) -> "ValueModel":
+        """
+        Train model (MSE): hidden = 0 → bình phương tối thiểu, ngược lại MLP train bằng Adam full-batch
+        
+        Args:
+            features: Mảng (N, F)
+            targets: Mảng (N,) điểm cascade trung bình
+            feature_names: Tên F cột
+            hidden: Số neuron lớp ẩn (0 = tuyến tính)
+            epochs: Số bước gradient
+            learning_rate: Learning rate của Adam
+            weight_decay: Hệ số L2 (không áp dụng cho bias)
+            seed: Seed khởi tạo trọng số
+        
+        Returns:
+            ValueModel
+        """
+        x = np.asarray(features, dtype=np.float64)
+        y = np.asarray(targets, dtype=np.float64).reshape(-1, 1)
+        mean = x.mean(axis=0)
+        std = np.maximum(x.std(axis=0), 1e-6)
+        x = (x - mean) / std
+        
+        if hidden <= 0:
+            design = np.column_stack([x, np.ones(len(x))])
+            solution, *_ = np.linalg.lstsq(design, y, rcond=None)
+            return cls(feature_names, mean, std, [(solution[:-1], solution[-1])])
+        
+        # Train trên target đã chuẩn hóa, rồi gộp scale vào lớp cuối
+        y_mean, y_std = float(y.mean()), max(float(y.std()), 1e-6)
+        y = (y - y_mean) / y_std
+        
+        rng = np.random.default_rng(seed)
+        params = [rng.normal(0, np.sqrt(2 / x.shape[1]), (x.shape[1], hidden)), np.zeros(hidden),
+                  rng.normal(0, np.sqrt(1 / hidden), (hidden, 1)), np.zeros(1)]
+        moments = [np.zeros_like(p) for p in params]
+        velocities = [np.zeros_like(p) for p in params]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        
+        for step in range(1, epochs + 1):
+            w1, b1, w2, b2 = params
+            pre = x @ w1 + b1
+            act = np.maximum(pre, 0.0)
+            error = (act @ w2 + b2 - y) * (2 / len(x))
+            
+            grad_w2 = act.T @ error + weight_decay * w2
+            grad_b2 = error.sum(axis=0)
+            back = (error @ w2.T) * (pre > 0)
+            grad_w1 = x.T @ back + weight_decay * w1
+            grad_b1 = back.sum(axis=0)
+            
+            for i, grad in enumerate((grad_w1, grad_b1, grad_w2, grad_b2)):
+                moments[i] = beta1 * moments[i] + (1 - beta1) * grad
+                velocities[i] = beta2 * velocities[i] + (1 - beta2) * grad ** 2
+                m_hat = moments[i] / (1 - beta1 ** step)
+                v_hat = velocities[i] / (1 - beta2 ** step)
+                params[i] = params[i] - learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+        
+        w1, b1, w2, b2 = params
+        return cls(feature_names, mean, std, [(w1, b1), (w2 * y_std, b2 * y_std + y_mean)])
+    
+    def save(self, path: str):
+        """
+        Lưu trọng số ra file JSON
+        
+        Args:
+            path: File output
+        """
+        data = {
+            'features': list(self.feature_names),
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'layers': [{'weights': w.tolist(), 'bias': b.tolist()} for w, b in self.layers],
+            'metadata': self.metadata,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+    
+    @classmethod
+    def load(cls, path: str) -> "ValueModel":
+        """
+        Load model từ file JSON (save())
+        
+        Args:
+            path: File input
+        
+        Returns:
+            ValueModel
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        layers = [(layer['weights'], layer['bias']) for layer in data['layers']]
+        model = cls(data['features'], data['mean'], data['std'], layers, data.get('metadata'))
+        
+        expected = len(model.feature_names)
+        for weights, bias in model.layers:
+            if weights.ndim != 2 or weights.shape[0] != expected or bias.shape != (weights.shape[1],):
+                raise ValueError(f"Kích thước lớp không khớp: {weights.shape} / {bias.shape}")
+            expected = weights.shape[1]
+        if expected != 1 or model.mean.shape != (len(model.feature_names),):
+            raise ValueError("Model phải có đúng 1 output và mean/std khớp số feature")
+        return model